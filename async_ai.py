@@ -0,0 +1,114 @@
+import time
+import random
+import asyncio
+
+# --- ASÜNKROONSED AI PÄRINGUD ---
+# Mitu completion päringut korraga (semafor piirab), iga katse oma ajalimiidiga,
+# 429/5xx/võrguvea korral eksponentsiaalne ooteaeg juhusliku jitteriga.
+# Kogu partiil on üks tähtaeg: mis selleks ajaks valmis pole, tühistatakse (tulemus None).
+# Iga päringu kohta jääb kirje: tokenid, latentsus, katsete arv, staatus.
+# openai pakett imporditakse alles esimesel käivitusel (main.py laadimine jääb kergeks).
+
+
+class AsyncAIRunner:
+    def __init__(self, api_key, concurrency=4, call_timeout=20.0, max_retries=3, backoff_base=1.0, backoff_cap=20.0,
+                 client_factory=None):
+        self.api_key = api_key
+        # client_factory() -> async kontekstihaldur, millel on chat.completions.create (testides asendaja)
+        self.client_factory = client_factory or self._openai_client
+        self.concurrency = concurrency
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    def run(self, requests, deadline):
+        # requests: {võti: chat.completions.create kwargs} -> ({võti: vastuse tekst või None}, [kirjed])
+        if not requests: return {}, []
+        return asyncio.run(self._run_all(requests, deadline))
+
+    def _openai_client(self):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.api_key, max_retries=0, timeout=self.call_timeout)
+
+    async def _run_all(self, requests, deadline):
+        records = []
+        # Klient luuakse iga käivituse jaoks uuesti: httpx ühendused on seotud event loop'iga
+        async with self.client_factory() as client:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            tasks = {key: asyncio.create_task(self._complete(client, semaphore, key, kwargs, records))
+                     for key, kwargs in requests.items()}
+            done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+            for task in pending: task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = {}
+        for key, task in tasks.items():
+            results[key] = task.result() if task in done and not task.cancelled() and task.exception() is None else None
+        return results, records
+
+    async def _complete(self, client, semaphore, key, kwargs, records):
+        record = {"key": key, "model": kwargs.get("model"), "status": "error", "attempts": 0, "latency": 0.0,
+                  "elapsed": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        started = time.monotonic()
+        try:
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    record["attempts"] = attempt + 1
+                    call_started = time.monotonic()
+                    try:
+                        res = await asyncio.wait_for(client.chat.completions.create(**kwargs), self.call_timeout)
+                    except Exception as e:
+                        record["latency"] = round(time.monotonic() - call_started, 3)
+                        record["error"] = f"{type(e).__name__}: {e}"
+                        delay = self._retry_delay(e, attempt)
+                        if delay is None: return None
+                        await asyncio.sleep(delay)
+                        continue
+                    record["latency"] = round(time.monotonic() - call_started, 3)
+                    usage = getattr(res, "usage", None)
+                    for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                        record[field] = getattr(usage, field, 0) or 0
+                    record["status"] = "ok"
+                    record.pop("error", None)
+                    return res.choices[0].message.content
+        except asyncio.CancelledError:
+            record["status"] = "deadline"
+            raise
+        finally:
+            record["elapsed"] = round(time.monotonic() - started, 3)
+            records.append(record)
+
+    def _retry_delay(self, error, attempt):
+        if attempt >= self.max_retries or not is_retryable(error): return None
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None: return min(retry_after, self.backoff_cap)
+        # "Full jitter": juhuslik 0..base*2^n, et paralleelsed päringud ei prooviks korraga uuesti
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+
+def is_retryable(error):
+    import openai
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)): return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    if response is None: return None
+    try: return max(float(response.headers.get("retry-after")), 0.0)
+    except (TypeError, ValueError): return None
+
+
+def usage_summary(records):
+    ok = [r for r in records if r["status"] == "ok"]
+    return {
+        "calls": len(records),
+        "ok": len(ok),
+        "retries": sum(max(r["attempts"] - 1, 0) for r in records),
+        "deadline": sum(r["status"] == "deadline" for r in records),
+        "total_tokens": sum(r["total_tokens"] for r in records),
+        "avg_latency": round(sum(r["latency"] for r in ok) / len(ok), 3) if ok else 0.0,
+    }
@@ -0,0 +1,355 @@
+import os
+import re
+import csv
+import json
+import glob
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from indicators import build_panel, panel_indicator_frames, synthetic_ohlcv
+from strategy import StrategyConfig, DEFAULT_CONFIG, technical_score, compute_stop, final_score, order_notional
+
+# --- BACKTEST (offline, deterministlik) ---
+# Ajaloolised tunnibaarid (CSV/Parquet või bars.db) läbi sama loogika mis main.py:
+# turu režiim BTC SMA50 järgi, top 30 liikujat, strategy.technical_score, AI * 0.4 + tehnika * 0.6 > 75,
+# üks ost tsüklis, ATR stopid (strategy.compute_stop) ja cool down.
+# Indikaatorid, skoorid ja edetabel arvutatakse kogu paneelile korraga (prepare),
+# baar-baari tsükkel (simulate) teeb ainult täitmised, tasud ja libisemise.
+# Väljund on trade_archive.csv formaadis.
+
+ARCHIVE_FIELDS = ["Time", "Symbol", "Entry Price", "Exit Price", "Qty", "Profit USD", "Profit %", "Reason"]
+OHLCV = ["open", "high", "low", "close", "volume"]
+BTC_SYMBOL = "BTC/USD"
+
+# Samad piirid mis main.py-s
+SHORTLIST_SIZE = 30
+MIN_VOLUME_USD = 10000
+MAX_AI_CALLS = 10
+COOLDOWN_HOURS = 6
+MIN_HISTORY_BARS = 30  # get_technical_analysis: vähem baare -> skoor 0
+
+AI_ENTRY = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] 🧠 ANALÜÜS: (.+)$", re.MULTILINE)
+
+
+# --- ANDMED ---
+
+def normalize_bars(df):
+    df = df.rename(columns=lambda c: str(c).lower())
+    if not isinstance(df.index, pd.DatetimeIndex):
+        time_cols = [c for c in ("datetime", "timestamp", "time", "date", "ts") if c in df.columns]
+        df = df.set_index(time_cols[0] if time_cols else df.columns[0])
+    df.index = pd.to_datetime(df.index, utc=True)
+    df = df[OHLCV].astype(float).dropna()
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def symbol_from_path(path):
+    # BTC-USD.csv / BTC_USD.parquet -> BTC/USD
+    return re.sub(r"[-_]", "/", os.path.splitext(os.path.basename(path))[0]).upper()
+
+
+def load_bars(path):
+    # Kataloog (üks fail sümboli kohta) või üks fail, kus on `symbol` veerg
+    files = sorted(glob.glob(os.path.join(path, "*.csv")) + glob.glob(os.path.join(path, "*.parquet"))) if os.path.isdir(path) else [path]
+    bars = {}
+    for f in files:
+        df = pd.read_parquet(f) if f.endswith(".parquet") else pd.read_csv(f)
+        symbol_col = next((c for c in df.columns if str(c).lower() == "symbol"), None)
+        if symbol_col is None:
+            bars[symbol_from_path(f)] = normalize_bars(df)
+        else:
+            for symbol, group in df.groupby(symbol_col):
+                bars[str(symbol)] = normalize_bars(group.drop(columns=symbol_col))
+    return bars
+
+
+def load_bar_cache(path, interval="1h"):
+    # main.py bars.db (Yahoo sümbolid: BTC-USD)
+    from bar_cache import BarCache
+    cache = BarCache(path)
+    return {s.replace("-", "/"): cache.load(s, interval) for s in cache.symbols(interval)}
+
+
+def synthetic_bars(symbols=100, bars=24 * 365):
+    # Kiirustesti jaoks: esimene seeria on BTC/USD (turu režiim)
+    names = [BTC_SYMBOL] + [f"S{i:03d}/USD" for i in range(1, symbols)]
+    return {name: synthetic_ohlcv(bars=bars, seed=i) for i, name in enumerate(names)}
+
+
+def load_ai_history(path):
+    # ai_history.log -> {sümbol: (ajad UTC ns, skoorid)}. Vead (neutraalne 50) jäetakse välja.
+    with open(path, encoding="utf-8") as f: text = f.read()
+    entries = {}
+    headers = list(AI_ENTRY.finditer(text))
+    for i, header in enumerate(headers):
+        body = text[header.end():headers[i + 1].start() if i + 1 < len(headers) else len(text)]
+        output = body.split("👆 --- OUTPUT ---", 1)[-1].split("=" * 60, 1)[0].strip()
+        ts = pd.Timestamp(datetime.strptime(header.group(1), "%Y-%m-%d %H:%M:%S").astimezone()).tz_convert("UTC")
+        label = header.group(2).strip()
+        if label.startswith("PARTII"):
+            try: results = json.loads(output).get("results", [])
+            except (ValueError, AttributeError): continue
+            for item in results if isinstance(results, list) else []:
+                try: entries.setdefault(item["symbol"], []).append((ts.value, int(item["score"])))
+                except (KeyError, TypeError, ValueError): continue
+        else:
+            score = re.search(r"^SCORE: (\d+)", output, re.MULTILINE)
+            if score and "REASON: Error:" not in output:
+                entries.setdefault(label, []).append((ts.value, int(score.group(1))))
+    history = {}
+    for symbol, rows in entries.items():
+        rows.sort()
+        history[symbol] = (np.array([r[0] for r in rows], dtype=np.int64), np.array([r[1] for r in rows], dtype=float))
+    return history
+
+
+# --- ETTEVALMISTUS (vektoriseeritud) ---
+
+def market_modes(index, btc_close, fixed_mode=None):
+    # main.determine_market_mode: BTC päevahind vs SMA50 (49 lõpetatud päeva + praegune hind)
+    if fixed_mode: return np.full(len(index), fixed_mode, dtype=object)
+    if btc_close is None: return np.full(len(index), "NEUTRAL", dtype=object)
+    close = pd.Series(btc_close, index=index).ffill()
+    daily = close.resample("1D").last().dropna()
+    prev_sum = daily.rolling(49).sum().shift(1)
+    day = index.floor("D")
+    sma50 = (prev_sum.reindex(day).to_numpy() + close.to_numpy()) / 50
+    modes = np.where(close.to_numpy() > sma50, "BULL", "BEAR").astype(object)
+    modes[np.isnan(sma50)] = "NEUTRAL"
+    return modes
+
+
+def prepare(bars, fixed_mode=None):
+    bars = {s: df for s, df in bars.items() if df is not None and len(df)}
+    symbols = list(bars)
+    stamps = np.unique(np.concatenate([df.index.as_unit("ns").asi8 for df in bars.values()])) if bars else np.array([], dtype=np.int64)
+    index = pd.DatetimeIndex(pd.to_datetime(stamps, unit="ns", utc=True))
+    T, S = len(index), len(symbols)
+
+    # Indikaatorid igale sümbolile tema enda baaride peal (sama mis live), siis ühisele ajateljele
+    panel, lengths = build_panel(bars, fields=OHLCV)
+    frames = panel_indicator_frames(panel)
+    positions = [index.get_indexer(bars[s].index) for s in symbols]
+
+    def align(values):
+        out = np.full((T, S), np.nan)
+        for j in range(S): out[positions[j], j] = values[:lengths.iloc[j], j]
+        return out
+
+    m = {name: align(frame.to_numpy()) for name, frame in frames.items()}
+    for field in OHLCV:
+        m[field] = align(panel[field].to_numpy())
+    history_bars = align(np.cumsum(~np.isnan(panel["close"].to_numpy()), axis=0).astype(float))
+
+    # Alpaca päevabaar: muutus päeva avamisest, käive päeva algusest (UTC)
+    day = index.floor("D")
+    open_df = pd.DataFrame(m["open"], index=index)
+    day_open = open_df.groupby(day).transform("first").to_numpy(copy=True)
+    vol_usd = pd.DataFrame(np.nan_to_num(m["volume"] * m["close"]), index=index).groupby(day).cumsum().to_numpy(copy=True)
+    vol_usd[np.isnan(m["close"])] = np.nan
+    change = (m["close"] - day_open) / day_open * 100
+
+    modes = market_modes(index, m["close"][:, symbols.index(BTC_SYMBOL)] if BTC_SYMBOL in symbols else None, fixed_mode)
+
+    # Edetabel: suurim |muutus| ees, puuduvad andmed lõppu (stabiilne -> deterministlik)
+    abs_change = np.where(np.isfinite(change), np.abs(change), -np.inf)
+    order = np.argsort(-abs_change, axis=1, kind="stable")[:, :SHORTLIST_SIZE]
+
+    return {"index": index, "symbols": symbols, "modes": modes, "atr": m["atr"],
+            "rsi": m["rsi"], "macd_diff": m["macd_diff"], "adx": m["adx"],
+            "no_score": np.isnan(m["close"]) | (history_bars < MIN_HISTORY_BARS),
+            "open": m["open"], "high": m["high"], "low": m["low"], "close": m["close"],
+            "vol_usd": vol_usd, "abs_change": abs_change, "order": order}
+
+
+def tech_scores(m, config=DEFAULT_CONFIG):
+    # Tehniline skoor iga (baar, sümbol) kohta selle konfi RSI/ADX piiridega
+    modes = m["modes"]
+    tech = np.zeros(m["rsi"].shape)
+    for mode in ("BULL", "BEAR", "NEUTRAL"):
+        rows = modes == mode
+        if rows.any():
+            tech[rows] = technical_score(mode, m["rsi"][rows], m["macd_diff"][rows], m["adx"][rows], m["vol_usd"][rows], config)
+    tech[m["no_score"] | np.isnan(tech)] = 0
+    return np.floor(tech)
+
+
+# --- SIMULATSIOON ---
+
+def simulate(m, config=DEFAULT_CONFIG, tech=None, ai_history=None, ai_score=50, ai_ttl_hours=3, fee_bps=25, slippage_bps=5,
+             initial_cash=10000.0, start=None, end=None, close_at_end=True):
+    # tech = tech_scores(m, config) eelarvutatuna (optimeerija kasutab sama maatriksit mitmes aknas)
+    index, symbols = m["index"], m["symbols"]
+    times = index.as_unit("ns").asi8  # sama ühik mis load_ai_history ajal
+    hour = pd.Timedelta(hours=1).value
+    first = index.searchsorted(utc_timestamp(start)) if start is not None else 0
+    last = index.searchsorted(utc_timestamp(end)) if end is not None else len(index)
+
+    fee, slip = fee_bps / 10000, slippage_bps / 10000
+    cooldown, ai_ttl = COOLDOWN_HOURS * hour, ai_ttl_hours * hour
+    o, h, l, c = m["open"], m["high"], m["low"], m["close"]
+    if tech is None: tech = tech_scores(m, config)
+    atr_m, vol_usd, abs_change, order, modes = m["atr"], m["vol_usd"], m["abs_change"], m["order"], m["modes"]
+    ai_by_col = [ai_history.get(s) if ai_history else None for s in symbols]
+
+    cash = float(initial_cash)
+    positions = {}
+    last_sold = np.full(len(symbols), np.iinfo(np.int64).min // 2, dtype=np.int64)
+    trades, equity = [], np.full(max(last - first, 0), np.nan)
+    fees_paid = 0.0
+
+    def sell(j, t, exit_price, reason):
+        nonlocal cash, fees_paid
+        pos = positions.pop(j)
+        gross = pos["qty"] * exit_price
+        proceeds = gross * (1 - fee)
+        fees_paid += gross * fee
+        cash += proceeds
+        profit = proceeds - pos["notional"]
+        last_sold[j] = times[t]
+        trades.append([index[t].strftime("%Y-%m-%d %H:%M:%S"), symbols[j], round(pos["entry"], 4), round(exit_price, 4),
+                       round(pos["qty"], 4), round(profit, 2), round(profit / pos["notional"] * 100, 2), reason])
+
+    for t in range(first, last):
+        mode = modes[t]
+
+        # 1. PORTFELL: stopp baari sees (madalaim hind), siis tipp ja riskivaba olek sulgemishinnaga
+        for j in list(positions):
+            if np.isnan(c[t, j]): continue
+            pos = positions[j]
+            stop, stop_type, _ = compute_stop(mode, pos["entry"], -np.inf, pos["hw"], pos["atr"], pos["risk_free"], config)
+            if l[t, j] <= stop:
+                sell(j, t, min(o[t, j], stop) * (1 - slip), stop_type)
+                continue
+            pos["hw"] = max(pos["hw"], h[t, j])
+            pos["price"] = c[t, j]
+            profit_pct = (c[t, j] - pos["entry"]) / pos["entry"] * 100
+            stop, stop_type, pos["risk_free"] = compute_stop(mode, pos["entry"], profit_pct, pos["hw"], pos["atr"], pos["risk_free"], config)
+            if c[t, j] <= stop: sell(j, t, c[t, j] * (1 - slip), stop_type)
+
+        holdings = sum(p["qty"] * p["price"] for p in positions.values())
+        notional = order_notional(mode, cash + holdings, config)
+
+        # 2. SKANNER + AI: edetabeli järjekorras esimene, mille lõpphinne > 75
+        if notional is not None and notional <= cash:
+            ai_calls = 0
+            for j in order[t]:
+                if abs_change[t, j] == -np.inf: break
+                if j in positions or times[t] - last_sold[j] < cooldown or vol_usd[t, j] < MIN_VOLUME_USD: continue
+                if tech[t, j] < config.min_tech_score: continue
+                if ai_calls >= MAX_AI_CALLS: break
+                ai_calls += 1
+                score = final_score(lookup_ai(ai_by_col[j], times[t], ai_ttl, ai_score), tech[t, j], config)
+                if score > config.buy_score:
+                    entry = c[t, j] * (1 + slip)
+                    fees_paid += notional * fee
+                    cash -= notional
+                    positions[j] = {"entry": entry, "notional": notional, "qty": notional / entry * (1 - fee),
+                                    "hw": entry, "atr": atr_m[t, j], "risk_free": False, "price": c[t, j]}
+                    break # Üks tehing tsükli kohta
+
+        equity[t - first] = cash + sum(p["qty"] * p["price"] for p in positions.values())
+
+    if close_at_end and last > first:
+        for j in list(positions): sell(j, last - 1, positions[j]["price"] * (1 - slip), "BACKTEST END")
+        equity[-1] = cash
+
+    trades = pd.DataFrame(trades, columns=ARCHIVE_FIELDS)
+    equity = pd.Series(equity, index=index[first:last], name="equity")
+    return {"trades": trades, "equity": equity, "open_positions": len(positions),
+            "summary": summarize(trades, equity, initial_cash, fees_paid)}
+
+
+def utc_timestamp(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def lookup_ai(history, now, ttl, default):
+    # Viimane logitud AI skoor, kui see on AI vahemälu TTL-i piires (nagu live vahemälu), muidu stub
+    if history is None: return default
+    i = np.searchsorted(history[0], now, side="right") - 1
+    return history[1][i] if i >= 0 and now - history[0][i] <= ttl else default
+
+
+def summarize(trades, equity, initial_cash, fees_paid=0.0):
+    final = float(equity.iloc[-1]) if len(equity) else float(initial_cash)
+    curve = equity.dropna()
+    drawdown = float(((curve / curve.cummax()) - 1).min() * 100) if len(curve) else 0.0
+    wins = int((trades["Profit USD"] > 0).sum())
+    return {
+        "trades": len(trades),
+        "wins": wins,
+        "win_rate": round(wins / len(trades) * 100, 1) if len(trades) else 0.0,
+        "pnl_usd": round(float(trades["Profit USD"].sum()), 2),
+        "return_pct": round((final / initial_cash - 1) * 100, 2),
+        "max_drawdown_pct": round(drawdown, 2),
+        "fees_usd": round(fees_paid, 2),
+        "final_equity": round(final, 2),
+    }
+
+
+def write_trades(trades, path):
+    trades.to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL)
+
+
+# --- KÄSUREA LIIDES ---
+
+def add_market_args(parser):
+    # Andmeallikas + simulatsiooni seaded (jagatud optimizer.py-ga)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="CSV/Parquet fail või kataloog (fail sümboli kohta)")
+    source.add_argument("--bars-db", help="main.py baaride vahemälu (bars.db)")
+    source.add_argument("--synthetic", type=int, metavar="N", help="N sünteetilist sümbolit (kiirustest)")
+    parser.add_argument("--bars", type=int, default=24 * 365, help="sünteetiliste baaride arv")
+    parser.add_argument("--mode", choices=["auto", "BULL", "BEAR"], default="auto", help="turu režiim (auto = BTC/USD SMA50)")
+    parser.add_argument("--ai-score", type=float, default=50, help="AI skoor, kui logist pole (stub)")
+    parser.add_argument("--ai-log", help="ai_history.log, mille skoore korrata")
+    parser.add_argument("--ai-ttl-hours", type=float, default=3)
+    parser.add_argument("--fee-bps", type=float, default=25)
+    parser.add_argument("--slippage-bps", type=float, default=5)
+    parser.add_argument("--cash", type=float, default=10000)
+
+
+def load_market(args):
+    if args.data: bars = load_bars(args.data)
+    elif args.bars_db: bars = load_bar_cache(args.bars_db)
+    else: bars = synthetic_bars(args.synthetic, args.bars)
+    return prepare(bars, fixed_mode=None if args.mode == "auto" else args.mode)
+
+
+def simulation_options(args):
+    return {"ai_history": load_ai_history(args.ai_log) if args.ai_log else None, "ai_score": args.ai_score,
+            "ai_ttl_hours": args.ai_ttl_hours, "fee_bps": args.fee_bps, "slippage_bps": args.slippage_bps,
+            "initial_cash": args.cash}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vibe Trader backtest (tunnibaarid, sama skoor ja stopid mis main.py)")
+    add_market_args(parser)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--config", help="StrategyConfig JSON (nt optimizer.py parim tulemus)")
+    parser.add_argument("--out", default="backtest_trades.csv")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    m = load_market(args)
+    prepared = time.perf_counter()
+    result = simulate(m, config=StrategyConfig.load(args.config), start=args.start, end=args.end, **simulation_options(args))
+    done = time.perf_counter()
+
+    write_trades(result["trades"], args.out)
+    s = result["summary"]
+    print(f"📈 BACKTEST: {len(m['symbols'])} sümbolit x {len(m['index'])} baari "
+          f"(andmed + indikaatorid {prepared - started:.2f}s, simulatsioon {done - prepared:.2f}s)")
+    print(f"   Tehinguid {s['trades']} | võite {s['win_rate']}% | PnL ${s['pnl_usd']:,.2f} | tootlus {s['return_pct']}% | "
+          f"max drawdown {s['max_drawdown_pct']}% | tasud ${s['fees_usd']:,.2f}")
+    print(f"   -> {args.out}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# --- OHLCV BAARIDE KOHALIK VAHEMÄLU (SQLite) ---
+# Üks tabel kõigile sümbolitele/intervallidele. Hoiame ainult vajaliku akna jagu
+# ajalugu, uued baarid laetakse Yahoost delta-päringuga (alates viimasest baarist).
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bars (
+        symbol TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        open REAL, high REAL, low REAL, close REAL, volume REAL,
+        PRIMARY KEY (symbol, interval, ts)
+    ) WITHOUT ROWID
+"""
+
+# Voogindikaatorite olek (indicators.IndicatorEngine.state()) elab samas failis
+STATE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS indicator_state (
+        symbol TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        state TEXT NOT NULL,
+        PRIMARY KEY (symbol, interval)
+    ) WITHOUT ROWID
+"""
+
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+# Mitu intervalli sammu võib puududa, enne kui seeria loetakse auguga seeriaks
+GAP_STEPS = 3
+
+# Yahoo kuu/aasta perioodid on kalendripõhised ("1mo" = 28..31 päeva) -> DateOffset, mitte fikseeritud päevad
+PERIOD_SPANS = {
+    "1d": pd.Timedelta(days=1),
+    "5d": pd.Timedelta(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+}
+
+INTERVAL_STEPS = {
+    "1m": pd.Timedelta(minutes=1),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "1h": pd.Timedelta(hours=1),
+    "60m": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+}
+
+
+class BarCache:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn: yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        try:
+            with self._connect() as conn:
+                conn.execute(SCHEMA)
+                conn.execute(STATE_SCHEMA)
+        except sqlite3.DatabaseError:
+            # Katkine fail (nt poolik kirjutus) -> tõstame kõrvale ja alustame puhtalt
+            os.replace(self.path, self.path + ".corrupt")
+            with self._connect() as conn:
+                conn.execute(SCHEMA)
+                conn.execute(STATE_SCHEMA)
+
+    def load(self, symbol, interval, since=None):
+        query = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(int(since.timestamp()))
+        query += " ORDER BY ts"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows: return None
+        df = pd.DataFrame(rows, columns=["ts"] + COLUMNS)
+        df.index = pd.to_datetime(df.pop("ts"), unit="s", utc=True)
+        df.index.name = "Datetime"
+        return df
+
+    def symbols(self, interval):
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT symbol FROM bars WHERE interval = ? ORDER BY symbol", (interval,))]
+
+    def upsert(self, symbol, interval, df, replace=False):
+        if df is None or df.empty: return
+        idx = utc_index(df.index)
+        ts = ((idx - EPOCH) // pd.Timedelta(seconds=1)).tolist()
+        values = df[COLUMNS].astype(float).values.tolist()
+        rows = [(symbol, interval, t, *v) for t, v in zip(ts, values)]
+        with self._lock, self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+            # Viimane baar võib olla pooleli -> INSERT OR REPLACE kirjutab selle üle
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def evict(self, interval, older_than):
+        with self._lock, self._connect() as conn:
+            cur = conn.execute("DELETE FROM bars WHERE interval = ? AND ts < ?", (interval, int(older_than.timestamp())))
+            return cur.rowcount
+
+    def load_state(self, symbol, interval):
+        with self._connect() as conn:
+            row = conn.execute("SELECT state FROM indicator_state WHERE symbol = ? AND interval = ?", (symbol, interval)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_state(self, symbol, interval, state):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO indicator_state VALUES (?, ?, ?)", (symbol, interval, json.dumps(state)))
+
+
+def utc_index(index):
+    # Yahoo päevabaaride ajatelg on ilma ajavööndita, vahemälu oma UTC-s
+    return index if index.tz is not None else index.tz_localize("UTC")
+
+
+def find_problem(df, step, window_start):
+    # Tagastab põhjuse, miks seeriat ei saa delta-uuendada (None = korras)
+    if df is None or df.empty: return "puudub"
+    if df[COLUMNS[:4]].isna().any().any() or (df["close"] <= 0).any(): return "vigased väärtused"
+    if (df["high"] < df["low"]).any(): return "high < low"
+    if not df.index.is_monotonic_increasing or df.index.has_duplicates: return "ajatelg segamini"
+    if df.index[0] > window_start + GAP_STEPS * step: return "ajalugu liiga lühike"
+    gaps = df.index.to_series().diff().dropna()
+    if (gaps > GAP_STEPS * step).any(): return "auk andmetes"
+    return None
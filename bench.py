@@ -0,0 +1,565 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib
+import subprocess
+import statistics
+import threading
+import contextlib
+from types import SimpleNamespace as NS
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import requests
+from http_client import HttpClient
+from indicators import synthetic_ohlcv
+
+# --- JÕUDLUSTESTID (main.py kuumad teed ilma võrguta) ---
+# Alpaca, Yahoo, DDG ja OpenAI asendatakse kohalike asendajatega, mis serveerivad
+# salvestatud andmeid (fixtures): snapshotid, OHLCV baarid, uudiste HTML (päris HTTP
+# kohalikult serverilt -> trafilatura), valmis AI vastused. main.py kirjutab kõik failid
+# ajutisse kausta (VIBE_DATA_DIR), päris brain.json ja logid jäävad puutumata.
+#
+#   python3 bench.py                      # sünteetilised andmed, võrdlus baseline'iga
+#   python3 bench.py --save               # tulemused -> bench_baseline.json
+#   python3 bench.py --record fixtures/   # päris API-dest andmed kausta (vajab võtmeid)
+#   python3 bench.py --fixtures fixtures/ --only full_cycle_steady
+#   python3 bench.py --only startup_import # main.py import aeg (-X importtime) + laiskade moodulite kontroll
+#
+# Impordi kontroll ei sõltu baseline'ist (see on masinapõhine ja repos puudub): kohe laetud
+# raske moodul või import üle STARTUP_BUDGET_SECONDS on alati regressioon (tests/test_startup.py).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BASE_DIR, "bench_baseline.json")
+
+# Korratav keskkond: need seaded määravad, millist koodirada mõõdetakse (--env kirjutab üle)
+BENCH_ENV = {
+    "STATE_BACKEND": "json", "BAR_CACHE": "1", "NEWS_CACHE_PERSIST": "0", "LOG_JSON": "0",
+    "AI_BATCH": "0", "AI_ASYNC": "0", "CONCURRENT_SCANNER": "0", "VECTOR_SCAN": "0",
+    "STREAMING_INDICATORS": "1", "BRAIN_FLUSH_SECONDS": "0", "PROFILE_CYCLES": "", "METRICS_PORT": "0",
+    "STRATEGY_CONFIG": "", "DDG_SECONDS_PER_QUERY": "0.001",
+}
+
+# main.py import ei tohi neid laadida (lazy.py: alles esimesel kasutamisel)
+LAZY_MODULES = ("openai", "yfinance", "trafilatura", "ddgs", "alpaca", "lxml")
+STARTUP_BENCH = "startup_import"
+STARTUP_BUDGET_SECONDS = 3.0  # main.py impordi mediaani absoluutne lagi (praegu ~1 s: pandas, numpy, ta)
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$")
+
+ARTICLE_TEXT = (
+    "{ticker} rallied after the network announced a major protocol upgrade that cuts transaction fees. "
+    "Analysts said on-chain activity for {ticker} rose sharply over the past week, with daily active addresses "
+    "reaching a three-month high. Exchange inflows declined, which traders often read as reduced selling pressure. "
+    "The development team confirmed the upgrade timeline and published an audit report from an independent firm. "
+)
+
+RSS_FEED = ("<?xml version='1.0'?><rss><channel>" +
+            "".join(f"<item><title>Market wrap {i}</title><pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>" for i in range(3)) +
+            "</channel></rss>")
+
+
+# --- ANDMED (FIXTURES) ---
+
+def synthetic_fixtures(symbols=120, hourly_bars=800, daily_bars=200, seed=7):
+    names = ["BTC/USD"] + [f"S{i:03d}/USD" for i in range(1, symbols)]
+    rng = np.random.default_rng(seed)
+    bars = {s: synthetic_ohlcv(bars=hourly_bars, seed=seed + i) for i, s in enumerate(names)}
+    btc_daily = synthetic_ohlcv(bars=daily_bars, seed=seed + 10_000)
+    btc_daily.index = pd.date_range("2024-01-01", periods=daily_bars, freq="D", tz="UTC")
+
+    snapshots = {}
+    for s, df in bars.items():
+        day = df.iloc[-24:]
+        snapshots[s] = {"open": float(day["open"].iloc[0]), "close": float(day["close"].iloc[-1]),
+                        "volume": float(day["volume"].sum())}
+
+    news, llm = {}, {}
+    for s in names[1:]:
+        ticker = s.split("/")[0]
+        news[s] = [{"title": f"{ticker} headline {i}", "date": "2024-01-01", "body": f"{ticker} summary {i}",
+                    "html": "<html><head><title>{t}</title></head><body><article><h1>{t}</h1>{p}</article></body></html>".format(
+                        t=f"{ticker} headline {i}", p="".join(f"<p>{ARTICLE_TEXT.format(ticker=ticker)}</p>" for _ in range(6)))}
+                   for i in range(3)]
+        llm[s] = {"score": int(rng.integers(40, 95)), "reason": f"Canned verdict for {ticker}."}
+
+    positions = [{"symbol": s, "qty": 10.0, "avg_entry_price": snapshots[s]["close"] / 1.01,
+                  "current_price": snapshots[s]["close"], "unrealized_plpc": 0.01} for s in names[1:3]]
+    return {"snapshots": snapshots, "bars_1h": bars, "btc_1d": btc_daily, "news": news, "llm": llm, "positions": positions}
+
+
+def _safe(symbol):
+    return symbol.replace("/", "_")
+
+
+def save_fixtures(fx, path):
+    os.makedirs(os.path.join(path, "bars_1h"), exist_ok=True)
+    for s, df in fx["bars_1h"].items(): df.to_csv(os.path.join(path, "bars_1h", f"{_safe(s)}.csv"))
+    fx["btc_1d"].to_csv(os.path.join(path, "btc_1d.csv"))
+    for name in ("snapshots", "news", "llm", "positions"):
+        with open(os.path.join(path, f"{name}.json"), "w") as f: json.dump(fx[name], f, indent=1)
+
+
+def load_fixtures(path):
+    def read_bars(file):
+        df = pd.read_csv(file, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True)
+        return df
+    fx = {"bars_1h": {}, "btc_1d": read_bars(os.path.join(path, "btc_1d.csv"))}
+    for name in ("snapshots", "news", "llm", "positions"):
+        with open(os.path.join(path, f"{name}.json")) as f: fx[name] = json.load(f)
+    for s in fx["snapshots"]:
+        file = os.path.join(path, "bars_1h", f"{_safe(s)}.csv")
+        if os.path.exists(file): fx["bars_1h"][s] = read_bars(file)
+    return fx
+
+
+def record_fixtures(main, path, limit=60, news_symbols=5):
+    # Päris API-d: Alpaca snapshotid + positsioonid, Yahoo baarid, DDG uudised + artiklite HTML, OpenAI verdiktid
+    from alpaca.data.requests import CryptoSnapshotRequest
+    from alpaca.trading.requests import GetAssetsRequest
+    from alpaca.trading.enums import AssetClass, AssetStatus
+
+    assets = main.trading_client.get_all_assets(GetAssetsRequest(asset_class=AssetClass.CRYPTO, status=AssetStatus.ACTIVE))
+    tradable = [a.symbol for a in assets if a.tradable and a.symbol.endswith("/USD")]
+    raw = main.data_client.get_crypto_snapshot(CryptoSnapshotRequest(symbol_or_symbols=tradable))
+    snapshots = {s: {"open": float(snap.daily_bar.open), "close": float(snap.daily_bar.close), "volume": float(snap.daily_bar.volume)}
+                 for s, snap in raw.items() if snap.daily_bar}
+    ranked = [c["symbol"] for c in main.rank_candidates(raw)][:limit]
+    if "BTC/USD" not in ranked: ranked.append("BTC/USD")
+    snapshots = {s: snapshots[s] for s in ranked if s in snapshots}
+
+    main.bar_cache = None
+    bars = main.get_yahoo_data_batch(list(snapshots), period="1mo", interval="1h")
+    btc_1d = main.get_yahoo_data("BTC/USD", period="6mo", interval="1d")
+
+    news, llm = {}, {}
+    for s in [s for s in ranked if s != "BTC/USD" and s in bars][:news_symbols]:
+        ticker = s.split("/")[0]
+        items = []
+        for item in main.DDGS().news(keywords=f"{ticker} crypto news", region="wt-wt", safesearch="off", max_results=3) or []:
+            try: html = requests.get(item.get("url", ""), timeout=10).text
+            except Exception: html = ""
+            items.append({"title": item.get("title", ""), "date": item.get("date", ""), "body": item.get("body", ""), "html": html})
+        news[s] = items
+        articles = "\n".join(f"TITLE: {i['title']}\nCONTENT:\n{i['body']}" for i in items)
+        res = main.ai_client.chat.completions.create(**main.coin_request(main.build_coin_prompt(s, articles)))
+        try: llm[s] = json.loads(res.choices[0].message.content)
+        except ValueError: llm[s] = {"score": 50, "reason": "unparsable"}
+
+    positions = [{"symbol": p.symbol, "qty": float(p.qty), "avg_entry_price": float(p.avg_entry_price),
+                  "current_price": float(p.current_price), "unrealized_plpc": float(p.unrealized_plpc)}
+                 for p in main.trading_client.get_all_positions()]
+    fx = {"snapshots": snapshots, "bars_1h": bars, "btc_1d": btc_1d, "news": news, "llm": llm, "positions": positions}
+    save_fixtures(fx, path)
+    return fx
+
+
+# --- KOHALIKUD ASENDAJAD (stand-ins) ---
+
+def shift_to(df, end):
+    # Salvestatud seeria nihutatakse nii, et viimane baar on "praegu" (vahemälu värskuskontroll)
+    return df.set_axis(df.index + (end - df.index[-1]))
+
+
+class NewsServer:
+    # Päris HTTP kohalikul pordil: artiklid ja RSS käivad läbi http_client nagu toodangus
+    def __init__(self, pages):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, name="bench-news", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+class FakeTradingClient:
+    def __init__(self, fx):
+        self.snapshots = fx["snapshots"]
+        self.positions = [NS(**p) for p in fx["positions"]]
+        self.orders = []
+
+    def get_account(self):
+        return NS(equity="10000", cash="5000")
+
+    def get_all_positions(self):
+        return list(self.positions)
+
+    def get_open_position(self, symbol):
+        return next(p for p in self.positions if p.symbol == symbol)
+
+    def close_position(self, symbol):
+        return None
+
+    def get_all_assets(self, request=None):
+        return [NS(symbol=s, tradable=True) for s in self.snapshots]
+
+    def submit_order(self, request):
+        self.orders.append(request)
+
+
+class FakeDataClient:
+    def __init__(self, fx):
+        self.snapshots = fx["snapshots"]
+
+    def get_crypto_snapshot(self, request):
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        return {s: NS(daily_bar=NS(**self.snapshots[s]), latest_trade=NS(price=self.snapshots[s]["close"]))
+                for s in symbols if s in self.snapshots}
+
+
+class FakeYahoo:
+    # yf.download / yf.Ticker(...).news sama kujuga vastustega (suurtähtedega veerud, MultiIndex partiis)
+    def __init__(self, fx, to_yahoo, news_base, period_spans):
+        now = pd.Timestamp.now(tz="UTC").floor("h")
+        self.hourly = {to_yahoo(s): shift_to(df, now) for s, df in fx["bars_1h"].items()}
+        self.daily = {to_yahoo("BTC/USD"): shift_to(fx["btc_1d"], now.floor("D"))}
+        self.period_spans = period_spans
+        self.news = {to_yahoo(s): [{"title": n["title"], "link": f"{news_base}/news/{_safe(s)}/{i}"} for i, n in enumerate(items)]
+                     for s, items in fx["news"].items()}
+
+    def download(self, tickers, period=None, interval="1h", start=None, **kwargs):
+        frames = self.daily if interval == "1d" else self.hourly
+        names = [tickers] if isinstance(tickers, str) else list(tickers)
+        out = {}
+        for name in names:
+            df = frames.get(name)
+            if df is None: continue
+            if start is not None:
+                start_ts = pd.Timestamp(start)
+                start_ts = start_ts.tz_localize("UTC") if start_ts.tzinfo is None else start_ts.tz_convert("UTC")
+                df = df[df.index >= start_ts]
+            elif period in self.period_spans:
+                df = df[df.index >= df.index[-1] - self.period_spans[period]]
+            out[name] = df.rename(columns=str.capitalize)
+        if not out: return pd.DataFrame()
+        if isinstance(tickers, str): return out[tickers]
+        return pd.concat(out, axis=1)
+
+    def Ticker(self, y_symbol):
+        return NS(news=self.news.get(y_symbol, []))
+
+
+def fake_ddgs(fx, news_base):
+    by_ticker = {s.split("/")[0]: (s, items) for s, items in fx["news"].items()}
+
+    class FakeDDGS:
+        def __init__(self, timeout=None):
+            pass
+
+        def news(self, keywords, **kwargs):
+            symbol, items = by_ticker.get(keywords.split()[0], (None, []))
+            return [{"title": n["title"], "url": f"{news_base}/news/{_safe(symbol)}/{i}", "date": n["date"], "body": n["body"]}
+                    for i, n in enumerate(items)]
+    return FakeDDGS
+
+
+class FakeOpenAI:
+    def __init__(self, fx):
+        self.verdicts = fx["llm"]
+        self.chat = NS(completions=NS(create=self.create))
+
+    def verdict(self, symbol):
+        return self.verdicts.get(symbol, {"score": 50, "reason": "No fixture for this coin."})
+
+    def create(self, model=None, messages=None, **kwargs):
+        prompt = messages[-1]["content"]
+        coins = re.findall(r"=== COIN: (\S+) ===", prompt)
+        if coins:
+            content = json.dumps({"results": [{"symbol": s, **self.verdict(s)} for s in coins]})
+        else:
+            symbol = re.search(r"NEWS for (\S+) to decide", prompt)
+            content = json.dumps(self.verdict(symbol.group(1) if symbol else ""))
+        return NS(choices=[NS(message=NS(content=content))], usage=NS(total_tokens=len(prompt) // 4))
+
+
+class FakeAsyncOpenAI:
+    # AsyncAIRunner-i klient (AI_ASYNC=1): samad vastused mis FakeOpenAI-l
+    def __init__(self, fx):
+        self.sync = FakeOpenAI(fx)
+        self.chat = NS(completions=NS(create=self.create))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def create(self, **kwargs):
+        return self.sync.create(**kwargs)
+
+
+def install_stand_ins(main, fx):
+    pages = {f"/news/{_safe(s)}/{i}": n["html"] for s, items in fx["news"].items() for i, n in enumerate(items)}
+    pages["/rss/search"] = RSS_FEED  # http.host_map: news.google.com -> kohalik server
+    server = NewsServer(pages)
+    main.trading_client = FakeTradingClient(fx)
+    main.data_client = FakeDataClient(fx)
+    main.market_data.trading_client, main.market_data.data_client = main.trading_client, main.data_client
+    main.yf = FakeYahoo(fx, main.format_symbol_for_yahoo, server.base, main.PERIOD_SPANS)
+    main.DDGS = fake_ddgs(fx, server.base)
+    main.ai_client = FakeOpenAI(fx)
+    main.ai_runner.client_factory = lambda: FakeAsyncOpenAI(fx)
+    # Sama HttpClient mis toodangus, aga lubab kohaliku serveri ja suunab Google RSS-i kohalikule serverile
+    main.http = HttpClient(timeout=5, max_retries=0, allow_private=True, observer=main.observe_http,
+                           host_map={"news.google.com": server.base})
+    return server
+
+
+# --- MÕÕTMINE ---
+
+class Bench:
+    def __init__(self, main, fx, data_dir):
+        self.main = main
+        self.fx = fx
+        self.data_dir = data_dir
+        self.frames = {s: df for s, df in main.get_yahoo_data_batch(list(fx["bars_1h"]), period="1mo", interval="1h").items()}
+        self.ta_symbols = [s for s in fx["bars_1h"] if s != "BTC/USD"][:30]
+        self.news_symbols = list(fx["news"])[:5]
+        self.resets = 0
+
+    @contextlib.contextmanager
+    def patched(self, **attrs):
+        old = {k: getattr(self.main, k) for k in attrs}
+        for k, v in attrs.items(): setattr(self.main, k, v)
+        try: yield
+        finally:
+            for k, v in old.items(): setattr(self.main, k, v)
+
+    def reset_caches(self):
+        m = self.main
+        m.news_cache = m.TTLCache(m.news_cache.maxsize, m.news_cache.ttl)
+        m.article_cache = m.TTLCache(m.article_cache.maxsize, m.article_cache.ttl)
+        m.ai_cache = m.TTLCache(m.ai_cache.maxsize, m.ai_cache.ttl)
+
+    def reset_all(self):
+        # Külm tsükkel: tühjad vahemälud, indikaatorite olek ja baaride andmebaas
+        self.resets += 1
+        self.reset_caches()
+        self.main.INDICATOR_ENGINES.clear()
+        self.main.market_data.asset_cache = self.main.asset_cache = self.main.TTLCache(1, self.main.ASSET_CACHE_TTL)
+        self.main.bar_cache = self.main.BarCache(os.path.join(self.data_dir, f"bars_{self.resets}.db"))
+
+    def technical_analysis(self):
+        for s in self.ta_symbols:
+            self.main.get_technical_analysis(s, 1e6, df=self.frames[s])
+
+    def technical_analysis_cold(self):
+        with self.patched(bar_cache=None):
+            self.main.INDICATOR_ENGINES.clear()
+            self.technical_analysis()
+
+    def technical_analysis_legacy(self):
+        with self.patched(STREAMING_INDICATORS=False):
+            self.technical_analysis()
+
+    def rank_candidates(self):
+        snapshots = self.main.data_client.get_crypto_snapshot(NS(symbol_or_symbols=list(self.fx["snapshots"])))
+        for _ in range(10):
+            candidates = self.main.rank_candidates(snapshots)
+            self.main.build_shortlist(candidates, [p["symbol"] for p in self.fx["positions"]])
+
+    def score_universe(self):
+        m = self.main
+        snapshots = m.data_client.get_crypto_snapshot(NS(symbol_or_symbols=list(self.fx["snapshots"])))
+        with self.patched(bar_cache=None, VECTOR_SCAN=True):
+            m.score_universe(m.build_shortlist(m.rank_candidates(snapshots), []))
+
+    def brain_helpers(self):
+        m = self.main
+        for i in range(200):
+            s = f"B{i:03d}/USD"
+            m.update_position_metadata(s, 1.5)
+            m.update_high_watermark(s, 100 + i)
+            m.get_position_data(s)
+            m.set_risk_free_status(s)
+            m.is_cooled_down(s)
+            m.activate_cooldown(s)
+        m.save_brain()
+
+    def log_trades(self):
+        for i in range(200):
+            self.main.log_trade_to_csv(f"T{i % 20:02d}/USD", 100.0, 100.0 + (i % 7) - 3, 1.5, "HARD 🛑")
+
+    def news(self):
+        for s in self.news_symbols: self.main.get_news_hybrid(s)
+
+    def full_cycle(self):
+        self.main.run_cycle()
+
+
+BENCHMARKS = {
+    # nimi: (meetod, ettevalmistus iga korduse eel (ei mõõdeta))
+    "technical_analysis_warm": ("technical_analysis", None),
+    "technical_analysis_cold": ("technical_analysis_cold", None),
+    "technical_analysis_legacy": ("technical_analysis_legacy", None),
+    "rank_candidates": ("rank_candidates", None),
+    "score_universe": ("score_universe", None),
+    "brain_helpers": ("brain_helpers", None),
+    "log_trade_to_csv": ("log_trades", None),
+    "news_cold": ("news", "reset_caches"),
+    "news_warm": ("news", None),
+    "full_cycle_cold": ("full_cycle", "reset_all"),
+    "full_cycle_steady": ("full_cycle", None),
+}
+
+
+def measure(fn, setup=None, repeat=5, warmup=1):
+    times = []
+    for i in range(warmup + repeat):
+        if setup is not None: setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+        if i >= warmup: times.append(elapsed)
+    return {"median": statistics.median(times), "min": min(times), "mean": statistics.fmean(times), "repeat": repeat}
+
+
+def compare(results, baseline, threshold):
+    # [(nimi, muutus), ...] mediaanide suhe; regressioon = aeglasem kui (1 + threshold) korda
+    rows = []
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        change = r["median"] / base["median"] - 1 if base and base["median"] > 0 else None
+        rows.append((name, r, base, change, change is not None and change > threshold))
+    return rows
+
+
+def bench_env(data_dir, overrides):
+    env = {**BENCH_ENV, **overrides, "VIBE_DATA_DIR": data_dir}
+    for key in ("ALPACA_API_KEY", "ALPACA_SECRET_KEY", "OPENAI_API_KEY"): env[key] = os.environ.get(key) or "bench"
+    return env
+
+
+def import_profile(data_dir, overrides):
+    # python -X importtime -c "import main" puhtas protsessis -> {moodul: kumulatiivne aeg sekundites}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BASE_DIR,
+                          env={**os.environ, **bench_env(data_dir, overrides)}, capture_output=True, text=True, timeout=300)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match: modules[match.group(2)] = int(match.group(1)) / 1e6
+    if proc.returncode != 0 or "main" not in modules:
+        raise RuntimeError(f"main.py import ebaõnnestus:\n{proc.stderr[-1000:]}")
+    return modules
+
+
+def measure_startup(data_dir, overrides, repeat=5, warmup=1):
+    # main.py import aeg + rasked paketid, mis laeti kohe (peaksid olema laisad)
+    times, eager = [], set()
+    for i in range(warmup + repeat):
+        modules = import_profile(data_dir, overrides)
+        if i >= warmup: times.append(modules["main"])
+        eager |= {name.split(".")[0] for name in modules if name.split(".")[0] in LAZY_MODULES}
+    return {"median": statistics.median(times), "min": min(times), "mean": statistics.fmean(times), "repeat": repeat,
+            "eager": sorted(eager)}
+
+
+def import_main(data_dir, overrides):
+    os.environ.update(bench_env(data_dir, overrides))
+    sys.path.insert(0, BASE_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return importlib.import_module("main")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vibe Trader jõudlustestid (kohalikud asendajad, ilma võrguta)")
+    parser.add_argument("--fixtures", help="salvestatud andmete kaust (vaikimisi sünteetilised)")
+    parser.add_argument("--record", metavar="KAUST", help="salvesta päris API-de andmed kausta ja lõpeta")
+    parser.add_argument("--symbols", type=int, default=120, help="sünteetilise universumi suurus")
+    parser.add_argument("--only", action="append", choices=[STARTUP_BENCH, *BENCHMARKS], help="ainult need testid (korratav)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--env", action="append", default=[], metavar="NIMI=VÄÄRTUS", help="main.py seade (nt VECTOR_SCAN=1)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="kirjuta tulemused baseline'iks")
+    parser.add_argument("--threshold", type=float, default=0.20, help="lubatud aeglustumine (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="regressiooni korral väljumiskood 1")
+    parser.add_argument("--max-startup", type=float, default=STARTUP_BUDGET_SECONDS, help="main.py impordi lagi sekundites (0 = väljas)")
+    args = parser.parse_args(argv)
+
+    overrides = dict(item.split("=", 1) for item in args.env)
+    data_dir = tempfile.mkdtemp(prefix="vibe-bench-")
+    server = None
+    try:
+        main_module = import_main(data_dir, overrides)
+        if args.record:
+            fx = record_fixtures(main_module, args.record)
+            print(f"📼 Salvestatud: {len(fx['snapshots'])} snapshoti, {len(fx['bars_1h'])} seeriat, {len(fx['news'])} uudisteplokki -> {args.record}")
+            return 0
+
+        fx = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(symbols=args.symbols)
+        server = install_stand_ins(main_module, fx)
+        bench = Bench(main_module, fx, data_dir)
+        results = {}
+        regressions = 0
+        for name in args.only or [STARTUP_BENCH, *BENCHMARKS]:
+            if name == STARTUP_BENCH:
+                results[name] = measure_startup(data_dir, overrides, args.repeat)
+            else:
+                method, setup = BENCHMARKS[name]
+                results[name] = measure(getattr(bench, method), getattr(bench, setup) if setup else None, args.repeat)
+            print(f"   {name:<28} {results[name]['median'] * 1000:9.1f} ms (min {results[name]['min'] * 1000:.1f})", flush=True)
+        eager = results.get(STARTUP_BENCH, {}).get("eager")
+        if eager:
+            print(f"   ⚠️ main.py import laadis kohe: {', '.join(eager)} (peaksid laadima esimesel kasutamisel)")
+            regressions += 1
+        startup = results.get(STARTUP_BENCH)
+        if startup and args.max_startup and startup["median"] > args.max_startup:
+            print(f"   ⚠️ main.py import {startup['median'] * 1000:.0f} ms ületab lae {args.max_startup * 1000:.0f} ms")
+            regressions += 1
+
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f: baseline = json.load(f)
+        if baseline:
+            print(f"\n📊 Võrdlus: {args.baseline} ({baseline.get('created', '?')}, {baseline.get('machine', '?')})")
+            if baseline.get("env") != {**BENCH_ENV, **overrides} or baseline.get("fixtures") != (args.fixtures or f"synthetic:{args.symbols}"):
+                print("   ⚠️ Baseline on tehtud teiste seadete või andmetega, võrdlus on ainult suunda näitav.")
+            for name, r, base, change, regressed in compare(results, baseline, args.threshold):
+                if change is None:
+                    print(f"   {name:<28} {'uus':>10}")
+                    continue
+                regressions += regressed
+                print(f"   {name:<28} {base['median'] * 1000:9.1f} -> {r['median'] * 1000:9.1f} ms ({change:+.1%}){'  ⚠️ REGRESSIOON' if regressed else ''}")
+
+        if args.save:
+            record = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "machine": f"{platform.node()} / {platform.processor() or platform.machine()}",
+                      "python": platform.python_version(), "fixtures": args.fixtures or f"synthetic:{args.symbols}",
+                      "env": {**BENCH_ENV, **overrides}, "results": {**baseline.get("results", {}), **results}}
+            with open(args.baseline, "w") as f: json.dump(record, f, indent=2)
+            print(f"💾 Baseline salvestatud: {args.baseline}")
+        return 1 if regressions and args.fail_on_regression else 0
+    finally:
+        if server is not None: server.close()
+        if "main" in sys.modules:
+            with contextlib.redirect_stdout(io.StringIO()): sys.modules["main"].close_logs()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import queue
+import builtins
+import threading
+
+# --- PUHVERDATUD LOGIKIRJUTAJA ---
+# print() paneb rea ainult järjekorda, faili kirjutab taustalõim partiidena:
+# kui puhvris on flush_bytes jagu teksti, flush_interval on möödas või programm lõpeb.
+# Fail roteeritakse suuruse järgi: bot.log -> bot.log.1 -> ... -> bot.log.<backups>.
+
+_STOP = object()
+
+
+class BufferedLogWriter:
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=5, flush_interval=1.0, flush_bytes=64 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._queue = queue.Queue()
+        self._flushed = threading.Condition()
+        self._pending = 0  # järjekorda pandud, aga veel kirjutamata kirjed
+        self._thread = threading.Thread(target=self._run, name=f"log-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        with self._flushed: self._pending += 1
+        self._queue.put(text)
+
+    def flush(self, timeout=5):
+        # Ootab, kuni kõik seni järjekorda pandu on kettal
+        self._queue.put(None)
+        with self._flushed:
+            self._flushed.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout=5):
+        if not self._thread.is_alive(): return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    def _run(self):
+        buffer, size = [], 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _STOP:
+                buffer.append(item)
+                size += len(item)
+                if size < self.flush_bytes and time.monotonic() < deadline: continue
+
+            if buffer:
+                self._write(buffer, size)
+                with self._flushed:
+                    self._pending -= len(buffer)
+                    self._flushed.notify_all()
+                buffer, size = [], 0
+            elif item is None:
+                with self._flushed: self._flushed.notify_all()
+            deadline = time.monotonic() + self.flush_interval
+            if item is _STOP: return
+
+    def _write(self, lines, size):
+        data = "".join(lines)
+        try:
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + size > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+        except Exception as e:
+            builtins.print(f"[SYSTEM ERROR] Logi viga ({self.path}): {e}", file=sys.stderr)
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src): os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import tempfile
+import threading
+
+# --- BRAIN.JSON MÄLUS ---
+# Fail loetakse üks kord protsessi kohta, lugemised käivad mälust ja muudatused
+# kirjutatakse kokku üheks atomaarseks salvestuseks (temp fail + rename)
+# tsükli lõpus, taimeriga või programmi lõpus.
+
+
+class BrainStore:
+    def __init__(self, path, cooldown_seconds=6 * 3600):
+        self.path = path
+        self.cooldown_seconds = cooldown_seconds
+        self.lock = threading.RLock()
+        self._write_lock = threading.Lock()  # üks salvestus korraga: vanem hetkeseis ei kirjuta uuemat üle
+        self._data = None
+        self._dirty = False
+        self._timer = None
+
+    @property
+    def data(self):
+        with self.lock:
+            if self._data is None: self._data = self._read()
+            return self._data
+
+    def _read(self):
+        if not os.path.exists(self.path): return {}
+        try:
+            with open(self.path, 'r') as f: data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def mark_dirty(self):
+        with self.lock: self._dirty = True
+
+    # --- POSITSIOONID ---
+
+    def positions(self):
+        return self.data.setdefault("positions", {})
+
+    def get_position(self, symbol):
+        with self.lock: return dict(self.data.get("positions", {}).get(symbol, {}))
+
+    def put_position(self, symbol, pos):
+        with self.lock:
+            self.positions()[symbol] = dict(pos)
+            self._dirty = True
+
+    def remove_position(self, symbol):
+        with self.lock:
+            if self.data.get("positions", {}).pop(symbol, None) is not None: self._dirty = True
+
+    # --- COOL DOWN ---
+
+    def last_sold(self, symbol):
+        with self.lock: return self.data.get("cool_down", {}).get(symbol)
+
+    def set_cooldown(self, symbol, timestamp):
+        with self.lock:
+            self.data.setdefault("cool_down", {})[symbol] = timestamp
+            self._dirty = True
+
+    def prune_cooldowns(self, now=None):
+        # Aegunud cool_down kirjed ei mõjuta enam midagi -> fail ei kasva lõputult
+        now = now or time.time()
+        with self.lock:
+            cool_down = self.data.get("cool_down", {})
+            expired = [s for s, ts in cool_down.items() if now - ts >= self.cooldown_seconds]
+            for s in expired: del cool_down[s]
+            if expired: self._dirty = True
+            return len(expired)
+
+    # --- SALVESTAMINE ---
+
+    def flush(self):
+        # Autoflush, stop-monitor ja tsükli lõpp võivad salvestada samal ajal. Hetkeseis võetakse
+        # _write_lock-i all, nii et hilisem salvestus kirjutab alati ka hilisema seisu.
+        # Lugemised (self.lock) ei oota faili kirjutamise järel.
+        with self._write_lock:
+            with self.lock:
+                if not self._dirty or self._data is None: return False
+                self.prune_cooldowns()
+                payload = json.dumps(self._data, indent=4)
+                self._dirty = False
+            return self._write(payload)
+
+    def _write(self, payload):
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".brain-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path): os.remove(tmp_path)
+                raise
+            return True
+        except Exception:
+            self.mark_dirty()  # proovime järgmisel korral uuesti
+            raise
+
+    def start_autoflush(self, interval):
+        # Taustalõim, mis salvestab muudatused iga `interval` sekundi tagant
+        if self._timer is not None: return
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try: self.flush()
+                except Exception: pass
+
+        self._timer = (stop, threading.Thread(target=loop, name="brain-flush", daemon=True))
+        self._timer[1].start()
+
+    def stop_autoflush(self):
+        if self._timer is None: return
+        stop, thread = self._timer
+        stop.set()
+        thread.join(timeout=5)
+        self._timer = None
@@ -0,0 +1,95 @@
+import os
+import time
+import fcntl
+import threading
+
+# --- DAEMON: ÜKS PROTSESS, TSÜKLID AJAKAVA JÄRGI ---
+# InstanceLock: fcntl lukk failil (bot.lock), et korraga töötaks ainult üks bot.
+# Lukk vabaneb ka siis, kui protsess kukub (OS sulgeb faili), failis on PID.
+# CycleScheduler: tsüklid fikseeritud sammuga; kui tsükkel venib üle järgmise
+# pesa, siis "skip" jätab vahele jäänud pesad ära, "coalesce" teeb kohe ÜHE tsükli.
+
+
+class InstanceLock:
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        os.fsync(fd)
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None: return
+        try:
+            os.ftruncate(self._fd, 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def lock_owner(path):
+    # PID, kui mõni teine protsess hoiab lukku, muidu None (lukku ei võeta)
+    if not os.path.exists(path): return None
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            try: return int(os.read(fd, 32).decode().strip() or 0) or -1
+            except ValueError: return -1
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return None
+    finally:
+        os.close(fd)
+
+
+class CycleScheduler:
+    def __init__(self, interval, overrun="skip", log=print, clock=time.monotonic):
+        if overrun not in ("skip", "coalesce"): raise ValueError(f"Tundmatu overrun režiim: {overrun}")
+        self.interval = interval
+        self.overrun = overrun
+        self.log = log
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self.stop_reason = None
+        self.cycles = 0
+        self.missed = 0
+
+    @property
+    def stopping(self):
+        return self.stop_event.is_set()
+
+    def stop(self, reason="stop"):
+        # Signaalikäsitlejast kutsutav: ainult lipp, logimine toimub tsüklis
+        self.stop_reason = reason
+        self.stop_event.set()
+
+    def run(self, job):
+        next_slot = self.clock()
+        while not self.stopping:
+            job()
+            self.cycles += 1
+            finished = self.clock()
+            next_slot += self.interval
+            if finished > next_slot:
+                missed = int((finished - next_slot) // self.interval) + 1
+                self.missed += missed
+                if self.overrun == "coalesce":
+                    self.log(f"⏱️ Tsükkel venis {missed} pesa üle. Teen kohe ühe asendustsükli.")
+                    next_slot = finished
+                else:
+                    self.log(f"⏱️ Tsükkel venis {missed} pesa üle. Jätan need vahele.")
+                    next_slot += missed * self.interval
+            self.stop_event.wait(max(next_slot - self.clock(), 0))
+        self.log(f"🛑 Daemon peatub ({self.stop_reason}). Tsükleid: {self.cycles}, vahele jäänud pesi: {self.missed}.")
@@ -1,36 +1,81 @@
 import streamlit as st
 import pandas as pd
 import os
-import time
 import subprocess
-import json
-import requests
-from datetime import datetime
+import signal
 from dotenv import load_dotenv
+import state_db
+from daemon import lock_owner
+from http_client import HttpClient
+from paths import BASE_DIR, data_dir
+from dashboard_data import LogTail, TradeStats, portfolio_history, stats_summary, stats_frame, equity_curve
 
 # --- SEADISTUS ---
 st.set_page_config(page_title="Vibe Trader", layout="wide", initial_sidebar_state="expanded")
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-LOG_FILE = os.path.join(BASE_DIR, "bot.log")
-BRAIN_FILE = os.path.join(BASE_DIR, "brain.json")
-AI_LOG_FILE = os.path.join(BASE_DIR, "ai_history.log")
-
 load_dotenv(os.path.join(BASE_DIR, ".env"))
+
+# Samad failid, mida main.py kirjutab (VIBE_DATA_DIR); lukk on alati projekti kaustas
+DATA_DIR = data_dir()
+LOG_FILE = os.path.join(DATA_DIR, "bot.log")
+BRAIN_FILE = os.path.join(DATA_DIR, "brain.json")
+AI_LOG_FILE = os.path.join(DATA_DIR, "ai_history.log")
+STATE_DB_FILE = os.path.join(DATA_DIR, "state.db")
+LOCK_FILE = os.path.join(BASE_DIR, "bot.lock")
+ARCHIVE_FILE = os.path.join(DATA_DIR, "trade_archive.csv")
+TRADE_STATS_FILE = os.path.join(DATA_DIR, "trade_stats.json")
 api_key = os.getenv("ALPACA_API_KEY")
 secret_key = os.getenv("ALPACA_SECRET_KEY")
+# Portfelli ajalugu küsitakse Alpacalt max kord PORTFOLIO_CACHE_TTL sekundi jooksul (kõigi sessioonide peale)
+PORTFOLIO_CACHE_TTL = int(os.getenv("PORTFOLIO_CACHE_TTL", "300"))
+LOG_LINES = int(os.getenv("DASHBOARD_LOG_LINES", "50"))
+LIVE_REFRESH_SECONDS = float(os.getenv("DASHBOARD_REFRESH_SECONDS", "1"))
+
+@st.cache_resource
+def http_client():
+    # Üks keep-alive sessioon kõigi sessioonide ja värskenduste peale
+    return HttpClient(timeout=10, max_retries=2)
+
+@st.cache_data(ttl=PORTFOLIO_CACHE_TTL, show_spinner=False)
+def load_portfolio_history(period="1M", timeframe="1D"):
+    return portfolio_history(http_client(), api_key, secret_key, period, timeframe)
+
+@st.cache_resource
+def trade_stats():
+    # Jooksvad summad trade_archive.csv kohta; iga värskendus loeb ainult uued read
+    return TradeStats(ARCHIVE_FILE, TRADE_STATS_FILE)
+
+@st.cache_resource
+def log_tail(path):
+    # Üks lahtine fail + nihe protsessi kohta, jagatud kõigi sessioonide vahel
+    return LogTail(path, max_lines=LOG_LINES)
 
 st.title("🤖 Vibe Trader Dashboard")
 
 # --- KÜLGRIBA ---
 with st.sidebar:
     st.header("🎮 Juhtimine")
+    # Bot töötab daemonina (main.py --daemon); bot.lock hoiab ära topeltkäivitused
+    bot_pid = lock_owner(LOCK_FILE)
+    if bot_pid: st.caption(f"🟢 Bot töötab (PID {bot_pid})")
+    else: st.caption("⚪ Bot ei tööta")
+
     if st.button("🚀 KÄIVITA BOT", type="primary", use_container_width=True):
+        if lock_owner(LOCK_FILE):
+            st.toast("Bot juba töötab!", icon="⚠️")
+        else:
+            try:
+                subprocess.Popen(["python3", "main.py", "--daemon"], cwd=BASE_DIR)
+                st.toast("Bot käivitatud!", icon="🚀")
+            except Exception as e: st.error(f"Viga: {e}")
+
+    if bot_pid and bot_pid > 0 and st.button("⏹️ PEATA BOT", use_container_width=True):
         try:
-            subprocess.Popen(["python3", "main.py"], cwd=BASE_DIR)
-            st.toast("Bot käivitatud!", icon="🚀")
+            os.kill(bot_pid, signal.SIGTERM) # bot lõpetab käimasoleva tsükli ja salvestab oleku
+            st.toast("Peatamise signaal saadetud.", icon="⏹️")
         except Exception as e: st.error(f"Viga: {e}")
     
     if st.button("🔄 VÄRSKENDA LEHTE", use_container_width=True): 
+        load_portfolio_history.clear()
         st.rerun()
     
     st.divider()
@@ -39,80 +84,103 @@ with st.sidebar:
     st.write("### 📺 Live Terminal")
     is_live = st.toggle("Käivita Live Vaade", value=False)
     if is_live:
-        st.caption("⚠️ Kui see on sees, jookseb logi reaalajas. Peata see, et näha graafikut.")
+        st.caption(f"Logi värskeneb iga {LIVE_REFRESH_SECONDS:g}s järel (loetakse ainult uued read).")
 
 # --- GRAAFIK (Ainult siis, kui LIVE on VÄLJAS) ---
-# Me peidame graafiku live ajal, et säästa ressursse ja vältida virvendust
+# Live ajal uueneb ainult logide fragment, graafik jääb peitu, et vältida virvendust
 if not is_live:
     if api_key and secret_key:
         try:
-            url = "https://paper-api.alpaca.markets/v2/account/portfolio/history"
-            headers = {"APCA-API-KEY-ID": api_key, "APCA-API-SECRET-KEY": secret_key}
-            params = {"period": "1M", "timeframe": "1D"}
-            
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "equity" in data:
-                    df = pd.DataFrame({"Equity": data["equity"], "Date": [datetime.fromtimestamp(t) for t in data["timestamp"]]})
-                    df.set_index("Date", inplace=True)
-                    
-                    curr_eq = df["Equity"].iloc[-1]
-                    start_eq = df["Equity"].iloc[0]
-                    diff = curr_eq - start_eq
-                    color = "green" if diff >= 0 else "red"
-                    
-                    st.metric(label="Portfelli Väärtus", value=f"${curr_eq:,.2f}", delta=f"{diff:,.2f}")
-                    st.line_chart(df["Equity"], height=250)
+            df = load_portfolio_history()
+            if df is not None:
+                curr_eq = df["Equity"].iloc[-1]
+                start_eq = df["Equity"].iloc[0]
+                diff = curr_eq - start_eq
+                
+                st.metric(label="Portfelli Väärtus", value=f"${curr_eq:,.2f}", delta=f"{diff:,.2f}")
+                st.line_chart(df["Equity"], height=250)
         except Exception as e:
             st.warning(f"Graafiku viga: {e}")
+
+    # --- TEHINGUTE ANALÜÜS (trade_archive.csv, inkrementaalselt) ---
+    try:
+        state = trade_stats().refresh()
+        if state["trades"]:
+            st.subheader("📈 Tehingute analüüs")
+            summary = stats_summary(state)
+            c1, c2, c3, c4, c5 = st.columns(5)
+            c1.metric("Tehinguid", f"{summary['trades']:,}")
+            c2.metric("Võiduprotsent", f"{summary['win_rate']:.1f}%")
+            c3.metric("Realiseeritud PnL", f"${summary['pnl']:,.2f}", delta=f"{summary['avg_pnl']:,.2f} / tehing")
+            c4.metric("Profit factor", "∞" if summary["profit_factor"] is None else f"{summary['profit_factor']:.2f}")
+            c5.metric("Max drawdown", f"${summary['max_drawdown']:,.2f}")
+
+            curve = equity_curve(state)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption("Kapitalikõver (realiseeritud PnL, päeva lõpu seis)")
+                st.line_chart(curve["equity"], height=200)
+            with col2:
+                st.caption("Drawdown tipust")
+                st.area_chart(curve["drawdown"], height=200)
+
+            col1, col2, col3 = st.columns([1.2, 1.2, 1])
+            with col1:
+                st.caption("PnL sümbolite kaupa (15 suurimat mõju)")
+                symbols = stats_frame(state["by_symbol"], "symbol")
+                top = symbols.loc[symbols["pnl_usd"].abs().sort_values(ascending=False).index[:15]]
+                st.bar_chart(top["pnl_usd"], height=220)
+            with col2:
+                st.caption("PnL päevade kaupa (viimased 30)")
+                st.bar_chart(stats_frame(state["by_day"], "day").sort_index()["pnl_usd"].tail(30), height=220)
+            with col3:
+                st.caption("Stopi tüübi järgi")
+                st.dataframe(stats_frame(state["by_stop"], "stop"), use_container_width=True)
+    except Exception as e:
+        st.warning(f"Tehingute analüüsi viga: {e}")
+
+    # --- SQLITE OLEK (kui bot jookseb STATE_BACKEND=sqlite) ---
+    # Read-only ühendus WAL failile: loeb samal ajal, kui bot kirjutab
+    if os.path.exists(STATE_DB_FILE):
+        try:
+            conn = state_db.connect(STATE_DB_FILE, readonly=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("📂 Avatud positsioonid")
+                positions = pd.DataFrame([dict(r) for r in state_db.open_positions(conn)])
+                if positions.empty: st.caption("Positsioone pole.")
+                else: st.dataframe(positions, use_container_width=True, hide_index=True)
+            with col2:
+                st.subheader("💵 PnL päevade kaupa")
+                days = pd.DataFrame([dict(r) for r in state_db.pnl_by_day(conn)])
+                if days.empty: st.caption("Tehinguid pole.")
+                else: st.bar_chart(days.set_index("day")["pnl_usd"], height=200)
+            conn.close()
+        except Exception as e:
+            st.warning(f"Andmebaasi viga: {e}")
     st.markdown("---")
 
 # --- LOGIDE ALA ---
-log_placeholder = st.empty()
-ai_placeholder = st.empty()
-
 def read_logs():
-    log_content = "Logi puudub."
-    ai_content = "AI info puudub."
-    
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            log_content = "".join(lines[-50:]) # Viimased 50 rida
-            
-    if os.path.exists(AI_LOG_FILE):
-        with open(AI_LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            ai_content = "".join(lines[-50:])
-            
+    # Ainult faili lõpp: esimesel korral loetakse tagant ettepoole, edaspidi ainult juurde tulnud baidid
+    log_content = log_tail(LOG_FILE).read() or "Logi puudub."
+    ai_content = log_tail(AI_LOG_FILE).read() or "AI info puudub."
     return log_content, ai_content
 
-# --- LOOGIKA: LIVE vs STATIC ---
-if is_live:
-    # LIVE REŽIIM: Jookseb tsüklis ja uuendab ekraani
-    col1, col2 = st.columns([1.5, 1])
-    with col1:
-        st.subheader("🔴 LIVE LOGI")
-        log_box = st.empty()
-    with col2:
-        st.subheader("🤖 AI LIVE")
-        ai_box = st.empty()
-        
-    while True:
-        logs, ai = read_logs()
-        log_box.code(logs, language="log")
-        ai_box.text_area("AI", ai, height=400, key=time.time()) # Key muudatus sunnib redraw
-        time.sleep(1) # Värskenda iga 1 sekundi tagant
-        
-else:
-    # TAVALINE REŽIIM
+def show_logs(live):
     logs, ai = read_logs()
     col1, col2 = st.columns([1.5, 1])
     with col1:
-        st.subheader("📜 Boti Logi")
+        st.subheader("🔴 LIVE LOGI" if live else "📜 Boti Logi")
         st.code(logs, language="log")
     with col2:
-        st.subheader("🤖 AI Otsused")
-        st.text_area("AI", ai, height=400)
\ No newline at end of file
+        st.subheader("🤖 AI LIVE" if live else "🤖 AI Otsused")
+        st.text_area("AI", ai, height=400)
+
+# --- LOGIKA: LIVE vs STATIC ---
+# LIVE: fragment käivitub iga LIVE_REFRESH_SECONDS tagant ise uuesti (ülejäänud lehte ei jooksutata),
+# blokeerivat while-tsüklit pole ja lüliti/nupud reageerivad kohe
+if is_live:
+    st.fragment(run_every=LIVE_REFRESH_SECONDS)(show_logs)(True)
+else:
+    show_logs(False)
@@ -0,0 +1,258 @@
+import io
+import os
+import csv
+import json
+import hashlib
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime
+import pandas as pd
+
+# --- DASHBOARDI ANDMEKIHT ---
+# LogTail: loeb logi lõpust tagasi ainult nii palju plokke, kui N rea jaoks vaja, ja jätab
+# faili lahti: järgmisel värskendusel loetakse ainult juurde kirjutatud baidid (tail -F).
+# Rotatsioon (bot.log -> bot.log.1, uus inode) ja kärpimine tuvastatakse stat()-iga.
+# TradeStats: trade_archive.csv kokkuvõtted, loetakse ainult viimasest nihkest lisandunud read;
+# jooksvad summad (sümbol, päev, stopi tüüp, kapitalikõver, drawdown) on kompaktses JSON failis.
+# Alpaca portfelli ajalugu: puhas funktsioon (päring läbi http_client.HttpClient), vahemälu (st.cache_data) on dashboard.py-s.
+
+PORTFOLIO_HISTORY_URL = "https://paper-api.alpaca.markets/v2/account/portfolio/history"
+
+
+class LogTail:
+    def __init__(self, path, max_lines=50, block_size=64 * 1024, max_catchup=1024 * 1024):
+        self.path = path
+        self.max_lines = max_lines
+        self.block_size = block_size
+        self.max_catchup = max_catchup  # kui juurde on tulnud rohkem, loeme uuesti lõpust
+        self.lines = deque(maxlen=max_lines)
+        self.partial = b""
+        self.bytes_read = 0
+        self.lock = threading.Lock()
+        self._file = None
+        self._inode = None
+
+    def read(self):
+        # Viimased max_lines rida tekstina ("" kui faili pole)
+        with self.lock:
+            self._poll()
+            return (b"".join(self.lines) + self.partial).decode("utf-8", errors="replace")
+
+    def close(self):
+        with self.lock: self._close()
+
+    def _poll(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._file is not None:
+                self._consume(self._file.read())
+                self._close()
+            return
+
+        if self._file is None:
+            self._open_at_tail()
+        elif stat.st_ino != self._inode:
+            # Roteeritud: vana faili lõpp (lahtine fail loeb edasi ka pärast ümbernimetamist), siis uus algusest
+            self._consume(self._file.read())
+            self._close()
+            self._flush_partial()  # vana faili lõpetamata viimane rida ei tohi kleepuda uue esimese rea külge
+            if stat.st_size > self.max_catchup: self._open_at_tail()
+            else:
+                self._open()
+                self._consume(self._file.read())
+        elif stat.st_size < self._file.tell():
+            # Kärbitud (sama inode, väiksem fail)
+            self._reset()
+            self._file.seek(0)
+            self._consume(self._file.read())
+        elif stat.st_size - self._file.tell() > self.max_catchup:
+            self._close()
+            self._open_at_tail()
+        else:
+            self._consume(self._file.read())
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _open_at_tail(self):
+        self._reset()
+        self._open()
+        end = self._file.seek(0, os.SEEK_END)
+        pos, newlines = end, 0
+        while pos > 0 and newlines <= self.max_lines:
+            step = min(self.block_size, pos)
+            pos -= step
+            self._file.seek(pos)
+            newlines += self._file.read(step).count(b"\n")
+        self._file.seek(pos)
+        data = self._file.read()
+        if pos > 0: data = data[data.find(b"\n") + 1:]  # esimene rida on poolik
+        self._consume(data)
+
+    def _consume(self, data):
+        if not data: return
+        self.bytes_read += len(data)
+        parts = (self.partial + data).split(b"\n")
+        self.partial = parts.pop()
+        self.lines.extend(p + b"\n" for p in parts[-self.max_lines:])
+
+    def _flush_partial(self):
+        if self.partial: self.lines.append(self.partial + b"\n")
+        self.partial = b""
+
+    def _reset(self):
+        self.lines.clear()
+        self.partial = b""
+
+    def _close(self):
+        if self._file is not None: self._file.close()
+        self._file, self._inode = None, None
+
+
+def portfolio_history(client, api_key, secret_key, period="1M", timeframe="1D", timeout=10):
+    # DataFrame (indeks = kuupäev, veerg "Equity") või None, kui ajalugu pole
+    headers = {"APCA-API-KEY-ID": api_key, "APCA-API-SECRET-KEY": secret_key}
+    response = client.get(PORTFOLIO_HISTORY_URL, name="alpaca_portfolio", headers=headers,
+                          params={"period": period, "timeframe": timeframe}, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if not data.get("equity"): return None
+    df = pd.DataFrame({"Equity": data["equity"], "Date": [datetime.fromtimestamp(t) for t in data["timestamp"]]})
+    df = df.set_index("Date").dropna()
+    return df if not df.empty else None
+
+
+TRADE_STATS_VERSION = 1
+SIGNATURE_BYTES = 512
+STOP_TYPES = ("HARD 🛑", "PROFIT 🛡️")
+
+
+def stop_type(reason):
+    for name in STOP_TYPES:
+        if name.split()[0] in reason: return name
+    return reason or "?"
+
+
+class TradeStats:
+    def __init__(self, archive_path, cache_path):
+        self.archive_path = archive_path
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.state = self._load()
+
+    def refresh(self):
+        # Loeb juurde tulnud täisread, uuendab summasid; tagastab oleku (dict)
+        with self.lock:
+            try:
+                stat = os.stat(self.archive_path)
+            except FileNotFoundError:
+                if self.state["offset"]: self._reset()
+                return self.state
+
+            with open(self.archive_path, "rb") as f:
+                head = f.read(self.state["signature_len"])
+                if (stat.st_ino != self.state["inode"] or stat.st_size < self.state["offset"]
+                        or hashlib.sha1(head).hexdigest() != self.state["signature"]):
+                    self._reset()  # fail asendatud või ümber kirjutatud -> arvutame algusest
+                f.seek(self.state["offset"])
+                data = f.read()
+
+            end = data.rfind(b"\n") + 1  # pooliku viimase rea jätame järgmiseks korraks
+            if end == 0: return self.state
+            self._apply(data[:end])
+            self.state["offset"] += end
+            self.state["inode"] = stat.st_ino
+            with open(self.archive_path, "rb") as f: head = f.read(min(self.state["offset"], SIGNATURE_BYTES))
+            self.state["signature"], self.state["signature_len"] = hashlib.sha1(head).hexdigest(), len(head)
+            self._save()
+            return self.state
+
+    def _apply(self, chunk):
+        st = self.state
+        rows = csv.reader(io.StringIO(chunk.decode("utf-8", errors="replace")))
+        col = None
+        for row in rows:
+            if st["columns"] is None:
+                if "Profit USD" in row:
+                    st["columns"] = row
+                    continue
+                st["columns"] = ["Time", "Symbol", "Entry Price", "Exit Price", "Qty", "Profit USD", "Profit %", "Reason"]
+            if col is None: col = {name: i for i, name in enumerate(st["columns"])}
+            try:
+                pnl = float(row[col["Profit USD"]])
+                day, symbol, reason = row[col["Time"]][:10], row[col["Symbol"]], row[col["Reason"]]
+            except (IndexError, KeyError, ValueError):
+                continue
+            win = 1 if pnl > 0 else 0
+            st["trades"] += 1
+            st["wins"] += win
+            st["pnl"] += pnl
+            if pnl > 0: st["gross_profit"] += pnl
+            else: st["gross_loss"] -= pnl
+            for key, group in ((symbol, "by_symbol"), (day, "by_day"), (stop_type(reason), "by_stop")):
+                entry = st[group].setdefault(key, [0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += win
+                entry[2] += pnl
+            st["equity"] += pnl
+            st["peak"] = max(st["peak"], st["equity"])
+            st["max_drawdown"] = min(st["max_drawdown"], st["equity"] - st["peak"])
+
+    def _empty(self):
+        return {"version": TRADE_STATS_VERSION, "inode": None, "offset": 0, "signature": hashlib.sha1(b"").hexdigest(),
+                "signature_len": 0, "columns": None, "trades": 0, "wins": 0, "pnl": 0.0, "gross_profit": 0.0,
+                "gross_loss": 0.0, "equity": 0.0, "peak": 0.0, "max_drawdown": 0.0,
+                "by_symbol": {}, "by_day": {}, "by_stop": {}}
+
+    def _reset(self):
+        self.state = self._empty()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r") as f: state = json.load(f)
+            if state.get("version") == TRADE_STATS_VERSION: return state
+        except (OSError, ValueError):
+            pass
+        return self._empty()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".trade_stats-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f: json.dump(self.state, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+
+def stats_summary(state):
+    trades = state["trades"]
+    return {
+        "trades": trades,
+        "win_rate": state["wins"] / trades * 100 if trades else 0.0,
+        "pnl": state["pnl"],
+        "avg_pnl": state["pnl"] / trades if trades else 0.0,
+        "profit_factor": state["gross_profit"] / state["gross_loss"] if state["gross_loss"] else None,
+        "max_drawdown": state["max_drawdown"],
+    }
+
+
+def stats_frame(groups, index_name):
+    # {võti: [tehinguid, võite, pnl]} -> DataFrame (tehinguid, võiduprotsent, pnl)
+    df = pd.DataFrame.from_dict(groups, orient="index", columns=["trades", "wins", "pnl_usd"])
+    df.index.name = index_name
+    df["win_rate"] = (df["wins"] / df["trades"] * 100).round(1)
+    df["pnl_usd"] = df["pnl_usd"].round(2)
+    return df.drop(columns="wins")
+
+
+def equity_curve(state):
+    # Realiseeritud kasumi kõver päevade kaupa + drawdown tipust (päeva lõpu seisuga)
+    days = stats_frame(state["by_day"], "day").sort_index()
+    equity = days["pnl_usd"].cumsum()
+    peak = equity.cummax().clip(lower=0)
+    return pd.DataFrame({"equity": equity, "drawdown": equity - peak})
@@ -0,0 +1,200 @@
+import time
+import random
+import socket
+import threading
+import ipaddress
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- ÜHINE HTTP KIHT ---
+# Üks requests.Session: keep-alive ühenduste kogum iga hosti kohta (urllib3 pool),
+# ühtsed timeoutid, kordused 429/5xx ja võrguvigade korral (täisjitter + Retry-After),
+# tingimuslik GET (ETag / Last-Modified -> 304 korral eelmine vastus), hostipõhised
+# kiiruspiirangud (token bucket) ja loendurid päringu nime kaupa (observer -> metrics.py).
+# host_map={"news.google.com": "http://127.0.0.1:8000"} suunab päringud testides kohalikule serverile.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_REDIRECTS = 5
+
+
+class BlockedHostError(requests.RequestException):
+    pass
+
+
+class TokenBucket:
+    # Lõimekindel kiiruspiiraja: `rate` päringut sekundis, kuni `capacity` korraga
+    def __init__(self, rate, capacity=1, on_wait=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.on_wait = on_wait
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        # Ootab tokenit; kui see ei jõua `timeout` sekundi jooksul, tagastab kohe False
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait_time = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if timeout is not None and wait_time > timeout: return False
+            self.tokens -= 1  # broneerime tokeni, teised ootajad järjestuvad selle taha
+        if wait_time > 0:
+            if self.on_wait is not None: self.on_wait(wait_time)
+            time.sleep(wait_time)
+        return True
+
+
+def parse_rate_limits(spec):
+    # "news.google.com=1,paper-api.alpaca.markets=3" -> {host: päringut sekundis}
+    limits = {}
+    for part in (spec or "").split(","):
+        host, _, rate = part.partition("=")
+        if host.strip() and rate.strip(): limits[host.strip()] = float(rate)
+    return limits
+
+
+def is_public_host(host):
+    # Kõik aadressid, kuhu nimi lahendub, peavad olema avalikud (SSRF kaitse uudiste linkidele)
+    try: infos = socket.getaddrinfo(host, None)
+    except socket.gaierror: return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0].split("%")[0]).is_global for info in infos)
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value: return None
+    try: return max(float(value), 0.0)
+    except ValueError: pass
+    try: return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError): return None
+
+
+class HttpClient:
+    def __init__(self, timeout=10, max_retries=3, backoff=0.5, max_backoff=30, pool_size=20,
+                 rate_limits=None, host_map=None, allow_private=False, observer=None, session=None, sleep=time.sleep):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.host_map = dict(host_map or {})
+        self.allow_private = allow_private
+        self.observer = observer  # observer(name, status, sekundid, baidid, kordusi)
+        self.sleep = sleep
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self.limiters = {host: TokenBucket(rate, capacity=max(1, int(rate))) for host, rate in (rate_limits or {}).items()}
+        self.lock = threading.Lock()
+        self.stats = {}
+        self._validators = {}  # url -> (ETag, Last-Modified, viimane 200 vastus)
+
+    def get(self, url, name="http", params=None, headers=None, timeout=None, retries=None,
+            conditional=False, public_only=False, max_bytes=None):
+        # Tagastab requests.Response (ka 4xx/5xx pärast kordusi); võrguvea korral viskab erindi.
+        # conditional=True: 304 korral tagastatakse eelmine 200 vastus (response.not_modified = True).
+        limiter = self.limiters.get(urlsplit(url).hostname or "")  # piirang päris hosti järgi (enne host_map-i)
+        url = self._map(url)
+        public_only = public_only and not self.allow_private
+        if public_only: self._check_public(url)
+
+        headers = dict(headers or {})
+        cached = self._validators.get(url) if conditional else None
+        if cached:
+            etag, modified, _ = cached
+            if etag: headers["If-None-Match"] = etag
+            if modified: headers["If-Modified-Since"] = modified
+
+        retries = self.max_retries if retries is None else retries
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if limiter is not None: limiter.acquire()
+            try:
+                response = self._send(url, params, headers, timeout or self.timeout, max_bytes is not None, public_only)
+                if max_bytes is not None: self._read_limited(response, max_bytes)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    self._record(name, None, time.monotonic() - started, 0, attempt)
+                    raise
+                self.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                self.sleep(self._delay(attempt, retry_after_seconds(response)))
+                response.close()
+                attempt += 1
+                continue
+            break
+
+        self._record(name, response.status_code, time.monotonic() - started, len(response.content or b""), attempt)
+        response.not_modified = False
+        if conditional:
+            if response.status_code == 304 and cached:
+                previous = cached[2]
+                previous.not_modified = True
+                return previous
+            if response.status_code == 200 and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+                self._validators[url] = (response.headers.get("ETag"), response.headers.get("Last-Modified"), response)
+        return response
+
+    def snapshot(self):
+        with self.lock: return {name: dict(s) for name, s in self.stats.items()}
+
+    def close(self):
+        self.session.close()
+
+    def _send(self, url, params, headers, timeout, stream, public_only):
+        # public_only: suunamised käsitsi, iga sihthost kontrollitakse enne päringut
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout, stream=stream, allow_redirects=not public_only)
+            if not (public_only and response.is_redirect): return response
+            url = requests.compat.urljoin(response.url, response.headers["Location"])
+            params = None
+            response.close()
+            self._check_public(url)
+        raise requests.TooManyRedirects(f"Liiga palju suunamisi: {url}")
+
+    def _check_public(self, url):
+        host = urlsplit(url).hostname or ""
+        if not is_public_host(host): raise BlockedHostError(f"Mitteavalik aadress: {host}")
+
+    def _map(self, url):
+        parts = urlsplit(url)
+        target = self.host_map.get(parts.hostname or "")
+        if target is None: return url
+        base = urlsplit(target)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+    def _delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return min(max(delay, retry_after or 0.0), self.max_backoff)
+
+    def _read_limited(self, response, max_bytes):
+        # Suured failid (nt PDF uudiste asemel) katkestatakse max_bytes juures
+        chunks, size = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes: break
+        response._content = b"".join(chunks)[:max_bytes]
+        response._content_consumed = True
+        response.close()
+
+    def _record(self, name, status, seconds, nbytes, retries):
+        with self.lock:
+            s = self.stats.setdefault(name, {"requests": 0, "errors": 0, "retries": 0, "not_modified": 0, "bytes": 0, "seconds": 0.0})
+            s["requests"] += 1
+            s["retries"] += retries
+            s["bytes"] += nbytes
+            s["seconds"] += seconds
+            if status is None or status >= 400: s["errors"] += 1
+            if status == 304: s["not_modified"] += 1
+        if self.observer is not None:
+            try: self.observer(name, status, seconds, nbytes, retries)
+            except Exception: pass
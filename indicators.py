@@ -0,0 +1,397 @@
+import copy
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# --- VOOGINDIKAATORID (O(1) uuendus baari kohta) ---
+# Samad valemid mis `ta` teegis (RSI, MACD diff, ADX, ATR, SMA), aga olekuga:
+# iga uus baar uuendab Wilderi/EMA väärtusi, ajalugu uuesti ei arvutata.
+# Olek on tavaline dict, mida saab JSON-ina baaride vahemälu kõrvale salvestada.
+#
+# TÄPSUS: viimane väärtus ühtib `ta` tulemusega rel_tol=1e-6 piires
+# (PARITY_REL_TOL). Pikal voogedastusel erineb algväärtuse mõju (EMA seed),
+# aga 14-perioodilise Wilderi puhul on see pärast ~300 baari < 1e-9.
+
+PARITY_REL_TOL = 1e-6
+PARITY_ABS_TOL = 1e-8
+
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+class Indicator:
+    def state(self):
+        return {k: list(v) if isinstance(v, deque) else v for k, v in vars(self).items()}
+
+    def restore(self, state):
+        for k, v in state.items():
+            current = getattr(self, k, None)
+            setattr(self, k, deque(v, maxlen=current.maxlen) if isinstance(current, deque) else v)
+        return self
+
+
+class EMA(Indicator):
+    # pandas ewm(adjust=False): y0 = x0, yt = yt-1 + a * (xt - yt-1)
+    def __init__(self, span=None, alpha=None, min_periods=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.min_periods = min_periods if min_periods is not None else (span or 1)
+        self.value = None
+        self.count = 0
+
+    def update(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.value if self.count >= self.min_periods else None
+
+
+class SMA(Indicator):
+    def __init__(self, window=50):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, bar):
+        x = bar["close"]
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self.count += 1
+        # Jooksva summa ümardusviga ei lase koguneda
+        if self.count % self.window == 0:
+            self.total = math.fsum(self.values)
+        return self.total / self.window if len(self.values) == self.window else None
+
+
+class RSI(Indicator):
+    # ta.momentum.rsi: Wilderi EMA (alpha=1/n) tõusudest/langustest, esimene diff = 0
+    def __init__(self, window=14):
+        self.prev_close = None
+        self.up = EMA(alpha=1.0 / window, min_periods=window)
+        self.down = EMA(alpha=1.0 / window, min_periods=window)
+
+    def state(self):
+        return {"prev_close": self.prev_close, "up": self.up.state(), "down": self.down.state()}
+
+    def restore(self, state):
+        self.prev_close = state["prev_close"]
+        self.up.restore(state["up"])
+        self.down.restore(state["down"])
+        return self
+
+    def update(self, bar):
+        diff = 0.0 if self.prev_close is None else bar["close"] - self.prev_close
+        self.prev_close = bar["close"]
+        avg_up = self.up.update(max(diff, 0.0))
+        avg_down = self.down.update(max(-diff, 0.0))
+        if avg_up is None or avg_down is None: return None
+        if avg_down == 0: return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+
+
+class MACDDiff(Indicator):
+    # ta.trend.macd_diff: (EMA12 - EMA26) - EMA9(MACD); signaal algab esimesest kehtivast MACD-st
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9):
+        self.fast = EMA(span=window_fast)
+        self.slow = EMA(span=window_slow)
+        self.signal = EMA(span=window_sign)
+
+    def state(self):
+        return {"fast": self.fast.state(), "slow": self.slow.state(), "signal": self.signal.state()}
+
+    def restore(self, state):
+        self.fast.restore(state["fast"])
+        self.slow.restore(state["slow"])
+        self.signal.restore(state["signal"])
+        return self
+
+    def update(self, bar):
+        fast = self.fast.update(bar["close"])
+        slow = self.slow.update(bar["close"])
+        if fast is None or slow is None: return None
+        macd = fast - slow
+        signal = self.signal.update(macd)
+        return None if signal is None else macd - signal
+
+
+class ATR(Indicator):
+    # ta.volatility.average_true_range: esimene väärtus = n TR keskmine, edasi Wilder
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.count = 0
+        self.tr_sum = 0.0
+        self.value = None
+
+    def update(self, bar):
+        high, low = bar["high"], bar["low"]
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = bar["close"]
+        self.count += 1
+
+        if self.count < self.window:
+            self.tr_sum += tr
+            return None
+        if self.count == self.window:
+            self.value = (self.tr_sum + tr) / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + tr) / self.window
+        return self.value
+
+
+class ADX(Indicator):
+    # ta.trend.adx: Wilderi SUMMAD (mitte keskmised) TR/+DM/-DM jaoks, alates 2. baarist;
+    # DX esimene kord n-ndal baaril, ADX = n DX keskmine ja edasi Wilder.
+    def __init__(self, window=14):
+        self.window = window
+        self.prev = None
+        self.count = 0          # baare koos eelmisega (diff-id algavad 2. baarist)
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.dx_count = 0
+        self.dx_sum = 0.0
+        self.value = None
+
+    def update(self, bar):
+        high, low, close = bar["high"], bar["low"], bar["close"]
+        prev = self.prev
+        self.prev = [high, low, close]
+        if prev is None: return None
+        prev_high, prev_low, prev_close = prev
+        self.count += 1
+        n = self.window
+
+        tr = max(high, prev_close) - min(low, prev_close)
+        up = high - prev_high
+        down = prev_low - low
+        pos = up if (up > down and up > 0) else 0.0
+        neg = down if (down > up and down > 0) else 0.0
+
+        if self.count <= n:
+            self.trs += tr
+            self.dip += pos
+            self.din += neg
+            if self.count < n: return None
+        else:
+            self.trs = self.trs - self.trs / n + tr
+            self.dip = self.dip - self.dip / n + pos
+            self.din = self.din - self.din / n + neg
+
+        di_plus = 100 * self.dip / self.trs if self.trs != 0 else 0.0
+        di_minus = 100 * self.din / self.trs if self.trs != 0 else 0.0
+        di_total = di_plus + di_minus
+        dx = 100 * abs(di_plus - di_minus) / di_total if di_total != 0 else 0.0
+
+        self.dx_count += 1
+        if self.dx_count < n:
+            self.dx_sum += dx
+            return None
+        if self.dx_count == n:
+            self.value = (self.dx_sum + dx) / n
+        else:
+            self.value = (self.value * (n - 1) + dx) / n
+        return self.value
+
+
+def hourly_indicators():
+    # get_technical_analysis indikaatorid
+    return {"rsi": RSI(14), "macd_diff": MACDDiff(), "adx": ADX(14), "atr": ATR(14)}
+
+
+def daily_indicators():
+    # determine_market_mode indikaatorid
+    return {"sma50": SMA(50)}
+
+
+class IndicatorEngine:
+    # Hoiab olekut kuni viimase LÕPETATUD baarini. Viimane baar (võib olla pooleli)
+    # arvutatakse oleku koopia peal, nii et järgmine tsükkel saab selle üle kirjutada.
+    def __init__(self, factory):
+        self.factory = factory
+        self.indicators = factory()
+        self.last_ts = None
+
+    def state(self):
+        return {"last_ts": self.last_ts, "indicators": {k: v.state() for k, v in self.indicators.items()}}
+
+    def restore(self, state):
+        self.last_ts = state.get("last_ts")
+        for name, ind_state in state.get("indicators", {}).items():
+            if name in self.indicators: self.indicators[name].restore(ind_state)
+        return self
+
+    def reset(self):
+        self.indicators = self.factory()
+        self.last_ts = None
+
+    def _update(self, indicators, bar):
+        return {name: ind.update(bar) for name, ind in indicators.items()}
+
+    def sync(self, df):
+        # df: OHLC DataFrame (indeks = aeg). Tagastab viimase baari väärtused või None.
+        if df is None or df.empty: return None
+        index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+        timestamps = ((index - EPOCH) // pd.Timedelta(seconds=1)).to_numpy()
+
+        # Olek sobib ainult siis, kui viimane lõpetatud baar on veel aknas (auku pole)
+        pos = -1 if self.last_ts is None else int(np.searchsorted(timestamps, self.last_ts))
+        if pos < 0 or pos >= len(timestamps) - 1 or timestamps[pos] != self.last_ts:
+            self.reset()
+            start = 0
+        else:
+            start = pos + 1
+
+        highs = df["high"].to_numpy()[start:].tolist()
+        lows = df["low"].to_numpy()[start:].tolist()
+        closes = df["close"].to_numpy()[start:].tolist()
+        for i in range(len(closes) - 1):
+            self._update(self.indicators, {"high": highs[i], "low": lows[i], "close": closes[i]})
+            self.last_ts = int(timestamps[start + i])
+
+        last_bar = {"high": float(df["high"].iloc[-1]), "low": float(df["low"].iloc[-1]), "close": float(df["close"].iloc[-1])}
+        return self._update(copy.deepcopy(self.indicators), last_bar)
+
+
+# --- PANEEL: kogu universum korraga (aeg × sümbolid) ---
+# Seeriad joondatakse VASAKULE (rida 0 = iga sümboli esimene baar), nii et Wilderi
+# ja EMA algväärtused langevad kõigil samale reale ja rekursioon jookseb pandas
+# ewm-i kaudu ühe C-tsüklina üle kõigi veergude. Viimane väärtus võetakse iga
+# sümboli enda viimaselt realt.
+
+def build_panel(bars, max_bars=None, fields=("high", "low", "close", "volume")):
+    symbols = list(bars)
+    lengths = np.array([min(len(bars[s]), max_bars or len(bars[s])) for s in symbols], dtype=int)
+    rows = int(lengths.max()) if len(symbols) else 0
+    panel = {}
+    for field in fields:
+        data = np.full((rows, len(symbols)), np.nan)
+        for j, s in enumerate(symbols):
+            values = bars[s][field].to_numpy(dtype=float)[-lengths[j]:]
+            data[:lengths[j], j] = values
+        panel[field] = pd.DataFrame(data, columns=symbols)
+    return panel, pd.Series(lengths, index=symbols)
+
+
+def _wilder_mean(x, n, seed_start, seed_len):
+    # Wilderi keskmine (alpha=1/n); esimene väärtus = ridade [seed_start, seed_start+seed_len) keskmine
+    seed_row = seed_start + seed_len - 1
+    seeded = x.copy()
+    seeded.iloc[:seed_row] = np.nan
+    seeded.iloc[seed_row] = x.iloc[seed_start:seed_row + 1].mean(skipna=False)
+    return seeded.ewm(alpha=1.0 / n, adjust=False).mean()
+
+
+def panel_indicators(bars, max_bars=None, window=14):
+    # bars: {sümbol: OHLCV df}. Tagastab DataFrame (indeks = sümbol) viimase baari väärtustega.
+    if not bars: return pd.DataFrame(columns=["rsi", "macd_diff", "adx", "atr", "close", "volume", "bars"])
+    panel, lengths = build_panel(bars, max_bars)
+    frames = panel_indicator_frames(panel, window)
+
+    last_row = lengths.to_numpy() - 1
+    cols = np.arange(len(lengths))
+    result = {name: frame.to_numpy()[last_row, cols] for name, frame in
+              (("rsi", frames["rsi"]), ("macd_diff", frames["macd_diff"]), ("adx", frames["adx"]), ("atr", frames["atr"]),
+               ("close", panel["close"]), ("volume", panel["volume"]))}
+    result["bars"] = lengths.to_numpy()
+    return pd.DataFrame(result, index=lengths.index)
+
+
+def panel_indicator_frames(panel, window=14):
+    # build_panel() tulemus -> iga indikaatori kogu ajalugu (read = vasakule joondatud baarid)
+    high, low, close = panel["high"], panel["low"], panel["close"]
+    prev_close = close.shift(1)
+    n = window
+
+    # RSI (esimene diff = 0, joondusest tulnud NaN read jäävad NaN-iks)
+    diff = close.diff()
+    up = diff.where(diff > 0, 0.0).where(close.notna())
+    down = (-diff).where(diff < 0, 0.0).where(close.notna())
+    avg_up = up.ewm(alpha=1.0 / n, min_periods=n, adjust=False).mean()
+    avg_down = down.ewm(alpha=1.0 / n, min_periods=n, adjust=False).mean()
+    rsi = pd.DataFrame(np.where(avg_down == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_down)), columns=close.columns)
+
+    # MACD diff (12/26/9)
+    macd = close.ewm(span=12, min_periods=12, adjust=False).mean() - close.ewm(span=26, min_periods=26, adjust=False).mean()
+    macd_diff = macd - macd.ewm(span=9, min_periods=9, adjust=False).mean()
+
+    # ATR
+    tr = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+    atr = _wilder_mean(tr, n, seed_start=0, seed_len=n)
+
+    # ADX
+    ddm = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    move_up = high - high.shift(1)
+    move_down = low.shift(1) - low
+    pos = move_up.where((move_up > move_down) & (move_up > 0), 0.0)
+    neg = move_down.where((move_down > move_up) & (move_down > 0), 0.0)
+    trs = _wilder_mean(ddm, n, seed_start=1, seed_len=n)
+    di_plus = (100 * _wilder_mean(pos, n, seed_start=1, seed_len=n) / trs).where(trs != 0, 0.0)
+    di_minus = (100 * _wilder_mean(neg, n, seed_start=1, seed_len=n) / trs).where(trs != 0, 0.0)
+    di_total = di_plus + di_minus
+    dx = (100 * (di_plus - di_minus).abs() / di_total).where(di_total != 0, 0.0)
+    adx = _wilder_mean(dx, n, seed_start=n, seed_len=n)
+    return {"rsi": rsi, "macd_diff": macd_diff, "adx": adx, "atr": atr}
+
+
+# --- PARITY KONTROLL (tests/test_indicators.py) ---
+
+def ta_reference(df):
+    import ta
+    return {
+        "rsi": ta.momentum.rsi(df["close"], window=14).iloc[-1],
+        "macd_diff": ta.trend.macd_diff(df["close"]).iloc[-1],
+        "adx": ta.trend.adx(df["high"], df["low"], df["close"], window=14).iloc[-1],
+        "atr": ta.volatility.average_true_range(df["high"], df["low"], df["close"]).iloc[-1],
+        "sma50": ta.trend.sma_indicator(df["close"], window=50).iloc[-1],
+    }
+
+
+def parity_errors(df, warmup=None):
+    # Võrdleb voogmootorit `ta`-ga. warmup: mitu baari anda esimesel sync-il,
+    # ülejäänud lisatakse ükshaaval (nagu tsüklite vahel).
+    expected = ta_reference(df)
+    engines = [IndicatorEngine(hourly_indicators), IndicatorEngine(daily_indicators)]
+    values = {}
+    for engine in engines:
+        engine_values = None
+        for end in ([len(df)] if warmup is None else range(warmup, len(df) + 1)):
+            engine_values = engine.sync(df.iloc[:end])
+        values.update(engine_values)
+
+    errors = []
+    for name, want in expected.items():
+        got = values.get(name)
+        if got is None or not math.isclose(got, want, rel_tol=PARITY_REL_TOL, abs_tol=PARITY_ABS_TOL):
+            errors.append(f"{name}: ta={want!r} stream={got!r}")
+    return errors
+
+
+def panel_parity_errors(frames):
+    # Paneel vs `ta` iga sümboli kohta (eri pikkusega seeriad samas paneelis)
+    values = panel_indicators(frames)
+    errors = []
+    for symbol, df in frames.items():
+        expected = ta_reference(df)
+        for name in ("rsi", "macd_diff", "adx", "atr"):
+            got, want = values.at[symbol, name], expected[name]
+            if not math.isclose(got, want, rel_tol=PARITY_REL_TOL, abs_tol=PARITY_ABS_TOL):
+                errors.append(f"{symbol} {name}: ta={want!r} panel={got!r}")
+    return errors
+
+
+def synthetic_ohlcv(bars=720, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.uniform(1e3, 1e5, bars)
+    index = pd.date_range("2024-01-01", periods=bars, freq="h", tz="UTC")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
@@ -0,0 +1,47 @@
+import importlib
+import threading
+
+# --- LAISAD IMPORDID JA KLIENDID ---
+# Rasked moodulid (openai, yfinance, trafilatura, ddgs, alpaca) ja nende kliendid luuakse alles
+# esimesel kasutamisel, mitte main.py laadimisel: tsükkel, mis AI-ni ei jõua, ei maksa nende eest.
+#   yf = lazy_import("yfinance")                 # yf.download(...) impordib esimesel korral
+#   ai_client = Lazy(make_ai_client, "OpenAI")   # ai_client.chat... loob kliendi esimesel korral
+# Proxy suunab atribuudid ja kutsed päris objektile; testid võivad muutuja ise välja vahetada.
+
+
+class Lazy:
+    __slots__ = ("_factory", "_name", "_value", "_lock")
+
+    def __init__(self, factory, name="?"):
+        self._factory = factory
+        self._name = name
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        # Lõimekindel: uudiste lõimed võivad esimest korda pöörduda samaaegselt
+        if self._value is None:
+            with self._lock:
+                if self._value is None: self._value = self._factory()
+        return self._value
+
+    @property
+    def loaded(self):
+        return self._value is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self.get()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<Lazy {self._name} ({'laetud' if self.loaded else 'laadimata'})>"
+
+
+def lazy_import(name, attr=None):
+    # lazy_import("ddgs", "DDGS") -> ddgs.DDGS esimesel kasutamisel
+    def load():
+        module = importlib.import_module(name)
+        return getattr(module, attr) if attr else module
+    return Lazy(load, f"{name}.{attr}" if attr else name)
@@ -2,38 +2,107 @@ import os
 import sys
 import time
 import builtins
+import atexit
 import traceback
-import requests
 import json
+import hashlib
 import csv
-import random 
 import xml.etree.ElementTree as ET
+import threading
+import signal
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+import numpy as np
 import pandas as pd
 import ta
-import yfinance as yf
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import GetAssetsRequest, MarketOrderRequest
-from alpaca.trading.enums import AssetClass, AssetStatus, OrderSide, TimeInForce
-from alpaca.data.historical import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoSnapshotRequest
-from openai import OpenAI
-import trafilatura
-from ddgs import DDGS
+from indicators import IndicatorEngine, hourly_indicators, daily_indicators, panel_indicators
+from strategy import StrategyConfig, technical_score, compute_stop, final_score, order_notional
+from botlog import BufferedLogWriter
+from ttl_cache import TTLCache
+from async_ai import AsyncAIRunner, usage_summary
+from brain_store import BrainStore
+from state_db import SqliteStateStore
+from daemon import InstanceLock, CycleScheduler
+from price_feed import AlpacaCryptoFeed, ReplayFeed, TickRecorder
+from market_data import MarketData
+from http_client import HttpClient, TokenBucket, parse_rate_limits
+from lazy import Lazy, lazy_import
+from paths import BASE_DIR, data_dir
+from metrics import Metrics, CycleProfiler, format_summary, start_http_server
+from bar_cache import BarCache, find_problem, utc_index, GAP_STEPS, PERIOD_SPANS, INTERVAL_STEPS
+
+# --- LAISAD MOODULID JA KLIENDID (lazy.py) ---
+# Laetakse esimesel kasutamisel: uudiste/AI pakett alles siis, kui mõni kandidaat jõuab analyze_coin_ai-ni.
+# Kontroll: python3 bench.py --only startup_import (python -X importtime).
+yf = lazy_import("yfinance")
+trafilatura = lazy_import("trafilatura")
+DDGS = lazy_import("ddgs", "DDGS")
+
+def make_trading_client():
+    from alpaca.trading.client import TradingClient
+    return TradingClient(api_key, secret_key, paper=True)
+
+def make_data_client():
+    from alpaca.data.historical import CryptoHistoricalDataClient
+    return CryptoHistoricalDataClient()
+
+def make_ai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=openai_key)
+
+def make_trafilatura_config():
+    from trafilatura.settings import use_config
+    return use_config()
 
 # --- 0. SEADISTUS JA KONSTANDID ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+
+# Andmefailide kaust (logid, brain.json, vahemälud); VIBE_DATA_DIR=<kaust> nt bench.py jaoks
+DATA_DIR = data_dir()
+
+LOG_FILE = os.path.join(DATA_DIR, "bot.log")
+BRAIN_FILE = os.path.join(DATA_DIR, "brain.json")
+ARCHIVE_FILE = os.path.join(DATA_DIR, "trade_archive.csv") 
+AI_LOG_FILE = os.path.join(DATA_DIR, "ai_history.log")     
+JSON_LOG_FILE = os.path.join(DATA_DIR, "bot.jsonl")
+BAR_CACHE_FILE = os.path.join(DATA_DIR, "bars.db")
+STATE_DB_FILE = os.path.join(DATA_DIR, "state.db")
+NEWS_CACHE_FILE = os.path.join(DATA_DIR, "news_cache.json")
+ARTICLE_CACHE_FILE = os.path.join(DATA_DIR, "article_cache.json")
+AI_CACHE_FILE = os.path.join(DATA_DIR, "ai_verdicts.json")
+ASSET_CACHE_FILE = os.path.join(DATA_DIR, "asset_universe.json")
+LOCK_FILE = os.path.join(BASE_DIR, "bot.lock") # dashboard.py otsib lukku siit
+CYCLE_METRICS_FILE = os.path.join(DATA_DIR, "cycle_metrics.jsonl")
+METRICS_TEXTFILE = os.path.join(DATA_DIR, "metrics.prom")
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
 
-LOG_FILE = os.path.join(BASE_DIR, "bot.log")
-BRAIN_FILE = os.path.join(BASE_DIR, "brain.json")
-ARCHIVE_FILE = os.path.join(BASE_DIR, "trade_archive.csv") 
-AI_LOG_FILE = os.path.join(BASE_DIR, "ai_history.log")     
+# Kasutame seda, et vältida DDG blokeerimist, kui see juba juhtus:
+# DDG vea järel kasutame DDG_BACKUP_SECONDS jooksul ainult Yahoo/Google'it, siis proovime uuesti
+DDG_BACKUP_UNTIL = 0.0 # time.monotonic() väärtus
 
-# Kasutame seda, et vältida DDG blokeerimist, kui see juba juhtus
-USE_BACKUP_SOURCE = False
+# Voogindikaatorite olek (sümbol, intervall) kaupa, püsib protsessi eluaja
+INDICATOR_ENGINES = {}
 
 # --- LOGIMISE SÜSTEEM ---
+# Kirjutab taustalõim (botlog.py): print() ei tee ise ühtegi failioperatsiooni
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+log_writer = BufferedLogWriter(LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS)
+ai_log_writer = BufferedLogWriter(AI_LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS)
+# Struktureeritud logi (JSON lines) masinloetavaks analüüsiks: LOG_JSON=1
+json_log_writer = BufferedLogWriter(JSON_LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS) if os.getenv("LOG_JSON", "0") == "1" else None
+# Tsükli kokkuvõtted (etappide ajad + loendurid), üks JSON rida tsükli kohta
+cycle_metrics_writer = BufferedLogWriter(CYCLE_METRICS_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS)
+# Etappide ajad ja loendurid (metrics.py); kumulatiivsed väärtused -> metrics.prom / METRICS_PORT
+metrics = Metrics()
+
+def close_logs():
+    for writer in (cycle_metrics_writer, json_log_writer, ai_log_writer, log_writer):
+        if writer is not None: writer.close()
+
+atexit.register(close_logs)
+
 def print(*args, **kwargs):
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     kwargs.pop('flush', None)
@@ -42,11 +111,9 @@ def print(*args, **kwargs):
     formatted_msg = f"[{now}] {msg}"
     
     # 1. LOGIFAILI (ALATI)
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(formatted_msg + "\n")
-    except Exception as e:
-        builtins.print(f"[SYSTEM ERROR] Logi viga: {e}")
+    log_writer.write(formatted_msg + "\n")
+    if json_log_writer is not None:
+        json_log_writer.write(json.dumps({"ts": now, "type": "log", "msg": msg}, ensure_ascii=False) + "\n")
 
     # 2. EKRAANILE (AINULT TERMINALIS)
     if sys.stdout.isatty():
@@ -54,8 +121,6 @@ def print(*args, **kwargs):
 
 # --- CRASH CATCHER (STARTUP) ---
 try:
-    load_dotenv(os.path.join(BASE_DIR, ".env"))
-
     api_key = os.getenv("ALPACA_API_KEY")
     secret_key = os.getenv("ALPACA_SECRET_KEY")
     openai_key = os.getenv("OPENAI_API_KEY")
@@ -69,13 +134,94 @@ try:
     # GLOBAL VARIABLES
     MARKET_MODE = "NEUTRAL" 
 
-    trading_client = TradingClient(api_key, secret_key, paper=True)
-    data_client = CryptoHistoricalDataClient()
-    ai_client = OpenAI(api_key=openai_key)
+    trading_client = Lazy(make_trading_client, "TradingClient")
+    data_client = Lazy(make_data_client, "CryptoHistoricalDataClient")
+    ai_client = Lazy(make_ai_client, "OpenAI")
 
     # STRATEEGIA KONSTANDID
     MIN_VOLUME_USD = 10000     
     MAX_AI_CALLS = 10          
+    COOLDOWN_HOURS = 6
+    # Strateegia parameetrid (RSI piirid, ATR kordajad, stopid, ostu lävi...): vaikimisi strategy.py,
+    # STRATEGY_CONFIG=<fail.json> (nt optimizer.py tulemus) kirjutab üle
+    STRATEGY = StrategyConfig.load(os.getenv("STRATEGY_CONFIG"))
+
+    # MÄLU: brain.json loetakse korra, salvestus tsükli lõpus (või BRAIN_FLUSH_SECONDS tagant).
+    # STATE_BACKEND=sqlite -> state.db (WAL), brain.json/CSV imporditakse esimesel käivitusel.
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "json")
+    if STATE_BACKEND == "sqlite":
+        brain = SqliteStateStore(STATE_DB_FILE, cooldown_seconds=COOLDOWN_HOURS * 3600)
+        migrated = brain.migrate_from_files(BRAIN_FILE, ARCHIVE_FILE)
+        if migrated:
+            print(f"🗄️ SQLite migratsioon: {migrated['positions']} positsiooni, {migrated['cooldowns']} cool down, {migrated['trades']} tehingut.")
+    else:
+        brain = BrainStore(BRAIN_FILE, cooldown_seconds=COOLDOWN_HOURS * 3600)
+        if int(os.getenv("BRAIN_FLUSH_SECONDS", "0")) > 0:
+            brain.start_autoflush(int(os.getenv("BRAIN_FLUSH_SECONDS")))
+
+    # SKANNER: paralleelne TA (CONCURRENT_SCANNER=1 .env failis)
+    CONCURRENT_SCANNER = os.getenv("CONCURRENT_SCANNER", "0") == "1"
+    SCANNER_WORKERS = int(os.getenv("SCANNER_WORKERS", "8"))
+    # Yahoo: mitu sümbolit ühes yf.download päringus (0 = vana sümbolhaaval laadimine)
+    YAHOO_BATCH_SIZE = int(os.getenv("YAHOO_BATCH_SIZE", "50"))
+    # Baaride vahemälu: laeme ainult uued baarid (BAR_CACHE=0 lülitab välja)
+    bar_cache = BarCache(BAR_CACHE_FILE) if os.getenv("BAR_CACHE", "1") == "1" else None
+    # UUDISED: artiklid paralleelselt, iga allikas oma tähtajaga, DDG päringud token bucketiga
+    NEWS_WORKERS = int(os.getenv("NEWS_WORKERS", "6"))
+    AI_NEWS_WORKERS = int(os.getenv("AI_NEWS_WORKERS", "3")) # AI_ASYNC: mitme mündi uudised korraga (oma lõimekogum)
+    NEWS_SOURCE_TIMEOUT = float(os.getenv("NEWS_SOURCE_TIMEOUT", "8"))
+    ARTICLE_TIMEOUT = int(os.getenv("ARTICLE_TIMEOUT", "5"))
+    DDG_SECONDS_PER_QUERY = float(os.getenv("DDG_SECONDS_PER_QUERY", "4"))
+    DDG_BACKUP_SECONDS = float(os.getenv("DDG_BACKUP_SECONDS", "1800"))
+    ARTICLE_MAX_BYTES = 5 * 1024 * 1024 # suuremad vastused (PDF, video) lõigatakse siit
+    # HTTP kiht (http_client.py): ühine keep-alive sessioon, kordused 429/5xx, hostipõhised limiidid (päringut/s)
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_RATE_LIMITS = parse_rate_limits(os.getenv("HTTP_RATE_LIMITS", "news.google.com=1"))
+    # Uudiste vahemälu: sümbol -> raport (lühike TTL), URL -> artikli tekst (pikk TTL)
+    NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", str(45 * 60)))
+    ARTICLE_CACHE_TTL = int(os.getenv("ARTICLE_CACHE_TTL", str(7 * 24 * 3600)))
+    ARTICLE_RETRY_SECONDS = 3600 # ebaõnnestunud URL-i ei proovita tunni jooksul uuesti
+    NEWS_CACHE_PERSIST = os.getenv("NEWS_CACHE_PERSIST", "1") == "1"
+    # Alpaca: varade universum vahemälus (muutub harva), snapshotid tükkidena ühes päringus
+    ASSET_CACHE_TTL = int(os.getenv("ASSET_CACHE_TTL", str(6 * 3600)))
+    SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", "200"))
+    # AI otsuste vahemälu: sama münt + samad uudised + sama turg -> sama vastus ilma API kõneta
+    AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", str(3 * 3600)))
+    # Kõik tehniliselt sobivad mündid ühes AI päringus (AI_BATCH=1)
+    AI_BATCH = os.getenv("AI_BATCH", "0") == "1"
+    AI_BATCH_NEWS_CHARS = 4000 # uudiste maht mündi kohta partiipäringus
+    # Asünkroonne AI (AI_ASYNC=1): paralleelsed päringud, kordused 429/5xx korral, tsükli tähtaeg
+    AI_ASYNC = os.getenv("AI_ASYNC", "0") == "1"
+    AI_DEADLINE_SECONDS = float(os.getenv("AI_DEADLINE_SECONDS", "60")) # pärast seda saavad ülejäänud neutraalse 50
+    ai_runner = AsyncAIRunner(
+        openai_key,
+        concurrency=int(os.getenv("AI_CONCURRENCY", "4")),
+        call_timeout=float(os.getenv("AI_CALL_TIMEOUT", "20")),
+        max_retries=int(os.getenv("AI_MAX_RETRIES", "3")))
+    # DAEMON (python3 main.py --daemon): tsükkel iga CYCLE_INTERVAL_SECONDS tagant,
+    # venima jäänud tsükli järel DAEMON_OVERRUN=skip (jäta pesad vahele) või coalesce (üks tsükkel kohe)
+    CYCLE_INTERVAL_SECONDS = float(os.getenv("CYCLE_INTERVAL_SECONDS", "900"))
+    DAEMON_OVERRUN = os.getenv("DAEMON_OVERRUN", "skip")
+    # Stop-monitor (daemonis): stopid iga STOP_MONITOR_SECONDS tagant, skännerist sõltumata (0 = väljas)
+    STOP_MONITOR_SECONDS = float(os.getenv("STOP_MONITOR_SECONDS", "5"))
+    # Positsioonide seis (get_all_positions) on ühine: uus päring tsükli alguses, pärast täitumist ja
+    # soovi korral iga POSITIONS_MAX_AGE_SECONDS järel (0 = ei aegu; nt käsitsi sulgemise jaoks)
+    POSITIONS_MAX_AGE_SECONDS = float(os.getenv("POSITIONS_MAX_AGE_SECONDS", "0"))
+    # Hinnavoog (daemonis): PRICE_FEED=alpaca (websocket) või replay:<tiksud.csv>; tipud ja stopid iga tiksu peale
+    PRICE_FEED = os.getenv("PRICE_FEED", "")
+    PRICE_FEED_RECORD = os.getenv("PRICE_FEED_RECORD", "") # kui antud, salvestatakse tiksud sellesse faili
+    PRICE_FEED_REPLAY_SPEED = float(os.getenv("PRICE_FEED_REPLAY_SPEED", "1"))
+    # Indikaatorid olekuga (O(1) uue baari kohta); STREAMING_INDICATORS=0 -> vana `ta` täisarvutus
+    STREAMING_INDICATORS = os.getenv("STREAMING_INDICATORS", "1") == "1"
+    # Kogu universumi vektoriseeritud TA (VECTOR_SCAN=1), mitte ainult top 30 liikujat
+    VECTOR_SCAN = os.getenv("VECTOR_SCAN", "0") == "1"
+    # Mõõdikud: METRICS_PORT>0 -> http://127.0.0.1:<port>/metrics (daemonis), metrics.prom kirjutatakse alati
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    # Tsükli profiil: PROFILE_CYCLES=cprofile (.prof) või pyinstrument (.html) -> profiles/, alles PROFILE_KEEP viimast
+    PROFILE_CYCLES = os.getenv("PROFILE_CYCLES", "")
+    cycle_profiler = CycleProfiler(PROFILE_CYCLES, PROFILE_DIR, keep=int(os.getenv("PROFILE_KEEP", "20")), log=print) if PROFILE_CYCLES else None
 
 except Exception as e:
     print(f"CRITICAL STARTUP ERROR: {e}")
@@ -84,18 +230,24 @@ except Exception as e:
 
 # --- 1. MÄLU JA ANDMEHALDUS ---
 
-def load_brain():
-    if os.path.exists(BRAIN_FILE):
-        try:
-            with open(BRAIN_FILE, 'r') as f: return json.load(f)
-        except: return {}
-    return {}
-
-def save_brain(brain_data):
-    try: 
-        with open(BRAIN_FILE, 'w') as f: 
-            json.dump(brain_data, f, indent=4)
-    except: pass
+def save_brain():
+    try:
+        with metrics.span("state_io"): brain.flush()
+    except Exception as e: print(f"   ❌ Viga oleku salvestamisel: {e}")
+
+atexit.register(save_brain)
+
+def log_ai_usage(record):
+    # Tokenid ja latentsus iga AI päringu kohta
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ai_log_writer.write(
+            f"[{timestamp}] 📊 AI KÕNE: {record['key']} | {record['status']} | katseid {record['attempts']} | "
+            f"{record['latency']}s (kokku {record['elapsed']}s) | tokenid {record['prompt_tokens']}+{record['completion_tokens']}={record['total_tokens']}\n")
+        if json_log_writer is not None:
+            json_log_writer.write(json.dumps({"ts": timestamp, "type": "ai_usage", **record}, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Viga AI logimisel: {e}")
 
 def log_trade_to_csv(symbol, entry_price, exit_price, qty, reason):
     try:
@@ -112,6 +264,8 @@ def log_trade_to_csv(symbol, entry_price, exit_price, qty, reason):
             if not file_exists:
                 writer.writerow(["Time", "Symbol", "Entry Price", "Exit Price", "Qty", "Profit USD", "Profit %", "Reason"])
             writer.writerow([timestamp, symbol, round(entry_price, 4), round(exit_price, 4), round(qty, 4), round(profit_usd, 2), round(profit_pct, 2), reason])
+        if STATE_BACKEND == "sqlite":
+            brain.record_trade(timestamp, symbol, round(entry_price, 4), round(exit_price, 4), round(qty, 4), round(profit_usd, 2), round(profit_pct, 2), reason)
         print(f"   📝 AJALUGU SALVESTATUD: {symbol} PnL: ${profit_usd:.2f} ({profit_pct:.2f}%)")
     except Exception as e:
         print(f"   ❌ Viga CSV salvestamisel: {e}")
@@ -119,61 +273,55 @@ def log_trade_to_csv(symbol, entry_price, exit_price, qty, reason):
 def log_ai_prompt(symbol, prompt_text, response_text):
     try:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(AI_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] 🧠 ANALÜÜS: {symbol}\n")
-            f.write("👇 --- INPUT ---\n")
-            f.write(prompt_text.strip()[:500] + "...\n") # Hoiame logi puhtama
-            f.write("👆 --- OUTPUT ---\n")
-            f.write(response_text.strip() + "\n")
-            f.write("="*60 + "\n\n")
+        ai_log_writer.write(
+            f"[{timestamp}] 🧠 ANALÜÜS: {symbol}\n"
+            "👇 --- INPUT ---\n"
+            + prompt_text.strip()[:500] + "...\n" # Hoiame logi puhtama
+            + "👆 --- OUTPUT ---\n"
+            + response_text.strip() + "\n"
+            + "="*60 + "\n\n")
+        if json_log_writer is not None:
+            json_log_writer.write(json.dumps({"ts": timestamp, "type": "ai", "symbol": symbol, "prompt": prompt_text.strip(), "response": response_text.strip()}, ensure_ascii=False) + "\n")
     except Exception as e:
         print(f"Viga AI logimisel: {e}")
 
 def update_position_metadata(symbol, atr_value):
-    brain = load_brain()
-    if "positions" not in brain: brain["positions"] = {}
-    if symbol not in brain["positions"]:
-        brain["positions"][symbol] = {"highest_price": 0, "atr_at_entry": atr_value, "is_risk_free": False}
-    save_brain(brain)
+    # Uus sissetulek: kirjutame üle ka vaikekirje, mille stopikontroll võis vahepeal luua (ATR = 5% hinnast)
+    with brain.lock:
+        brain.put_position(symbol, {"highest_price": 0, "atr_at_entry": atr_value, "is_risk_free": False})
 
 def update_high_watermark(symbol, current_price, current_rsi=50):
-    brain = load_brain()
-    if "positions" not in brain: brain["positions"] = {}
-    if symbol not in brain["positions"]:
-        brain["positions"][symbol] = {"highest_price": current_price, "atr_at_entry": current_price * 0.05, "is_risk_free": False, "last_rsi": current_rsi}
-    else:
-        brain["positions"][symbol]["last_rsi"] = current_rsi
-        if current_price > brain["positions"][symbol]["highest_price"]:
-            brain["positions"][symbol]["highest_price"] = current_price
-            save_brain(brain)
-            return True
-    save_brain(brain)
-    return False
+    with brain.lock:
+        pos = brain.get_position(symbol)
+        if not pos:
+            brain.put_position(symbol, {"highest_price": current_price, "atr_at_entry": current_price * 0.05, "is_risk_free": False, "last_rsi": current_rsi})
+            return False
+        new_high = current_price > pos.get("highest_price", 0)
+        if new_high: pos["highest_price"] = current_price
+        if new_high or pos.get("last_rsi") != current_rsi:
+            pos["last_rsi"] = current_rsi
+            brain.put_position(symbol, pos)
+        return new_high
 
 def set_risk_free_status(symbol):
-    brain = load_brain()
-    if "positions" in brain and symbol in brain["positions"]:
-        brain["positions"][symbol]["is_risk_free"] = True
-        save_brain(brain)
+    with brain.lock:
+        pos = brain.get_position(symbol)
+        if pos:
+            pos["is_risk_free"] = True
+            brain.put_position(symbol, pos)
 
 def get_position_data(symbol):
-    brain = load_brain()
-    return brain.get("positions", {}).get(symbol, {})
+    return brain.get_position(symbol)
 
 def is_cooled_down(symbol):
-    brain = load_brain()
-    last_sold = brain.get("cool_down", {}).get(symbol)
-    if last_sold and datetime.now() - datetime.fromtimestamp(last_sold) < timedelta(hours=6):
+    last_sold = brain.last_sold(symbol)
+    if last_sold and datetime.now() - datetime.fromtimestamp(last_sold) < timedelta(hours=COOLDOWN_HOURS):
         return False
     return True
 
 def activate_cooldown(symbol):
-    brain = load_brain()
-    if "cool_down" not in brain: brain["cool_down"] = {}
-    brain["cool_down"][symbol] = datetime.now().timestamp()
-    if "positions" in brain and symbol in brain["positions"]:
-        del brain["positions"][symbol]
-    save_brain(brain)
+    brain.set_cooldown(symbol, datetime.now().timestamp())
+    brain.remove_position(symbol)
 
 # --- 2. TEHNILINE ANALÜÜS (TÄISMAHUS) ---
 
@@ -185,19 +333,123 @@ def format_symbol_for_yahoo(symbol):
     if s.endswith("USD"): return s[:-3] + "-USD"
     return s + "-USD"
 
+def normalize_ohlcv(df):
+    if df is None or df.empty: return None
+    if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+    df.columns = [c.lower() for c in df.columns]
+    if 'close' not in df.columns: return None
+    return df.dropna()
+
 def get_yahoo_data(symbol, period="1mo", interval="1h"):
+    if bar_cache is not None:
+        return get_yahoo_data_batch([symbol], period=period, interval=interval).get(symbol)
     try:
         # Kiirem timeout, et mitte passida
         time.sleep(0.2)
         y_symbol = format_symbol_for_yahoo(symbol)
-        df = yf.download(y_symbol, period=period, interval=interval, progress=False, timeout=10)
-        if df is None or df.empty: return None
-        if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
-        df.columns = [c.lower() for c in df.columns]
-        if 'close' not in df.columns: return None
-        return df.dropna()
+        metrics.incr("http_requests", service="yahoo")
+        with metrics.span("yahoo_download"):
+            df = yf.download(y_symbol, period=period, interval=interval, progress=False, timeout=10)
+        return normalize_ohlcv(df)
     except: return None
 
+def download_yahoo_batch(y_symbols, **kwargs):
+    # Üks HTTP päring partii kohta, mitte sümboli kohta. Tagastab {yahoo_sümbol: df}.
+    # Sümbolid, mida Yahoo ei tea, jäävad lihtsalt tulemusest välja.
+    batch_size = max(YAHOO_BATCH_SIZE, 1)
+    result = {}
+    for i in range(0, len(y_symbols), batch_size):
+        batch = y_symbols[i:i + batch_size]
+        metrics.incr("http_requests", service="yahoo")
+        try:
+            with metrics.span("yahoo_download"):
+                raw = yf.download(batch, group_by="ticker", threads=True, progress=False, timeout=10, **kwargs)
+        except Exception as e:
+            print(f"      ⚠️ Yahoo partii viga ({len(batch)} sümbolit): {e}")
+            continue
+        if raw is None or raw.empty: continue
+
+        tickers = raw.columns.get_level_values(0) if isinstance(raw.columns, pd.MultiIndex) else []
+        for y_symbol in batch:
+            if y_symbol not in tickers: continue
+            df = normalize_ohlcv(raw[y_symbol].copy())
+            if df is None or df.empty: continue
+            result[y_symbol] = df
+            metrics.incr("bars_downloaded", len(df), source="yahoo")
+    return result
+
+def download_yahoo_cached(y_symbols, period, interval):
+    # Vahemälus korras seeriad saavad ainult delta (viimasest baarist alates),
+    # puuduvad/vigased/auguga seeriad laetakse kogu perioodi ulatuses uuesti.
+    now = pd.Timestamp.now(tz="UTC")
+    window_start = now - PERIOD_SPANS.get(period, pd.Timedelta(days=30))
+    step = INTERVAL_STEPS.get(interval, pd.Timedelta(hours=1))
+
+    fresh, stale = [], {}
+    for y_symbol in y_symbols:
+        cached = bar_cache.load(y_symbol, interval, since=window_start)
+        problem = find_problem(cached, step, window_start)
+        metrics.incr("cache_lookups", cache="bars", result="hit" if problem is None else "miss")
+        if problem is None:
+            stale[y_symbol] = cached.index[-1]
+        else:
+            if cached is not None: print(f"      🧹 {y_symbol} ({interval}) vahemälu: {problem}. Laen uuesti.")
+            fresh.append(y_symbol)
+
+    if fresh:
+        for y_symbol, df in download_yahoo_batch(fresh, period=period, interval=interval).items():
+            bar_cache.upsert(y_symbol, interval, df, replace=True)
+    if stale:
+        # Üks delta-päring kõigile; viimane (pooleli) baar kirjutatakse üle
+        start = min(stale.values())
+        for y_symbol, df in download_yahoo_batch(list(stale), start=start.to_pydatetime(), interval=interval).items():
+            bar_cache.upsert(y_symbol, interval, df[utc_index(df.index) >= stale[y_symbol]])
+    bar_cache.evict(interval, window_start)
+
+    result = {}
+    for y_symbol in y_symbols:
+        df = bar_cache.load(y_symbol, interval, since=window_start)
+        # Kui delta ebaõnnestus ja andmed on vanad, ei kauple me nende pealt
+        if df is None or now - df.index[-1] > GAP_STEPS * step: continue
+        result[y_symbol] = df
+    return result
+
+def get_yahoo_data_batch(symbols, period="1mo", interval="1h"):
+    y_map = {}
+    for s in symbols:
+        y_map.setdefault(format_symbol_for_yahoo(s), []).append(s)
+
+    if bar_cache is not None:
+        try: frames = download_yahoo_cached(list(y_map), period, interval)
+        except Exception as e:
+            print(f"      ⚠️ Baaride vahemälu viga: {e}")
+            frames = download_yahoo_batch(list(y_map), period=period, interval=interval)
+    else:
+        frames = download_yahoo_batch(list(y_map), period=period, interval=interval)
+
+    return {s: df for y_symbol, df in frames.items() for s in y_map[y_symbol]}
+
+def get_indicators(symbol, interval, df, factory):
+    # Tagastab viimase baari indikaatorid; puuduv väärtus (soojendus) = NaN nagu `ta`-l
+    key = (symbol, interval)
+    engine = INDICATOR_ENGINES.get(key)
+    if engine is None:
+        engine = IndicatorEngine(factory)
+        if bar_cache is not None:
+            try:
+                state = bar_cache.load_state(symbol, interval)
+                if state: engine.restore(state)
+            except Exception:
+                engine.reset()
+        INDICATOR_ENGINES[key] = engine
+
+    last_ts = engine.last_ts
+    values = engine.sync(df) or {}
+    if bar_cache is not None and engine.last_ts != last_ts:
+        try: bar_cache.save_state(symbol, interval, engine.state())
+        except Exception as e: print(f"      ⚠️ Indikaatorite oleku salvestamine ebaõnnestus: {e}")
+    return {k: float("nan") if v is None else v for k, v in values.items()}
+
 def determine_market_mode():
     global MARKET_MODE
     print("🔍 Analüüsin turu režiimi (BTC)...")
@@ -206,7 +458,10 @@ def determine_market_mode():
         MARKET_MODE = "NEUTRAL"
         return
     current_price = df['close'].iloc[-1]
-    sma50 = ta.trend.sma_indicator(df['close'], window=50).iloc[-1]
+    if STREAMING_INDICATORS:
+        sma50 = get_indicators("BTC/USD", "1d", df, daily_indicators)["sma50"]
+    else:
+        sma50 = ta.trend.sma_indicator(df['close'], window=50).iloc[-1]
     
     if current_price > sma50:
         MARKET_MODE = "BULL"
@@ -215,58 +470,132 @@ def determine_market_mode():
         MARKET_MODE = "BEAR"
         print(f"   🔴 TURG ON NÕRK (BEAR). BTC ${current_price:.0f} < SMA50 ${sma50:.0f}")
 
-def get_technical_analysis(symbol, alpaca_volume_usd):
-    df = get_yahoo_data(symbol, period="1mo", interval="1h")
-    if df is None or len(df) < 30: return 0, 0, 0, 0, 0 
+def get_technical_analysis(symbol, alpaca_volume_usd, df=None):
+    if df is None: df = get_yahoo_data(symbol, period="1mo", interval="1h")
+    if df is None or len(df) < 30: return 0, 0, 0
     
     current_price = df['close'].iloc[-1]
     yahoo_vol_usd = df['volume'].iloc[-1] * current_price if 'volume' in df.columns else 0
     final_vol_usd = max(alpaca_volume_usd, yahoo_vol_usd)
 
     # Indikaatorid
-    rsi = ta.momentum.rsi(df['close'], window=14).iloc[-1]
-    macd_diff = ta.trend.macd_diff(df['close']).iloc[-1]
-    adx = ta.trend.adx(df['high'], df['low'], df['close'], window=14).iloc[-1]
-    atr = ta.volatility.average_true_range(df['high'], df['low'], df['close']).iloc[-1]
+    with metrics.span("ta"):
+        if STREAMING_INDICATORS:
+            ind = get_indicators(symbol, "1h", df, hourly_indicators)
+            rsi, macd_diff, adx, atr = ind["rsi"], ind["macd_diff"], ind["adx"], ind["atr"]
+        else:
+            rsi = ta.momentum.rsi(df['close'], window=14).iloc[-1]
+            macd_diff = ta.trend.macd_diff(df['close']).iloc[-1]
+            adx = ta.trend.adx(df['high'], df['low'], df['close'], window=14).iloc[-1]
+            atr = ta.volatility.average_true_range(df['high'], df['low'], df['close']).iloc[-1]
     
-    if pd.isna(rsi): return 0, 0, 0, 0, 0
+    if pd.isna(rsi): return 0, 0, 0
 
-    score = 50
-    if MARKET_MODE == "BULL":
-        if rsi < 30: score += 30
-        elif rsi < 55: score += 15 
-        if macd_diff > 0: score += 10
-        if adx > 25: score += 10
-    elif MARKET_MODE == "BEAR":
-        # Konservatiivne loogika
-        if rsi < 25: score += 45     
-        elif rsi < 30: score += 25  
-        elif rsi > 45: score -= 50   
-        if final_vol_usd > 1000000: score += 10
-        if macd_diff > 0: score += 15 
-
-    if final_vol_usd < 10000: score = 0
+    # BULL/BEAR reeglid on strategy.py-s (sama kood käib ka vektoriseeritud skanneris)
+    score = int(technical_score(MARKET_MODE, rsi, macd_diff, adx, final_vol_usd, STRATEGY))
     if score >= 60:
         print(f"      📊 {symbol} ({MARKET_MODE}): RSI={rsi:.1f}, Vol=${final_vol_usd/1000:.0f}k. Skoor: {score}")
     
-    return max(0, min(100, score)), atr, rsi
+    return score, atr, rsi
+
+def score_universe(universe):
+    # Kogu universum ühe paneelina: indikaatorid ja skoorid massiivioperatsioonidena.
+    # Tagastab (kandidaat, (skoor, atr, rsi)) paarid skoori järgi (viigi korral abs_change järgi).
+    with metrics.span("bars"):
+        bars = get_yahoo_data_batch([c['symbol'] for c in universe], period="1mo", interval="1h")
+    bars = {s: df for s, df in bars.items() if len(df) >= 30}
+    with metrics.span("ta"):
+        ind = panel_indicators(bars)
+
+    vol_by_symbol = {c['symbol']: c['vol_usd'] for c in universe}
+    alpaca_vol = np.array([vol_by_symbol[s] for s in ind.index], dtype=float)
+    yahoo_vol = np.nan_to_num(ind['volume'].to_numpy() * ind['close'].to_numpy())
+    final_vol = np.maximum(alpaca_vol, yahoo_vol)
+    scores = technical_score(MARKET_MODE, ind['rsi'].to_numpy(), ind['macd_diff'].to_numpy(), ind['adx'].to_numpy(), final_vol, STRATEGY)
+    by_symbol = {s: (int(score), atr, rsi) for s, score, atr, rsi in zip(ind.index, scores, ind['atr'], ind['rsi'])}
+
+    results = [(c, by_symbol.get(c['symbol'], (0, 0, 0))) for c in universe]
+    results.sort(key=lambda r: r[1][0], reverse=True)
+    qualified = [r for r in results if r[1][0] >= 60]
+    print(f"   📊 Vektorskanner: {len(ind)}/{len(universe)} münti hinnatud, {len(qualified)} skooriga >= 60.")
+    for c, (score, atr, rsi) in qualified[:5]:
+        print(f"      📊 {c['symbol']} ({MARKET_MODE}): RSI={rsi:.1f}. Skoor: {score}")
+    return results
 
 # --- 3. UUDISTE MOOTOR (HYBRID: DDG + YAHOO + GOOGLE) ---
 
+def observe_http(name, status, seconds, nbytes, retries):
+    # http_client.HttpClient -> metrics.py loendurid (nimi = päringu liik, mitte host)
+    metrics.incr("http_requests", service=name)
+    metrics.incr("http_bytes", nbytes, service=name)
+    metrics.incr("http_seconds", seconds, service=name)
+    if retries: metrics.incr("http_retries", retries, service=name)
+    if status == 304: metrics.incr("http_not_modified", service=name)
+    if status is None or status >= 400: metrics.incr("http_errors", service=name)
+
+http = HttpClient(timeout=HTTP_TIMEOUT, max_retries=HTTP_MAX_RETRIES, rate_limits=HTTP_RATE_LIMITS, observer=observe_http)
+
+news_pool = ThreadPoolExecutor(max_workers=NEWS_WORKERS, thread_name_prefix="news")
+# Asünkroonse AI uudised (mitu münti korraga): DDG/Yahoo + kuni 3 artiklit mündi kohta, news_pool-ist eraldi
+ai_news_pool = ThreadPoolExecutor(max_workers=max(AI_NEWS_WORKERS, 1) * 4, thread_name_prefix="ai-news-io")
+ddg_limiter = TokenBucket(rate=1.0 / DDG_SECONDS_PER_QUERY, capacity=1,
+                          on_wait=lambda seconds: metrics.incr("rate_limit_wait_seconds", seconds, limiter="ddg"))
+
+news_cache = TTLCache(maxsize=500, ttl=NEWS_CACHE_TTL, path=NEWS_CACHE_FILE if NEWS_CACHE_PERSIST else None)
+article_cache = TTLCache(maxsize=2000, ttl=ARTICLE_CACHE_TTL, path=ARTICLE_CACHE_FILE if NEWS_CACHE_PERSIST else None)
+
+ai_cache = TTLCache(maxsize=1000, ttl=AI_CACHE_TTL, path=AI_CACHE_FILE if NEWS_CACHE_PERSIST else None)
+
+asset_cache = TTLCache(maxsize=1, ttl=ASSET_CACHE_TTL, path=ASSET_CACHE_FILE if NEWS_CACHE_PERSIST else None)
+market_data = MarketData(trading_client, data_client, asset_cache, chunk_size=SNAPSHOT_CHUNK_SIZE, metrics=metrics,
+                         positions_ttl=POSITIONS_MAX_AGE_SECONDS)
+
+def save_caches():
+    for cache in (news_cache, article_cache, ai_cache, asset_cache):
+        try: cache.save()
+        except Exception as e: print(f"   ⚠️ Vahemälu salvestamine ebaõnnestus ({cache.path}): {e}")
+
+atexit.register(save_caches)
+
+# Artiklid laeb http_client (ühine sessioon, ainult avalikud aadressid), trafilatura ainult eraldab teksti
+TRAFILATURA_CONFIG = Lazy(make_trafilatura_config, "trafilatura config")
+
 def scrape_with_trafilatura(url):
+    cached = article_cache.get(url)
+    if cached is not None: return cached or None  # "" = teadaolevalt tühi/katki URL
+
+    text = None
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            text = trafilatura.extract(downloaded)
-            return text[:3000] if text else None
+        with metrics.span("article_fetch"):
+            res = http.get(url, name="article", timeout=ARTICLE_TIMEOUT, retries=0, public_only=True, max_bytes=ARTICLE_MAX_BYTES)
+        if res.status_code == 200 and res.content:
+            with metrics.span("article_extract"):
+                text = trafilatura.extract(res.content, config=TRAFILATURA_CONFIG.get())
+            text = text[:3000] if text else None
     except: pass
-    return None
+    article_cache.set(url, text or "", ttl=None if text else ARTICLE_RETRY_SECONDS)
+    return text
+
+def fetch_articles(urls, deadline, pool=None):
+    # Laeb artiklid paralleelselt. Tagastab {url: tekst}, mis jõudsid tähtajaks valmis;
+    # hilinejad jäävad None-iks (nende lõimed lõpetavad ARTICLE_TIMEOUT jooksul ise).
+    futures = {url: (pool or news_pool).submit(scrape_with_trafilatura, url) for url in dict.fromkeys(urls) if url}
+    if futures: wait(futures.values(), timeout=max(deadline - time.monotonic(), 0))
+    return {url: f.result() if f.done() and f.exception() is None else None for url, f in futures.items()}
+
+def call_with_deadline(fn, deadline, pool=None):
+    # Blokeeriv väljakutse (DDG, yfinance) eraldi lõimes, ootame ainult tähtajani
+    return (pool or news_pool).submit(fn).result(timeout=max(deadline - time.monotonic(), 0))
 
 def get_google_rss_fallback(symbol):
+    cache_key = f"google:{symbol}"
+    cached = news_cache.get(cache_key)
+    if cached: return cached
     try:
         clean_ticker = symbol.split("/")[0] 
         url = f"https://news.google.com/rss/search?q={clean_ticker}+crypto+when:1d&hl=en-US&gl=US&ceid=US:en"
-        res = requests.get(url, timeout=5)
+        # Tingimuslik GET: muutumata voo korral 304 ja eelmine vastus
+        res = http.get(url, name="google_rss", timeout=5, conditional=True)
         if res.status_code == 200:
             root = ET.fromstring(res.content)
             items = root.findall('.//item')[:3]
@@ -275,74 +604,150 @@ def get_google_rss_fallback(symbol):
                 title = item.find('title').text
                 pub = item.find('pubDate').text
                 full_report.append(f"--- GOOGLE RSS ---\nTITLE: {title}\nDATE: {pub}\n")
-            return "\n".join(full_report)
+            report = "\n".join(full_report)
+            if report: news_cache.set(cache_key, report)
+            return report
     except: pass
     return "No news found."
 
-def get_yahoo_finance_news(symbol):
+def get_yahoo_finance_news(symbol, pool=None):
+    cache_key = f"yahoo:{symbol}"
+    cached = news_cache.get(cache_key)
+    if cached: return cached
     try:
+        deadline = time.monotonic() + NEWS_SOURCE_TIMEOUT
         y_symbol = format_symbol_for_yahoo(symbol)
-        ticker = yf.Ticker(y_symbol)
-        news = ticker.news
+        metrics.incr("http_requests", service="yahoo_news")
+        news = call_with_deadline(lambda: yf.Ticker(y_symbol).news, deadline, pool)
         report = []
         if news:
+            texts = fetch_articles([n.get('link', '') for n in news[:3]], deadline, pool)
             for n in news[:3]:
                 title = n.get('title', '')
                 link = n.get('link', '')
-                content = scrape_with_trafilatura(link)
+                content = texts.get(link)
                 if not content: content = "Content unavailable."
                 report.append(f"--- YAHOO ---\nTITLE: {title}\nLINK: {link}\nCONTENT: {content[:1000]}\n")
-            return "\n".join(report)
+            report = "\n".join(report)
+            news_cache.set(cache_key, report)
+            return report
     except: pass
     return None
 
-def get_news_hybrid(symbol):
-    global USE_BACKUP_SOURCE
+def get_news_hybrid(symbol, pool=None):
+    # Sama münt tuleb tsüklist tsüklisse tagasi -> raport vahemälust, kui see on värske
+    # pool: lõimekogum DDG/Yahoo/artiklite jaoks (vaikimisi news_pool)
+    cache_key = f"hybrid:{symbol}"
+    cached = news_cache.get(cache_key)
+    if cached:
+        print(f"      📦 Uudised vahemälust ({symbol}).")
+        return cached
+    with metrics.span("news"):
+        report = fetch_news_hybrid(symbol, pool)
+    if report and report != "No news found.": news_cache.set(cache_key, report)
+    return report
+
+def fetch_news_hybrid(symbol, pool=None):
+    global DDG_BACKUP_UNTIL
     
-    # 1. Kui DDG on juba katki, kasuta otse Yahoo/Google
-    if USE_BACKUP_SOURCE:
+    # 1. Kui DDG oli hiljuti katki, kasuta otse Yahoo/Google
+    if time.monotonic() < DDG_BACKUP_UNTIL:
         print(f"      ⚡ (Backup Mode) Kasutan Yahoo/Google...")
-        res = get_yahoo_finance_news(symbol)
+        res = get_yahoo_finance_news(symbol, pool)
         if not res: res = get_google_rss_fallback(symbol)
         return res
 
     # 2. Proovi DuckDuckGo-d
     try:
-        # Lühem paus (3-6s), et mitte "hanguda"
-        sleep_time = random.uniform(3, 6)
-        print(f"      ⏳ DDG: ootan {sleep_time:.1f}s...")
-        time.sleep(sleep_time)
+        # Ühine token bucket (mitte pime paus): ootame ainult nii palju, kui DDG limiit nõuab
+        if not ddg_limiter.acquire(timeout=NEWS_SOURCE_TIMEOUT):
+            print("      ⏳ DDG limiit täis. Kasutan Yahoo/Google...")
+            return get_yahoo_finance_news(symbol, pool) or get_google_rss_fallback(symbol)
+        deadline = time.monotonic() + NEWS_SOURCE_TIMEOUT
 
         clean_ticker = symbol.split("/")[0]
         keywords = f"{clean_ticker} crypto news"
         
-        results = DDGS().news(keywords=keywords, region="wt-wt", safesearch="off", max_results=3)
+        metrics.incr("http_requests", service="ddg")
+        results = call_with_deadline(lambda: DDGS(timeout=ARTICLE_TIMEOUT).news(keywords=keywords, region="wt-wt", safesearch="off", max_results=3), deadline, pool)
         
         if not results: 
-            return get_yahoo_finance_news(symbol) or get_google_rss_fallback(symbol)
+            return get_yahoo_finance_news(symbol, pool) or get_google_rss_fallback(symbol)
 
+        texts = fetch_articles([item.get('url', '') for item in results], deadline, pool)
         full_report = []
         for item in results:
             title = item.get('title', 'No Title')
             link = item.get('url', '')
             date = item.get('date', 'Today')
-            content = scrape_with_trafilatura(link)
+            content = texts.get(link)
             if not content: content = item.get('body', '')
             full_report.append(f"--- ARTICLE ---\nTITLE: {title}\nDATE: {date}\nLINK: {link}\nCONTENT:\n{content[:2000]}\n")
             
         return "\n".join(full_report)
 
+    except FutureTimeout:
+        # Aeglane vastus pole blokeering -> ainult see münt läheb varuallikale
+        print(f"      ⏳ DDG ei vastanud {NEWS_SOURCE_TIMEOUT:.0f}s jooksul. Kasutan Yahoo/Google...")
+        return get_yahoo_finance_news(symbol, pool) or get_google_rss_fallback(symbol)
+
     except Exception as e:
-        print(f"      ⚠️ DDG Viga! Lülitun Backup režiimile (Yahoo/Google).")
-        USE_BACKUP_SOURCE = True # Edaspidi kasuta kohe backupi
-        return get_yahoo_finance_news(symbol) or get_google_rss_fallback(symbol)
+        print(f"      ⚠️ DDG Viga! Lülitun {DDG_BACKUP_SECONDS / 60:.0f} minutiks Backup režiimile (Yahoo/Google).")
+        DDG_BACKUP_UNTIL = time.monotonic() + DDG_BACKUP_SECONDS # Vahepeal kasuta kohe backupi
+        return get_yahoo_finance_news(symbol, pool) or get_google_rss_fallback(symbol)
+
+def news_fingerprint(news_text):
+    # Tühikud ja suurtähed ei muuda sisu -> ei tohi muuta ka võtit
+    normalized = " ".join(str(news_text or "").lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+def ai_cache_stats():
+    stats = ai_cache.stats()
+    stats["saved_calls"] = stats["hits"]
+    return stats
+
+def ai_cache_key(symbol, news_text):
+    return f"{symbol}|{MARKET_MODE}|{news_fingerprint(news_text)}"
+
+def get_cached_verdict(symbol, news_text):
+    cached = ai_cache.get(ai_cache_key(symbol, news_text))
+    if cached is None: return None
+    score, reason = cached
+    print(f"      🤖 AI (vahemälust, uudised muutumata): {symbol} {score}/100 | {reason[:100]}...")
+    return score
+
+def get_market_context():
+    return "BEAR MARKET (Trend is DOWN). Use EXTREME CAUTION." if MARKET_MODE == "BEAR" else "BULL MARKET. Look for MOMENTUM."
 
 def analyze_coin_ai(symbol):
-    news_text = get_news_hybrid(symbol)
-    
-    market_context = "BEAR MARKET (Trend is DOWN). Use EXTREME CAUTION." if MARKET_MODE == "BEAR" else "BULL MARKET. Look for MOMENTUM."
+    # Tagastab (skoor, vahemälust?). Vahemälu tabamus ei kuluta MAX_AI_CALLS limiiti.
+    return score_with_news(symbol, get_news_hybrid(symbol))
 
-    prompt = f"""
+def score_with_news(symbol, news_text):
+    # Nagu analyze_coin_ai, aga juba laetud uudistega (partii varupäringud ei küsi uudiseid uuesti)
+    cached_score = get_cached_verdict(symbol, news_text)
+    if cached_score is not None: return cached_score, True
+
+    prompt = build_coin_prompt(symbol, news_text)
+    full_response, error = None, None
+    try:
+        metrics.incr("http_requests", service="openai")
+        with metrics.span("ai"):
+            res = ai_client.chat.completions.create(**coin_request(prompt))
+        count_ai_tokens(res)
+        full_response = res.choices[0].message.content
+    except Exception as e:
+        error = f"Error: {e}"
+    return finish_coin_ai(symbol, news_text, prompt, full_response, error), False
+
+def count_ai_tokens(res):
+    usage = getattr(res, "usage", None)
+    if usage is not None: metrics.incr("ai_tokens", getattr(usage, "total_tokens", 0) or 0)
+
+def build_coin_prompt(symbol, news_text):
+    market_context = get_market_context()
+
+    return f"""
     You are an Elite Crypto Trader.
     Analyze the following NEWS for {symbol} to decide on an immediate (24h) entry.
     
@@ -361,160 +766,504 @@ def analyze_coin_ai(symbol):
     RESPONSE FORMAT (JSON):
     {{"score": X, "reason": "Detailed reason citing specific facts"}}
     """
-    
+
+def coin_request(prompt):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+    }
+
+def finish_coin_ai(symbol, news_text, prompt, full_response, error=None):
+    # Vastuse parsimine, logi ja vahemälu; vea korral neutraalne 50 (ei lähe vahemällu)
     score = 50
-    reason = "Analysis failed"
+    reason = error or "Analysis failed"
 
-    try:
-        res = ai_client.chat.completions.create(
-            model="gpt-4o-mini", 
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        full_response = res.choices[0].message.content
-        data = json.loads(full_response)
-        score = int(data.get("score", 50))
-        reason = data.get("reason", "No reason provided")
-    except Exception as e:
-        reason = f"Error: {e}"
-        score = 50
+    if error is None:
+        try:
+            data = json.loads(full_response)
+            score = int(data.get("score", 50))
+            reason = data.get("reason", "No reason provided")
+        except Exception as e:
+            reason = f"Error: {e}"
+            score = 50
 
     print(f"      🤖 AI ANALÜÜS: {score}/100 | {reason[:100]}...")
     log_ai_prompt(symbol, prompt, f"SCORE: {score}\nREASON: {reason}")
+    if not reason.startswith("Error:"): ai_cache.set(ai_cache_key(symbol, news_text), [score, reason])
     return score
 
+def analyze_coins_async(symbols, max_calls=None):
+    # Uudised ja vahemälu nagu tavaliselt, puuduvad verdiktid küsitakse AsyncOpenAI-ga paralleelselt.
+    # Tähtaja (AI_DEADLINE_SECONDS) ületanud mündid saavad neutraalse 50.
+    # Tagastab ({sümbol: skoor}, tehtud API kõnede arv); üle max_calls kõnesid ei tehta.
+    # Tähtaeg hõlmab ka uudiseid: need laetakse paralleelselt ja tähtajaks puuduvad saavad 50.
+    deadline = time.monotonic() + AI_DEADLINE_SECONDS
+    scores = {}
+    pending = {}
+    # Mündid oma lõimekogumis (nagu skänneril), nende DDG/artiklid ai_news_pool-is: news_pool-i
+    # järjekorras ootaksid need teiste uudiste taga ja jääksid tähtajast asjata maha
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(symbols), AI_NEWS_WORKERS)), thread_name_prefix="ai-news")
+    try:
+        news_futures = {s: pool.submit(get_news_hybrid, s, ai_news_pool) for s in symbols}
+        wait(news_futures.values(), timeout=max(deadline - time.monotonic(), 0))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True) # hilinejad täidavad vahemälu järgmiseks tsükliks
+    for s in symbols:
+        future = news_futures[s]
+        if not future.done() or future.cancelled() or future.exception() is not None:
+            print(f"      ⏱️ Uudised ei jõudnud AI tähtajaks ({s}) -> neutraalne 50.")
+            scores[s] = 50
+            continue
+        news_text = future.result()
+        cached_score = get_cached_verdict(s, news_text)
+        if cached_score is not None: scores[s] = cached_score
+        elif max_calls is not None and len(pending) >= max_calls:
+            print(f"      ⚠️ AI limiit täis: {s} -> neutraalne 50.")
+            scores[s] = 50
+        else: pending[s] = (news_text, build_coin_prompt(s, news_text))
+
+    try:
+        with metrics.span("ai"):
+            responses, records = ai_runner.run({s: coin_request(prompt) for s, (_, prompt) in pending.items()},
+                                               max(deadline - time.monotonic(), 0))
+    except Exception as e:
+        print(f"      ⚠️ Asünkroonne AI ebaõnnestus: {e}")
+        responses, records = {}, []
+    # Lõppstaatus "deadline" on olulisem kui varasema katse viga (muidu logitakse ajalõpp veana)
+    errors = {r["key"]: r["status"] if r["status"] == "deadline" else r.get("error", r["status"]) for r in records}
+
+    for s, (news_text, prompt) in pending.items():
+        if responses.get(s) is not None:
+            scores[s] = finish_coin_ai(s, news_text, prompt, responses[s])
+        elif errors.get(s) == "deadline":
+            print(f"      ⏱️ AI tähtaeg ({AI_DEADLINE_SECONDS:.0f}s) läbi: {s} -> neutraalne 50.")
+            scores[s] = 50
+        else:
+            scores[s] = finish_coin_ai(s, news_text, prompt, None, f"Error: {errors.get(s, 'no response')}")
+
+    for record in records:
+        log_ai_usage(record)
+        # Loeme ainult tegelikult tehtud päringud (ka kordused); semafori taga tühistatul attempts 0
+        if record["attempts"]: metrics.incr("http_requests", record["attempts"], service="openai")
+        metrics.incr("ai_tokens", record.get("total_tokens") or 0)
+        if record["attempts"] > 1: metrics.incr("http_retries", record["attempts"] - 1, service="openai")
+    if records:
+        summary = usage_summary(records)
+        print(f"      📊 AI: {summary['ok']}/{summary['calls']} õnnestus, {summary['retries']} kordust, "
+              f"{summary['deadline']} tähtaja taga, {summary['total_tokens']} tokenit, keskmine latentsus {summary['avg_latency']}s.")
+    return scores, len(pending)
+
+def parse_batch_verdicts(full_response, symbols):
+    # Valideerib partii vastuse: iga sümbol max 1 kord, skoor täisarv 0-100.
+    # Vigased/puuduvad sümbolid jäävad välja ja lähevad eraldi päringusse.
+    try:
+        data = json.loads(full_response)
+        items = data.get("results", []) if isinstance(data, dict) else []
+    except (TypeError, ValueError):
+        return {}
+    verdicts = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict): continue
+        symbol = item.get("symbol")
+        if symbol not in symbols or symbol in verdicts: continue
+        try: score = int(item.get("score"))
+        except (TypeError, ValueError): continue
+        if not 0 <= score <= 100: continue
+        verdicts[symbol] = (score, str(item.get("reason") or "No reason provided"))
+    return verdicts
+
+def analyze_coins_batch(symbols, max_calls=None):
+    # Uudised kõigile, siis ÜKS päring kõigi vahemälust puuduvate kohta.
+    # Tagastab ({sümbol: skoor}, tehtud API kõnede arv); varupäringud peatuvad max_calls juures.
+    news = {s: get_news_hybrid(s) for s in symbols}
+    scores = {}
+    pending = []
+    for s in symbols:
+        cached_score = get_cached_verdict(s, news[s])
+        if cached_score is None: pending.append(s)
+        else: scores[s] = cached_score
+
+    if len(pending) == 1:
+        scores[pending[0]], _ = score_with_news(pending[0], news[pending[0]])
+        return scores, 1
+    if not pending: return scores, 0
+
+    coin_sections = "\n".join(f"=== COIN: {s} ===\n{str(news[s])[:AI_BATCH_NEWS_CHARS]}\n" for s in pending)
+    prompt = f"""
+    You are an Elite Crypto Trader.
+    Analyze the following NEWS for each coin to decide on an immediate (24h) entry.
+    Compare the coins against each other: the strongest real catalyst gets the highest score.
+    
+    MARKET CONTEXT: {get_market_context()}
+    
+    {coin_sections}
+    
+    === SCORING ===
+    - 0-30: BAD NEWS. Sell.
+    - 31-49: Bearish/Weak.
+    - 50: Neutral / No real news.
+    - 51-79: Good vibes.
+    - 80-100: STRONG BUY.
+    
+    RESPONSE FORMAT (JSON), exactly one entry for every coin above:
+    {{"results": [{{"symbol": "XXX/USD", "score": X, "reason": "Detailed reason citing specific facts"}}]}}
+    """
+
+    full_response = ""
+    try:
+        metrics.incr("http_requests", service="openai")
+        with metrics.span("ai"):
+            res = ai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"}
+            )
+        count_ai_tokens(res)
+        full_response = res.choices[0].message.content
+    except Exception as e:
+        full_response = f"Error: {e}"
+    verdicts = parse_batch_verdicts(full_response, pending)
+    log_ai_prompt(f"PARTII ({len(pending)}): {', '.join(pending)}", prompt, full_response)
+    print(f"      🤖 AI PARTII: {len(verdicts)}/{len(pending)} münti ühe päringuga.")
+
+    api_calls = 1
+    for s in pending:
+        if s in verdicts:
+            score, reason = verdicts[s]
+            print(f"      🤖 AI ANALÜÜS: {s} {score}/100 | {reason[:100]}...")
+            ai_cache.set(ai_cache_key(s, news[s]), [score, reason])
+            scores[s] = score
+        elif max_calls is not None and api_calls >= max_calls:
+            print(f"      ⚠️ AI partii vastuses puudub {s}, limiit täis -> neutraalne 50.")
+            scores[s] = 50
+        else:
+            # Partii vastus selle mündi kohta vigane -> eraldi päring (samade uudistega)
+            print(f"      ⚠️ AI partii vastuses puudub {s}. Küsin eraldi...")
+            scores[s], from_cache = score_with_news(s, news[s])
+            if not from_cache: api_calls += 1
+    return scores, api_calls
+
 # --- 4. HALDUS JA OSTMINE ---
 
 # !!! SEE FUNKTSIOON OLI PUUDU, NÜÜD TAGASI !!!
-def close_position(symbol, reason="UNKNOWN"):
+def close_position(symbol, reason="UNKNOWN", pos=None, price=None):
+    # pos = get_all_positions() kirje, kui see on juba käes (säästab ühe API kõne)
+    # price = hinnavoo viimane hind (värskem kui pos.current_price)
     try:
-        pos = trading_client.get_open_position(symbol)
+        if pos is None:
+            metrics.incr("http_requests", service="alpaca")
+            pos = trading_client.get_open_position(symbol)
         qty = float(pos.qty)
         entry = float(pos.avg_entry_price)
-        curr = float(pos.current_price)
+        curr = float(pos.current_price if price is None else price)
         
+        metrics.incr("http_requests", service="alpaca")
         trading_client.close_position(symbol)
         
         log_trade_to_csv(symbol, entry, curr, qty, reason)
         activate_cooldown(symbol)
+        save_brain() # Tehingu olek kohe kettale, mitte alles tsükli lõpus
         print(f"      ✅ TEHTUD! {symbol} müüdud. (Põhjus: {reason})")
     except Exception as e: 
         print(f"      ❌ Viga sulgemisel: {e}")
+    finally:
+        # Müük täitus või positsioon on juba kadunud (nt suleti käsitsi) -> järgmine kontroll küsib uuesti
+        market_data.invalidate_positions()
 
-def manage_existing_positions():
-    print("1. PORTFELL: Risk-Free & Profit Lock...")
-    try: positions = trading_client.get_all_positions()
-    except: return
+# Stop-monitor, hinnavoog ja tsükkel ei tohi sama positsiooni korraga sulgeda
+position_lock = threading.Lock()
+held_positions = {} # viimane get_all_positions() vastus: sümbol -> positsioon (hinnavoo jaoks)
+price_feed = None
 
-    if not positions:
-        print("   -> Portfell on tühi.")
-        return
+def manage_existing_positions(verbose=True, live_prices=False):
+    # live_prices=True (stop-monitor): positsioonid ühisest seisust, hinnad ühe latest_prices päringuga.
+    # Muidu (tsükkel) hinnad tsükli snapshotist või tsükli alguse positsioonide vastusest.
+    if verbose: print("1. PORTFELL: Risk-Free & Profit Lock...")
+    with position_lock:
+        # Ühine seis: uus get_all_positions ainult tsükli alguses ja pärast täitumist
+        try: positions = market_data.positions()
+        except: return
+        # Äsja suletud (cooldown, brain kirje kustutatud), aga broker näitab veel -> mitte tagasi jälgimisse
+        positions = [p for p in positions if is_cooled_down(p.symbol) or get_position_data(p.symbol)]
 
-    for p in positions:
-        symbol = p.symbol
-        # time.sleep(0.5) # Eemaldame liigse ootamise
-        
-        entry_price = float(p.avg_entry_price)
+        held_positions.clear()
+        held_positions.update({p.symbol: p for p in positions})
+
+        if not positions:
+            if verbose: print("   -> Portfell on tühi.")
+
+        if live_prices:
+            try: prices = market_data.latest_prices([p.symbol for p in positions])
+            except Exception as e:
+                print(f"   ⚠️ Stop-monitor: hinnad puuduvad ({e}).")
+                prices = {}
+            # Vahemälus positsiooni hind on vana -> ilma värske hinnata stoppi ei otsusta
+            positions = [p for p in positions if p.symbol in prices]
+        else: prices = {p.symbol: market_data.price(p.symbol) for p in positions}
+
+        for p in positions:
+            check_position_stop(p, verbose, prices[p.symbol])
+
+    # Väljaspool lukku: tellimuse muutmine ootab voo lõime, mis võib ise lukku oodata
+    if price_feed is not None: price_feed.set_symbols(list(held_positions))
+
+def check_position_stop(p, verbose=True, tick_price=None):
+    symbol = p.symbol
+    
+    entry_price = float(p.avg_entry_price)
+    if tick_price is None:
         current_price = float(p.current_price)
         profit_pct = float(p.unrealized_plpc) * 100
+    else:
+        current_price = tick_price
+        profit_pct = (tick_price - entry_price) / entry_price * 100
+    
+    pos_data = get_position_data(symbol)
+    hw = pos_data.get("highest_price", entry_price)
+    atr = pos_data.get("atr_at_entry", current_price * 0.05)
+    is_risk_free = pos_data.get("is_risk_free", False)
+    
+    if current_price > hw:
+        update_high_watermark(symbol, current_price)
+        hw = current_price
+
+    final_stop, stop_type, risk_free = compute_stop(MARKET_MODE, entry_price, profit_pct, hw, atr, is_risk_free, STRATEGY)
+    if risk_free and not is_risk_free: set_risk_free_status(symbol)
         
-        pos_data = get_position_data(symbol)
-        hw = pos_data.get("highest_price", entry_price)
-        atr = pos_data.get("atr_at_entry", current_price * 0.05)
-        is_risk_free = pos_data.get("is_risk_free", False)
-        
-        if current_price > hw:
-            update_high_watermark(symbol, current_price)
-            hw = current_price
-        
-        if MARKET_MODE == "BEAR":
-            trailing_stop = hw - (1.5 * atr)
-            breakeven_trigger = 1.0 
-            hard_stop = entry_price * 0.94
-        else:
-            trailing_stop = hw - (2.5 * atr)
-            breakeven_trigger = 2.5
-            hard_stop = entry_price * 0.92
-
-        breakeven_price = entry_price * 1.005
-        if profit_pct >= breakeven_trigger or is_risk_free:
-            final_stop = max(breakeven_price, hard_stop)
-            if trailing_stop > final_stop: final_stop = trailing_stop
-            stop_type = "PROFIT 🛡️"
-            if not is_risk_free: set_risk_free_status(symbol)
-        else:
-            final_stop = hard_stop
-            stop_type = "HARD 🛑"
-            
-        print(f"   -> {symbol}: {profit_pct:.2f}% (Stop: ${final_stop:.2f} | {stop_type})")
+    if verbose: print(f"   -> {symbol}: {profit_pct:.2f}% (Stop: ${final_stop:.2f} | {stop_type})")
 
-        if current_price <= final_stop:
-            print(f"      !!! STOP HIT ({stop_type})! Müün {symbol}...")
-            close_position(symbol, stop_type)
+    if current_price <= final_stop:
+        if not verbose: print(f"   ⚡ STOP-MONITOR: {symbol} ${current_price:.4f} <= ${final_stop:.4f}")
+        print(f"      !!! STOP HIT ({stop_type})! Müün {symbol}...")
+        close_position(symbol, stop_type, p, tick_price)
+        held_positions.pop(symbol, None)
+
+def on_price_tick(symbol, price, ts=None):
+    # Hinnavoo lõimes: tipp ja stopp iga tehingu peale, ilma REST päringuta
+    with position_lock:
+        p = held_positions.get(symbol)
+        if p is None: return
+        try: check_position_stop(p, verbose=False, tick_price=price)
+        except Exception as e: print(f"   ❌ Hinnavoo viga ({symbol}): {e}")
+
+def start_price_feed():
+    global price_feed
+    if not PRICE_FEED: return None
+    if PRICE_FEED == "alpaca": feed = AlpacaCryptoFeed(api_key, secret_key)
+    elif PRICE_FEED.startswith("replay:"): feed = ReplayFeed(PRICE_FEED[len("replay:"):], speed=PRICE_FEED_REPLAY_SPEED)
+    else:
+        print(f"⚠️ Tundmatu PRICE_FEED: {PRICE_FEED}. Hinnavoog on väljas.")
+        return None
+    price_feed = feed
+    manage_existing_positions(verbose=False) # hoitavad sümbolid tellitakse enne esimest tiksu
+    feed.start(TickRecorder(PRICE_FEED_RECORD, on_price_tick) if PRICE_FEED_RECORD else on_price_tick)
+    print(f"📡 HINNAVOOG: {PRICE_FEED} ({len(held_positions)} positsiooni).")
+    return feed
+
+def stop_price_feed():
+    global price_feed
+    if price_feed is None: return
+    feed, price_feed = price_feed, None
+    feed.stop()
+    if isinstance(feed.on_tick, TickRecorder): feed.on_tick.close()
+    print(f"📡 HINNAVOOG peatatud ({feed.ticks} tiksu).")
+
+def run_stop_monitor(stop_event, interval):
+    # Tiksu kohta üks hinnapäring; positsioonid ühisest seisust, tipud (watermark) mälus olevast olekust
+    while not stop_event.wait(interval):
+        try: manage_existing_positions(verbose=False, live_prices=True)
+        except Exception as e: print(f"   ❌ Stop-monitori viga: {e}")
+
+def start_stop_monitor():
+    if STOP_MONITOR_SECONDS <= 0: return None
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run_stop_monitor, args=(stop_event, STOP_MONITOR_SECONDS), name="stop-monitor", daemon=True)
+    thread.start()
+    print(f"⚡ STOP-MONITOR: kontrollin stoppe iga {STOP_MONITOR_SECONDS:g}s järel.")
+    return stop_event, thread
 
 def trade(symbol, score, atr):
-    try: equity = float(trading_client.get_account().equity)
+    from alpaca.trading.requests import MarketOrderRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
+    try: equity = float(market_data.account().equity) # tsükli alguse konto, uut päringut pole
     except: return
-    if equity < 50: return
-    size_pct = 0.04 if MARKET_MODE == "BEAR" else 0.07
-    amount = max(round(equity * size_pct, 2), 10)
+    amount = order_notional(MARKET_MODE, equity, STRATEGY)
+    if amount is None: return
     
     print(f"5. TEGIJA ({MARKET_MODE}): Ostame {symbol} ${amount:.2f} eest (Skoor {score}).")
     try:
         req = MarketOrderRequest(symbol=symbol, notional=amount, side=OrderSide.BUY, time_in_force=TimeInForce.GTC)
-        trading_client.submit_order(req)
-        update_position_metadata(symbol, atr)
-        update_high_watermark(symbol, 0.000001)
+        metrics.incr("http_requests", service="alpaca")
+        # Stop-monitor ja hinnavoog ei tohi uut positsiooni näha enne, kui sissetuleku ATR on kirjas
+        with position_lock:
+            trading_client.submit_order(req)
+            market_data.invalidate_positions() # uus positsioon -> stop-monitor küsib seisu uuesti
+            update_position_metadata(symbol, atr)
+            update_high_watermark(symbol, 0.000001)
+        save_brain()
         print("   -> TEHTUD! Ostetud.")
     except Exception as e:
         print(f"   -> Viga ostul: {e}")
 
+def scan_candidates(shortlist, bars=None):
+    # Annab (kandidaat, TA tulemus) paarid ALATI edetabeli järjekorras.
+    # Paralleelses režiimis laeme kõik korraga, aga otsus jääb deterministlikuks:
+    # võidab kõrgeima kohaga sobiv münt, mitte see, kes enne valmis sai.
+    # bars = get_yahoo_data_batch() tulemus; kui see on antud, ei laeta sümbolhaaval.
+    def analyze(c):
+        if bars is None: return get_technical_analysis(c['symbol'], c['vol_usd'])
+        df = bars.get(c['symbol'])
+        if df is None: return 0, 0, 0
+        return get_technical_analysis(c['symbol'], c['vol_usd'], df=df)
+
+    if not CONCURRENT_SCANNER or len(shortlist) < 2:
+        for c in shortlist:
+            yield c, analyze(c)
+        return
+
+    print(f"   ⚡ Paralleelne skanner: {len(shortlist)} münti, {SCANNER_WORKERS} lõime.")
+    pool = ThreadPoolExecutor(max_workers=SCANNER_WORKERS, thread_name_prefix="scanner")
+    try:
+        futures = [pool.submit(analyze, c) for c in shortlist]
+        for c, fut in zip(shortlist, futures):
+            try: result = fut.result()
+            except Exception: result = (0, 0, 0)
+            yield c, result
+    finally:
+        # Ost või AI limiit katkestas tsükli -> ülejäänud tööd pole vaja
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def decide_batched(scan, analyze_many):
+    # AI_BATCH / AI_ASYNC: kogume kuni MAX_AI_CALLS tehniliselt sobivat münti, AI hinnang kõigile korraga,
+    # siis sama otsus mis tavaliselt: kõrgeima kohaga münt, mille lõpphinne > 75.
+    qualified = []
+    for c, (tech_score, atr, rsi) in scan:
+        if tech_score < STRATEGY.min_tech_score: continue
+        print(f"   🔥 LEID: {c['symbol']} (Tech: {tech_score}).")
+        qualified.append((c['symbol'], tech_score, atr))
+        if len(qualified) >= MAX_AI_CALLS: break
+    if not qualified: return
+
+    print(f"   🤖 Analüüsin {len(qualified)} münti korraga (Hybrid)...")
+    ai_scores, api_calls = analyze_many([s for s, _, _ in qualified], MAX_AI_CALLS)
+    print(f"   -> AI kõnesid: {api_calls}/{MAX_AI_CALLS}.")
+
+    for s, tech_score, atr in qualified:
+        score = final_score(ai_scores[s], tech_score, STRATEGY)
+        print(f"      🏁 {s} LÕPPHINNE: {score:.1f}")
+        if score > STRATEGY.buy_score:
+            print(f"   🚀 OSTMINE: {s}")
+            trade(s, score, atr)
+            break # Üks tehing tsükli kohta on turvaline
+
+def rank_candidates(snapshots):
+    # Päeva liikumise järgi (suurim |muutus| ees)
+    candidates = []
+    for s, snap in snapshots.items():
+        if not snap.daily_bar or snap.daily_bar.open == 0: continue
+        vol_usd = snap.daily_bar.volume * snap.daily_bar.close
+        chg = ((snap.daily_bar.close - snap.daily_bar.open) / snap.daily_bar.open) * 100
+        candidates.append({"symbol": s, "change": chg, "abs_change": abs(chg), "vol_usd": vol_usd})
+    candidates.sort(key=lambda x: x['abs_change'], reverse=True)
+    return candidates
+
+def build_shortlist(candidates, my_pos):
+    shortlist = []
+    for c in (candidates if VECTOR_SCAN else candidates[:30]):
+        s = c['symbol']
+        if s in my_pos: continue
+        if not is_cooled_down(s): continue
+        if c['vol_usd'] < 10000: continue
+        shortlist.append(c)
+    return shortlist
+
 def run_cycle():
+    metrics.begin_cycle()
+    market_data.begin_cycle()
+    try:
+        if cycle_profiler is None: execute_cycle()
+        else:
+            with cycle_profiler.profile(): execute_cycle()
+    finally:
+        market_data.end_cycle()
+        save_brain() # Kõik tsükli muudatused ühe atomaarse kirjutusena
+        with metrics.span("cache_io"): save_caches()
+        finish_cycle_metrics()
+
+def finish_cycle_metrics():
+    # Tsükli kokkuvõte logisse ja cycle_metrics.jsonl-i, kumulatiivsed väärtused metrics.prom-i
+    try:
+        for name, cache in (("news", news_cache), ("article", article_cache), ("ai", ai_cache), ("assets", asset_cache)):
+            metrics.sync_counter("cache_lookups", cache.hits, cache=name, result="hit")
+            metrics.sync_counter("cache_lookups", cache.misses, cache=name, result="miss")
+        extra = {"market_mode": MARKET_MODE}
+        if cycle_profiler is not None and cycle_profiler.last_path: extra["profile"] = cycle_profiler.last_path
+        record = metrics.end_cycle(**extra)
+        print(format_summary(record))
+        cycle_metrics_writer.write(json.dumps(record, ensure_ascii=False) + "\n")
+        metrics.write_textfile(METRICS_TEXTFILE)
+    except Exception as e:
+        print(f"   ⚠️ Mõõdikute salvestamine ebaõnnestus: {e}")
+
+def execute_cycle():
     print(f"========== TSÜKKEL START: {datetime.now()} ==========") 
     
-    # Prindi konto seis alguses
+    # Prindi konto seis alguses (market_data: sama vastus läheb hiljem ostu suuruse arvutusse)
     try:
-        acct = trading_client.get_account()
+        with metrics.span("account"):
+            acct = market_data.account()
         print(f"💰 KONTO: Equity ${float(acct.equity):,.2f} | Cash ${float(acct.cash):,.2f}")
     except: pass
 
-    determine_market_mode()
-    manage_existing_positions()
+    with metrics.span("market_mode"): determine_market_mode()
+
+    # Üks snapshotide päring (universum + teadaolevad positsioonid) enne stoppe: kõik otsused samadel hindadel
+    snapshots = None
+    try:
+        with metrics.span("assets"):
+            tradable = market_data.tradable_symbols()
+        with metrics.span("snapshots"):
+            snapshots = market_data.snapshots(extra_symbols=list(held_positions))
+    except Exception as e:
+        print(f"   ⚠️ Turuandmed puuduvad: {e}")
+
+    with metrics.span("positions"): manage_existing_positions()
     
     if MARKET_MODE == "BEAR":
         print("   ⚠️ TURG ON LANGUSES. Otsin ainult sügavaid põhju (RSI < 30).")
 
     print(f"2. SKANNER: Laen KÕIK turu varad...")
-    try:
-        assets = trading_client.get_all_assets(GetAssetsRequest(asset_class=AssetClass.CRYPTO, status=AssetStatus.ACTIVE))
-        tradable = [a.symbol for a in assets if a.tradable and a.symbol.endswith("/USD") and a.symbol not in ["USDT/USD", "USDC/USD", "DAI/USD", "WBTC/USD"]]
-        snapshots = data_client.get_crypto_snapshot(CryptoSnapshotRequest(symbol_or_symbols=tradable))
-    except: return
+    if snapshots is None: return
 
-    candidates = []
-    for s, snap in snapshots.items():
-        if not snap.daily_bar or snap.daily_bar.open == 0: continue
-        vol_usd = snap.daily_bar.volume * snap.daily_bar.close
-        chg = ((snap.daily_bar.close - snap.daily_bar.open) / snap.daily_bar.open) * 100
-        candidates.append({"symbol": s, "change": chg, "abs_change": abs(chg), "vol_usd": vol_usd})
-    candidates.sort(key=lambda x: x['abs_change'], reverse=True)
+    candidates = rank_candidates({s: snapshots[s] for s in tradable if s in snapshots})
     
-    my_pos = [p.symbol for p in trading_client.get_all_positions()]
+    try: my_pos = [p.symbol for p in market_data.positions()]
+    except: return
     ai_calls_made = 0
     
     print(f"   -> Leidsin {len(candidates)} münti.")
 
-    for i, c in enumerate(candidates[:30]):
+    shortlist = build_shortlist(candidates, my_pos)
+
+    if VECTOR_SCAN:
+        scan = score_universe(shortlist)
+    else:
+        bars = None
+        if YAHOO_BATCH_SIZE > 0 and shortlist:
+            with metrics.span("bars"):
+                bars = get_yahoo_data_batch([c['symbol'] for c in shortlist], period="1mo", interval="1h")
+            print(f"   -> Yahoo: {len(bars)}/{len(shortlist)} sümbolile andmed ({-(-len(shortlist) // YAHOO_BATCH_SIZE)} päringut).")
+        scan = scan_candidates(shortlist, bars)
+
+    if AI_BATCH or AI_ASYNC:
+        decide_batched(scan, analyze_coins_batch if AI_BATCH else analyze_coins_async)
+        scan = []
+
+    for c, (tech_score, atr, rsi) in scan:
         s = c['symbol']
-        alpaca_vol = c['vol_usd']
         
-        if s in my_pos: continue
-        if not is_cooled_down(s): continue
-        if alpaca_vol < 10000: continue
-             
-        tech_score, atr, rsi = get_technical_analysis(s, alpaca_vol)
-        
-        if tech_score < 55:
+        if tech_score < STRATEGY.min_tech_score:
              # print(f"      ❌ Nõrk tehnika ({tech_score}). SKIP.") # Liiga palju müra
              continue
              
@@ -523,24 +1272,73 @@ def run_cycle():
             break
             
         print(f"   🔥 LEID: {s} (Tech: {tech_score}). Analüüsin (Hybrid)...")
-        ai_score = analyze_coin_ai(s)
-        ai_calls_made += 1
+        ai_score, from_cache = analyze_coin_ai(s)
+        if not from_cache: ai_calls_made += 1
         
-        final_score = (ai_score * 0.4) + (tech_score * 0.6)
-        print(f"      🏁 {s} LÕPPHINNE: {final_score:.1f}")
+        score = final_score(ai_score, tech_score, STRATEGY)
+        print(f"      🏁 {s} LÕPPHINNE: {score:.1f}")
 
-        if final_score > 75:
+        if score > STRATEGY.buy_score:
             print(f"   🚀 OSTMINE: {s}")
-            trade(s, final_score, atr)
+            trade(s, score, atr)
             break # Üks tehing tsükli kohta on turvaline
 
+    stats = ai_cache_stats()
+    if stats["hits"] or stats["misses"]:
+        print(f"   🧠 AI vahemälu: {stats['hits']} tabamust, {stats['misses']} möödalasku, säästetud {stats['saved_calls']} API kõnet (kirjeid {stats['size']}).")
     print(f"========== TSÜKKEL LÕPP ==========")
     print("="*40 + "\n")
 
 # --- KÄIVITUS ---
-if __name__ == "__main__":
+def run_cycle_safely():
     try:
         run_cycle()
     except Exception as e:
         print(f"CRITICAL RUN ERROR: {e}")
-        print(traceback.format_exc())
\ No newline at end of file
+        print(traceback.format_exc())
+
+def run_daemon():
+    # Kliendid, vahemälud ja indikaatorite olek jäävad tsüklite vahel mällu
+    scheduler = CycleScheduler(CYCLE_INTERVAL_SECONDS, overrun=DAEMON_OVERRUN, log=print)
+
+    def handle_stop(signum, frame):
+        # Esimene signaal: lõpeta pärast käimasolevat tsüklit. Teine: katkesta kohe (atexit salvestab).
+        if scheduler.stopping: raise KeyboardInterrupt
+        scheduler.stop(signal.Signals(signum).name)
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    print(f"🕒 DAEMON: tsükkel iga {CYCLE_INTERVAL_SECONDS:.0f}s järel (overrun: {DAEMON_OVERRUN}).")
+    metrics_server = None
+    if METRICS_PORT > 0:
+        try:
+            metrics_server = start_http_server(metrics, METRICS_PORT, METRICS_HOST)
+            print(f"📈 MÕÕDIKUD: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"⚠️ Mõõdikute serverit ei saanud käivitada ({METRICS_PORT}): {e}")
+    # Turu režiim enne stop-monitori ja hinnavoogu: esimesed stopid BULL/BEAR reeglitega, mitte vaikimisi NEUTRAL
+    try: determine_market_mode()
+    except Exception as e: print(f"⚠️ Turu režiimi ei saanud määrata: {e}")
+    monitor = start_stop_monitor()
+    try:
+        start_price_feed()
+        scheduler.run(run_cycle_safely)
+    finally:
+        if monitor is not None:
+            monitor[0].set()
+            monitor[1].join(timeout=30)
+        stop_price_feed()
+        if metrics_server is not None: metrics_server.shutdown()
+        save_brain()
+        save_caches()
+
+if __name__ == "__main__":
+    instance_lock = InstanceLock(LOCK_FILE)
+    if not instance_lock.acquire():
+        print("⚠️ Bot juba töötab (bot.lock on lukus). Lõpetan.")
+        sys.exit(1)
+    try:
+        if "--daemon" in sys.argv[1:]: run_daemon()
+        else: run_cycle_safely()
+    finally:
+        instance_lock.release()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import time
+import threading
+
+# --- TSÜKLI TURUANDMED (iga broker-päring üks kord tsükli kohta) ---
+# Konto ja snapshotid küsitakse tsükli jooksul ainult korra ja neid jagavad kõik otsused
+# (stopid, kandidaadid, ost): üks ühtne hinnaseis. See meeldejätmine kehtib tsüklit jooksutavas lõimes.
+# Positsioonid on ühine seis kõigile lõimedele (tsükkel, stop-monitor, hinnavoog): uus päring
+# tsükli alguses, pärast täitumist (invalidate_positions) ja soovi korral positions_ttl järel.
+# Stop-monitor võtab hinnad latest_prices()-ist (andme-API), mitte uuest get_all_positions-ist.
+# Varade universum muutub harva -> TTLCache (pikk TTL, valikuliselt failis).
+# Snapshotid: universum + teadaolevad hoitavad sümbolid ühes CryptoSnapshotRequest-is, tükeldatud
+# `chunk_size` sümboli kaupa (URL-i pikkus).
+
+EXCLUDED_SYMBOLS = ("USDT/USD", "USDC/USD", "DAI/USD", "WBTC/USD")
+UNIVERSE_KEY = "crypto_usd"
+
+
+class MarketData:
+    def __init__(self, trading_client, data_client, asset_cache, chunk_size=200, metrics=None,
+                 positions_ttl=0, clock=time.monotonic):
+        self.trading_client = trading_client
+        self.data_client = data_client
+        self.asset_cache = asset_cache
+        self.chunk_size = chunk_size
+        self.metrics = metrics
+        self.positions_ttl = positions_ttl  # 0 = ainult tsükli alguses ja pärast täitumist
+        self.clock = clock
+        self._cycle = None   # võti -> väärtus, ainult tsükli ajal
+        self._thread = None  # tsüklit jooksutav lõim
+        self._positions = None  # (aeg, vastus), ühine kõigile lõimedele
+        self._positions_lock = threading.Lock()
+
+    def begin_cycle(self):
+        self._cycle, self._thread = {}, threading.get_ident()
+        self.invalidate_positions()  # iga tsükkel algab brokeri värske seisuga
+
+    def end_cycle(self):
+        self._cycle, self._thread = None, None
+
+    def account(self):
+        return self._memo("account", self.trading_client.get_account)
+
+    def positions(self, fresh=False):
+        # Luku all: samaaegsed lugejad ootavad ühe päringu ära, mitte ei tee igaüks oma
+        with self._positions_lock:
+            expired = self._positions is not None and self.positions_ttl > 0 and self.clock() - self._positions[0] > self.positions_ttl
+            if fresh or expired or self._positions is None:
+                self._count()
+                self._positions = (self.clock(), self.trading_client.get_all_positions())
+            return self._positions[1]
+
+    def invalidate_positions(self):
+        # Ost/müük täitus (või sulgemine ebaõnnestus): järgmine positions() küsib uuesti
+        with self._positions_lock: self._positions = None
+
+    def latest_prices(self, symbols):
+        # {sümbol: viimane tehinguhind} ühe päringuga; stop-monitor kasutab seda vahemälus positsioonidega
+        if not symbols: return {}
+        from alpaca.data.requests import CryptoLatestTradeRequest
+        self._count()
+        trades = self.data_client.get_crypto_latest_trade(CryptoLatestTradeRequest(symbol_or_symbols=list(symbols)))
+        return {s: float(t.price) for s, t in trades.items() if getattr(t, "price", None)}
+
+    def tradable_symbols(self):
+        symbols = self.asset_cache.get(UNIVERSE_KEY)
+        if symbols is None:
+            from alpaca.trading.requests import GetAssetsRequest
+            from alpaca.trading.enums import AssetClass, AssetStatus
+            self._count()
+            assets = self.trading_client.get_all_assets(GetAssetsRequest(asset_class=AssetClass.CRYPTO, status=AssetStatus.ACTIVE))
+            symbols = [a.symbol for a in assets if a.tradable and a.symbol.endswith("/USD") and a.symbol not in EXCLUDED_SYMBOLS]
+            self.asset_cache.set(UNIVERSE_KEY, symbols)
+        return symbols
+
+    def snapshots(self, extra_symbols=()):
+        # {sümbol: snapshot} kogu universumi + extra_symbols (hoitavad positsioonid) kohta
+        return self._memo("snapshots", lambda: self._fetch_snapshots(extra_symbols), count=False)
+
+    def price(self, symbol):
+        # Viimane tehinguhind selle tsükli snapshotist; None, kui snapshotid pole (veel) laetud
+        snapshots = self._cycle.get("snapshots") if self._in_cycle() else None
+        trade = getattr((snapshots or {}).get(symbol), "latest_trade", None)
+        price = getattr(trade, "price", None)
+        return float(price) if price else None
+
+    def _fetch_snapshots(self, extra_symbols):
+        from alpaca.data.requests import CryptoSnapshotRequest
+        symbols = list(self.tradable_symbols())
+        known = set(symbols)
+        symbols += [s for s in dict.fromkeys(extra_symbols) if s not in known]
+        snapshots = {}
+        for i in range(0, len(symbols), self.chunk_size):
+            self._count()
+            snapshots.update(self.data_client.get_crypto_snapshot(CryptoSnapshotRequest(symbol_or_symbols=symbols[i:i + self.chunk_size])))
+        return snapshots
+
+    def _memo(self, key, load, count=True):
+        if not self._in_cycle():
+            if count: self._count()
+            return load()
+        if key not in self._cycle:
+            if count: self._count()
+            self._cycle[key] = load()
+        return self._cycle[key]
+
+    def _in_cycle(self):
+        return self._cycle is not None and self._thread == threading.get_ident()
+
+    def _count(self):
+        if self.metrics is not None: self.metrics.incr("http_requests", service="alpaca")
@@ -0,0 +1,207 @@
+import os
+import time
+import glob
+import threading
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- MÕÕDIKUD: ETAPPIDE AJAD, LOENDURID, PROFIILID ---
+# span("etapp") mõõdab seinakella aega (summa + kutsete arv), incr() loeb sündmusi
+# (HTTP päringud, vahemälu tabamused, baidid). Kõik on kumulatiivne protsessi eluaja jooksul
+# (Prometheus), tsükli kokkuvõte on begin_cycle() ja end_cycle() vaheline vahe.
+# Lõimedes (skänner, uudised) jooksvad etapid liidetakse: nende summa võib ületada tsükli kestuse.
+
+PREFIX = "vibe"
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels: return ""
+    escape = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def series_name(name, labels):
+    # ("http_requests", (("service", "yahoo"),)) -> 'http_requests{service="yahoo"}'
+    return name + _format_labels(labels)
+
+
+class Metrics:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.counters = {}       # (nimi, sildid) -> kumulatiivne väärtus
+        self.gauges = {}         # (nimi, sildid) -> viimane väärtus
+        self.stage_seconds = {}  # etapp -> kumulatiivne aeg
+        self.stage_calls = {}
+        self.cycles = 0
+        self._cycle_start = None
+        self._baseline = None
+
+    def incr(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock: self.counters[key] = self.counters.get(key, 0) + value
+
+    def sync_counter(self, name, total, **labels):
+        # Väliselt loetud kumulatiivne väärtus (nt TTLCache.hits)
+        with self.lock: self.counters[(name, _label_key(labels))] = total
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock: self.gauges[(name, _label_key(labels))] = value
+
+    def record_span(self, stage, seconds):
+        with self.lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+
+    @contextmanager
+    def span(self, stage):
+        started = self.clock()
+        try: yield
+        finally: self.record_span(stage, self.clock() - started)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters), dict(self.stage_seconds), dict(self.stage_calls)
+
+    def begin_cycle(self):
+        self._baseline = self.snapshot()
+        self._cycle_start = self.clock()
+
+    def end_cycle(self, **extra):
+        # Tsükli kokkuvõte: ainult selle tsükli jooksul lisandunud ajad ja loendurid
+        duration = self.clock() - (self._cycle_start if self._cycle_start is not None else self.clock())
+        counters0, seconds0, calls0 = self._baseline or ({}, {}, {})
+        counters, seconds, calls = self.snapshot()
+        with self.lock: self.cycles += 1
+        self.set_gauge("cycle_duration_seconds", duration)
+        self.set_gauge("last_cycle_timestamp_seconds", time.time())
+
+        stages = {}
+        for stage in seconds:
+            spent = seconds[stage] - seconds0.get(stage, 0.0)
+            count = calls[stage] - calls0.get(stage, 0)
+            if count: stages[stage] = {"seconds": round(spent, 3), "calls": count}
+        deltas = {}
+        for key, value in counters.items():
+            delta = value - counters0.get(key, 0)
+            if delta: deltas[series_name(*key)] = round(delta, 3) if isinstance(delta, float) else delta
+
+        record = {"ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "cycle": self.cycles,
+                  "duration": round(duration, 3), "stages": stages, "counters": deltas}
+        record.update(extra)
+        self._cycle_start, self._baseline = None, None
+        return record
+
+    def render(self):
+        # Prometheus tekstiformaat (node_exporter textfile collector või /metrics)
+        counters, seconds, calls = self.snapshot()
+        with self.lock:
+            gauges = dict(self.gauges)
+            cycles = self.cycles
+        lines = [f"# TYPE {PREFIX}_cycles_total counter", f"{PREFIX}_cycles_total {cycles}",
+                 f"# TYPE {PREFIX}_stage_seconds_total counter"]
+        lines += [f'{PREFIX}_stage_seconds_total{{stage="{s}"}} {seconds[s]:.6f}' for s in sorted(seconds)]
+        lines.append(f"# TYPE {PREFIX}_stage_calls_total counter")
+        lines += [f'{PREFIX}_stage_calls_total{{stage="{s}"}} {calls[s]}' for s in sorted(calls)]
+        for kind, series, suffix in (("counter", counters, "_total"), ("gauge", gauges, "")):
+            for name in sorted({n for n, _ in series}):
+                lines.append(f"# TYPE {PREFIX}_{name}{suffix} {kind}")
+                for (n, labels), value in sorted(series.items()):
+                    if n == name: lines.append(f"{PREFIX}_{name}{suffix}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        # Atomaarne: scraper ei näe kunagi poolikut faili
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f: f.write(self.render())
+            os.replace(tmp, path)
+        except Exception:
+            try: os.remove(tmp)
+            except OSError: pass
+            raise
+
+
+def format_summary(record, top=8):
+    # Üks logirida: kõige kallimad etapid + loendurid
+    stages = sorted(record["stages"].items(), key=lambda kv: kv[1]["seconds"], reverse=True)[:top]
+    parts = [f"{name} {s['seconds']:.1f}s" + (f" x{s['calls']}" if s["calls"] > 1 else "") for name, s in stages]
+    counters = ", ".join(f"{k}={v}" for k, v in sorted(record["counters"].items()))
+    return f"⏱️ TSÜKKEL {record['duration']:.1f}s: " + " | ".join(parts) + (f"\n   📈 {counters}" if counters else "")
+
+
+def start_http_server(metrics, port, host="127.0.0.1"):
+    # GET /metrics taustalõimes; tagastab serveri (shutdown() peatab)
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class CycleProfiler:
+    # kind="cprofile" -> .prof (snakeviz, pstats), kind="pyinstrument" -> .html (kui pakett on olemas).
+    # Mõlemad näevad ainult tsüklit jooksutavat lõime, mitte skänneri/uudiste tööprotsesse.
+    def __init__(self, kind, directory, keep=20, log=print):
+        if kind not in ("cprofile", "pyinstrument"): raise ValueError(f"Tundmatu profiilija: {kind}")
+        if kind == "pyinstrument":
+            try: import pyinstrument # noqa: F401
+            except ImportError:
+                log("⚠️ pyinstrument puudub (pip install pyinstrument). Kasutan cProfile-i.")
+                kind = "cprofile"
+        self.kind = kind
+        self.directory = directory
+        self.keep = keep
+        self.last_path = None
+
+    @contextmanager
+    def profile(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if self.kind == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            try: yield
+            finally:
+                profiler.stop()
+                self.last_path = os.path.join(self.directory, f"cycle_{stamp}.html")
+                with open(self.last_path, "w") as f: f.write(profiler.output_html())
+                self._prune("*.html")
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try: yield
+            finally:
+                profiler.disable()
+                self.last_path = os.path.join(self.directory, f"cycle_{stamp}.prof")
+                profiler.dump_stats(self.last_path)
+                self._prune("*.prof")
+
+    def _prune(self, pattern):
+        files = sorted(glob.glob(os.path.join(self.directory, f"cycle_{pattern}")))
+        for path in files[:-self.keep] if self.keep > 0 else []:
+            try: os.remove(path)
+            except OSError: pass
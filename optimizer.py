@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import backtest
+from strategy import StrategyConfig
+
+# --- PARAMEETRITE OTSING + WALK-FORWARD (täiesti offline) ---
+# Andmed ja indikaatorid arvutatakse ÜKS kord (backtest.prepare), suured massiivid lähevad
+# jagatud mällu, tööprotsessid loevad neid kopeerimata. Iga kandidaat (StrategyConfig)
+# jookseb läbi kõigi walk-forward akende: treening -> test (järgmine periood).
+# Edetabel (ja best_strategy.json) valitakse AINULT treeningakende järgi; testiperioodide
+# (valimiväline) tulemus on valiku hinnang, mitte valikukriteerium (muidu on see look-ahead).
+
+DEFAULT_GRID = {
+    "bull_atr_mult": [2.0, 2.5, 3.0],
+    "bull_breakeven": [1.5, 2.5, 3.5],
+    "bull_hard_stop": [0.90, 0.92, 0.95],
+    "buy_score": [70, 75, 80],
+}
+METRICS = ("return_pct", "pnl_usd", "win_rate", "calmar")
+
+_MARKET = None
+_OPTIONS = None
+_BLOCKS = []
+
+
+# --- OTSINGURUUM ---
+
+def parse_grid(specs):
+    # ["bull_atr_mult=2,2.5,3", "buy_score=70,75"] -> {"bull_atr_mult": [2.0, 2.5, 3.0], ...}
+    known = {f.name for f in fields(StrategyConfig)}
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in known: raise ValueError(f"Tundmatu parameeter: {name}")
+        grid[name] = [float(v) for v in values.split(",") if v.strip()]
+        if not grid[name]: raise ValueError(f"Parameetril {name} pole väärtusi")
+    return grid
+
+
+def candidate_params(grid, samples=None, seed=0):
+    # Täielik võrk või `samples` juhuslikku kombinatsiooni sellest (korduvateta, seemnega)
+    names = list(grid)
+    sizes = [len(grid[n]) for n in names]
+    total = int(np.prod(sizes)) if names else 1
+    if samples is None or samples >= total:
+        return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+    picked = []
+    for number in sorted(random.Random(seed).sample(range(total), samples)):
+        params = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            number, i = divmod(number, size)
+            params[name] = grid[name][i]
+        picked.append({n: params[n] for n in names})
+    return picked
+
+
+def walk_forward_splits(index, folds=4, anchored=False, warmup_days=60):
+    # [(treening_algus, treening_lõpp, test_algus, test_lõpp)]. Esimesed warmup_days on
+    # indikaatorite ja BTC SMA50 soojendus. anchored=True: treening algab alati algusest.
+    start = index[0] + pd.Timedelta(days=warmup_days)
+    usable = index[index >= start]
+    if len(usable) < (folds + 1) * 2: raise ValueError("Liiga vähe andmeid nii paljude akende jaoks")
+    bounds = [usable[int(i * (len(usable) - 1) / (folds + 1))] for i in range(folds + 2)]
+    bounds[-1] = index[-1] + pd.Timedelta(seconds=1)
+    return [(bounds[0] if anchored else bounds[i], bounds[i + 1], bounds[i + 1], bounds[i + 2]) for i in range(folds)]
+
+
+def metric_value(summary, metric):
+    if metric == "calmar": return summary["return_pct"] / max(abs(summary["max_drawdown_pct"]), 1.0)
+    return summary[metric]
+
+
+# --- JAGATUD MÄLU ---
+
+def share_market(m):
+    # NumPy massiivid jagatud mällu; väikesed objektid (ajatelg, sümbolid, režiimid) lähevad pickle'iga
+    blocks, spec, small = [], {}, {}
+    for key, value in m.items():
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            block = shared_memory.SharedMemory(create=True, size=max(value.nbytes, 1))
+            np.ndarray(value.shape, value.dtype, buffer=block.buf)[...] = value
+            blocks.append(block)
+            spec[key] = (block.name, value.shape, value.dtype.str)
+        else:
+            small[key] = value
+    return blocks, spec, small
+
+
+def attach_market(spec, small, options):
+    global _MARKET, _OPTIONS
+    market = dict(small)
+    for key, (name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=name)
+        _BLOCKS.append(block) # viide alles, muidu vabaneks mälu massiivi alt
+        array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        market[key] = array
+    _MARKET, _OPTIONS = market, options
+
+
+def evaluate(params):
+    config = _OPTIONS["base"].with_params(**params)
+    tech = backtest.tech_scores(_MARKET, config)
+    metric = _OPTIONS["metric"]
+    row = dict(params)
+    train, test, train_trades, trades, drawdown = [], [], 0, 0, 0.0
+    for i, (train_start, train_end, test_start, test_end) in enumerate(_OPTIONS["splits"]):
+        tr = backtest.simulate(_MARKET, config, tech, start=train_start, end=train_end, **_OPTIONS["simulation"])["summary"]
+        te = backtest.simulate(_MARKET, config, tech, start=test_start, end=test_end, **_OPTIONS["simulation"])["summary"]
+        row[f"train_{i}"] = round(metric_value(tr, metric), 3)
+        row[f"test_{i}"] = round(metric_value(te, metric), 3)
+        train.append(row[f"train_{i}"])
+        test.append(row[f"test_{i}"])
+        train_trades += tr["trades"]
+        trades += te["trades"]
+        drawdown = min(drawdown, te["max_drawdown_pct"])
+    row.update({"train_mean": round(float(np.mean(train)), 3), "test_mean": round(float(np.mean(test)), 3),
+                "test_min": round(float(np.min(test)), 3), "train_trades": train_trades, "test_trades": trades,
+                "test_max_drawdown": drawdown})
+    return row
+
+
+def run_search(m, candidates, splits, metric="return_pct", base=None, simulation=None, workers=None, min_trades=1):
+    options = {"base": base or StrategyConfig(), "splits": splits, "metric": metric, "simulation": simulation or {}}
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        global _MARKET, _OPTIONS
+        _MARKET, _OPTIONS = m, options
+        rows = [evaluate(p) for p in candidates]
+    else:
+        blocks, spec, small = share_market(m)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=attach_market, initargs=(spec, small, options)) as pool:
+                rows = list(pool.map(evaluate, candidates, chunksize=max(1, len(candidates) // (workers * 4))))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+    # Järjestus ainult treeningu järgi; liiga vähe treeningtehinguid (nt lävi nii kõrge, et midagi
+    # ei osteta) -> edetabeli lõppu
+    results = pd.DataFrame(rows)
+    results["_eligible"] = results["train_trades"] >= min_trades
+    results = results.sort_values(["_eligible", "train_mean"], ascending=False, kind="stable").drop(columns="_eligible")
+    results.insert(0, "rank", range(1, len(results) + 1))
+    return results.reset_index(drop=True)
+
+
+def walk_forward_selection(results, params, folds):
+    # Klassikaline walk-forward: igas aknas parim treeningu järgi, hinnatakse tema testitulemust
+    picks = []
+    for i in range(folds):
+        best = results.sort_values(f"train_{i}", ascending=False, kind="stable").iloc[0]
+        picks.append({"fold": i, **{p: best[p] for p in params}, "train": best[f"train_{i}"], "test": best[f"test_{i}"]})
+    return pd.DataFrame(picks)
+
+
+# --- KÄSUREA LIIDES ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vibe Trader strateegia optimeerija (võrk/juhuslik otsing, walk-forward)")
+    backtest.add_market_args(parser)
+    parser.add_argument("--grid", action="append", default=[], metavar="NIMI=V1,V2", help="otsitav parameeter (korratav)")
+    parser.add_argument("--random", type=int, metavar="N", help="N juhuslikku kombinatsiooni võrgust (muidu kogu võrk)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--anchored", action="store_true", help="treeningaken algab alati andmete algusest")
+    parser.add_argument("--metric", choices=METRICS, default="return_pct")
+    parser.add_argument("--min-trades", type=int, default=1, help="vähem treeningtehinguid -> edetabeli lõppu")
+    parser.add_argument("--base-config", help="StrategyConfig JSON, mille peale otsitakse (vaikimisi strategy.py)")
+    parser.add_argument("--workers", type=int, default=None, help="protsesside arv (vaikimisi kõik tuumad)")
+    parser.add_argument("--out", default="optimizer_results.csv")
+    parser.add_argument("--best-out", default="best_strategy.json", help="parim konfiguratsioon (main.py STRATEGY_CONFIG)")
+    args = parser.parse_args(argv)
+
+    grid = parse_grid(args.grid) if args.grid else DEFAULT_GRID
+    candidates = candidate_params(grid, args.random, args.seed)
+    base = StrategyConfig.load(args.base_config)
+
+    started = time.perf_counter()
+    m = backtest.load_market(args)
+    splits = walk_forward_splits(m["index"], args.folds, args.anchored)
+    prepared = time.perf_counter()
+    results = run_search(m, candidates, splits, args.metric, base, backtest.simulation_options(args), args.workers, args.min_trades)
+    done = time.perf_counter()
+
+    results.to_csv(args.out, index=False)
+    best = base.with_params(**{p: results.iloc[0][p] for p in grid})
+    with open(args.best_out, "w") as f: json.dump(best.to_dict(), f, indent=4)
+
+    print(f"🔬 OPTIMEERIJA: {len(candidates)} kandidaati x {len(splits)} akent, {len(m['symbols'])} sümbolit x {len(m['index'])} baari "
+          f"(ettevalmistus {prepared - started:.2f}s, otsing {done - prepared:.2f}s, {args.workers or os.cpu_count()} protsessi)")
+    with pd.option_context("display.width", 200, "display.max_columns", 50):
+        print(results.head(10).to_string(index=False))
+        print("\n   Walk-forward valik (parim treeningul -> tulemus testis):")
+        picks = walk_forward_selection(results, list(grid), len(splits))
+        print(picks.to_string(index=False))
+    print(f"   Valimiväline keskmine ({args.metric}): {picks['test'].mean():.3f}")
+    top = results.iloc[0]
+    print(f"   {args.best_out}: parim treeningu keskmise järgi (train {top['train_mean']:.3f}), "
+          f"testiperioodidel {top['test_mean']:.3f} (min {top['test_min']:.3f}, {int(top['test_trades'])} tehingut)")
+    print(f"   -> {args.out}, {args.best_out}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+
+# --- ANDMEFAILIDE KAUST ---
+# main.py (kirjutab) ja dashboard.py (loeb) peavad leidma samad failid: logid, brain.json,
+# state.db, tehingute arhiiv. VIBE_DATA_DIR=<kaust> suunab need mujale (nt bench.py), vaikimisi
+# projekti kaust. Kutsu pärast load_dotenv-i, et ka .env-is antud kaust kehtiks.
+# Lukufail (bot.lock) jääb alati BASE_DIR-i: üks bot projekti kohta.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def data_dir():
+    return os.getenv("VIBE_DATA_DIR") or BASE_DIR
@@ -0,0 +1,125 @@
+import os
+import csv
+import threading
+from datetime import datetime
+
+# --- HINNAVOOG (stopid ja tipud tiksu kaupa) ---
+# Ühine liides: start(on_tick) -> set_symbols(sümbolid) -> stop().
+# on_tick(symbol, price, ts) kutsutakse iga tehingu (tiksu) peale voo enda lõimes.
+# AlpacaCryptoFeed = päris websocket, ReplayFeed = salvestatud tiksufail (testid, kordus),
+# TickRecorder salvestab päris voo samasse formaati (CSV: ts,symbol,price).
+
+TICK_FIELDS = ["ts", "symbol", "price"]
+
+
+class PriceFeed:
+    def __init__(self):
+        self.on_tick = None
+        self.symbols = set()
+        self.ticks = 0
+
+    def start(self, on_tick):
+        self.on_tick = on_tick
+
+    def set_symbols(self, symbols):
+        self.symbols = set(symbols)
+
+    def stop(self):
+        pass
+
+    def _emit(self, symbol, price, ts):
+        if symbol not in self.symbols or self.on_tick is None: return
+        self.ticks += 1
+        self.on_tick(symbol, float(price), ts)
+
+
+class AlpacaCryptoFeed(PriceFeed):
+    def __init__(self, api_key, secret_key):
+        super().__init__()
+        from alpaca.data.live import CryptoDataStream
+        self.stream = CryptoDataStream(api_key, secret_key)
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def set_symbols(self, symbols):
+        symbols = set(symbols)
+        with self.lock:
+            added, removed = symbols - self.symbols, self.symbols - symbols
+            self.symbols = symbols
+            if added: self.stream.subscribe_trades(self._handle_trade, *sorted(added))
+            if removed: self.stream.unsubscribe_trades(*sorted(removed))
+            # Voog käivitatakse alles esimese sümboliga (tühja tellimusega ootab see aktiivselt)
+            if self.symbols and self._thread is None:
+                self._thread = threading.Thread(target=self.stream.run, name="price-feed", daemon=True)
+                self._thread.start()
+
+    async def _handle_trade(self, trade):
+        self._emit(trade.symbol, trade.price, trade.timestamp)
+
+    def stop(self):
+        with self.lock:
+            if self._thread is None: return
+            try: self.stream.stop()
+            except Exception: pass
+            self._thread.join(timeout=10)
+            self._thread = None
+
+
+class ReplayFeed(PriceFeed):
+    # speed=0: nii kiiresti kui võimalik; speed=1: reaalajas; speed=10: 10x kiiremini
+    def __init__(self, path, speed=0.0):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, on_tick):
+        super().start(on_tick)
+        self._thread = threading.Thread(target=self._run, name="price-replay", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        previous = None
+        try:
+            for ts, symbol, price in read_ticks(self.path):
+                if self._stop.is_set(): return
+                if self.speed > 0 and previous is not None:
+                    self._stop.wait(max((ts - previous).total_seconds(), 0) / self.speed)
+                previous = ts
+                self._emit(symbol, price, ts)
+        finally:
+            self.done.set()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None: self._thread.join(timeout=10)
+
+
+def read_ticks(path):
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try: yield datetime.fromisoformat(row["ts"]), row["symbol"], float(row["price"])
+            except (KeyError, ValueError, TypeError): continue
+
+
+class TickRecorder:
+    # Mähib on_tick funktsiooni ja kirjutab iga tiksu faili (hilisemaks ReplayFeed-iks)
+    def __init__(self, path, on_tick):
+        self.path = path
+        self.on_tick = on_tick
+        self.lock = threading.Lock()
+        new_file = not os.path.exists(path)
+        self._file = open(path, "a", newline="")
+        self._writer = csv.writer(self._file)
+        if new_file: self._writer.writerow(TICK_FIELDS)
+
+    def __call__(self, symbol, price, ts):
+        ts = ts or datetime.now()
+        with self.lock:
+            self._writer.writerow([ts.isoformat(), symbol, price])
+        self.on_tick(symbol, price, ts)
+
+    def close(self):
+        with self.lock: self._file.close()
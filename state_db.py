@@ -0,0 +1,185 @@
+import os
+import csv
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# --- SQLITE OLEK (positsioonid, cool down, tehingute arhiiv) ---
+# Valikuline alternatiiv brain.json + trade_archive.csv paarile (STATE_BACKEND=sqlite).
+# WAL režiim: bot kirjutab, dashboard loeb samal ajal ilma lukkudeta.
+# Sama liides mis BrainStore-il, nii et main.py abifunktsioonid ei tea, kumb taga on.
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS positions (
+        symbol TEXT PRIMARY KEY,
+        highest_price REAL NOT NULL DEFAULT 0,
+        atr_at_entry REAL,
+        is_risk_free INTEGER NOT NULL DEFAULT 0,
+        last_rsi REAL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cooldowns (
+        symbol TEXT PRIMARY KEY,
+        sold_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        time TEXT NOT NULL,
+        day TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        entry_price REAL,
+        exit_price REAL,
+        qty REAL,
+        profit_usd REAL,
+        profit_pct REAL,
+        reason TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS trades_symbol ON trades (symbol)",
+    "CREATE INDEX IF NOT EXISTS trades_day ON trades (day)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+POSITION_FIELDS = ["highest_price", "atr_at_entry", "is_risk_free", "last_rsi"]
+
+
+def connect(path, readonly=False):
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=10, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class SqliteStateStore:
+    def __init__(self, path, cooldown_seconds=6 * 3600):
+        self.path = path
+        self.cooldown_seconds = cooldown_seconds
+        self.lock = threading.RLock()
+        self.conn = connect(path)
+        with self.lock, self.conn:
+            for statement in SCHEMA: self.conn.execute(statement)
+
+    # --- POSITSIOONID ---
+
+    def get_position(self, symbol):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM positions WHERE symbol = ?", (symbol,)).fetchone()
+        if row is None: return {}
+        pos = {k: row[k] for k in POSITION_FIELDS if row[k] is not None}
+        pos["is_risk_free"] = bool(row["is_risk_free"])
+        return pos
+
+    def put_position(self, symbol, pos):
+        values = [pos.get("highest_price", 0), pos.get("atr_at_entry"), int(bool(pos.get("is_risk_free"))), pos.get("last_rsi")]
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO positions (symbol, highest_price, atr_at_entry, is_risk_free, last_rsi, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [symbol] + values + [datetime.now().timestamp()])
+
+    def remove_position(self, symbol):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM positions WHERE symbol = ?", (symbol,))
+
+    def positions(self):
+        with self.lock:
+            symbols = [r["symbol"] for r in self.conn.execute("SELECT symbol FROM positions")]
+        return {s: self.get_position(s) for s in symbols}
+
+    # --- COOL DOWN ---
+
+    def last_sold(self, symbol):
+        with self.lock:
+            row = self.conn.execute("SELECT sold_at FROM cooldowns WHERE symbol = ?", (symbol,)).fetchone()
+        return row["sold_at"] if row else None
+
+    def set_cooldown(self, symbol, timestamp):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO cooldowns VALUES (?, ?)", (symbol, timestamp))
+
+    def prune_cooldowns(self, now=None):
+        now = now or datetime.now().timestamp()
+        with self.lock, self.conn:
+            return self.conn.execute("DELETE FROM cooldowns WHERE sold_at <= ?", (now - self.cooldown_seconds,)).rowcount
+
+    # --- TEHINGUD ---
+
+    def record_trade(self, time, symbol, entry_price, exit_price, qty, profit_usd, profit_pct, reason):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO trades (time, day, symbol, entry_price, exit_price, qty, profit_usd, profit_pct, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time, time[:10], symbol, entry_price, exit_price, qty, profit_usd, profit_pct, reason))
+
+    def flush(self):
+        # Iga muudatus on juba oma tehingus kettal; jätame ainult aegunud cool down-id välja
+        self.prune_cooldowns()
+        return True
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+    # --- ÜHEKORDNE MIGRATSIOON ---
+
+    def migrate_from_files(self, brain_file, archive_file):
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_at'").fetchone(): return None
+
+        brain = {}
+        if os.path.exists(brain_file):
+            try:
+                with open(brain_file, 'r') as f: brain = json.load(f)
+            except Exception: brain = {}
+
+        trades = []
+        if os.path.exists(archive_file):
+            with open(archive_file, newline='') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        trades.append((row["Time"], row["Time"][:10], row["Symbol"], float(row["Entry Price"]), float(row["Exit Price"]),
+                                       float(row["Qty"]), float(row["Profit USD"]), float(row["Profit %"]), row["Reason"]))
+                    except (KeyError, ValueError, TypeError): continue
+
+        now = datetime.now().timestamp()
+        with self.lock, self.conn:
+            for symbol, pos in brain.get("positions", {}).items():
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO positions (symbol, highest_price, atr_at_entry, is_risk_free, last_rsi, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (symbol, pos.get("highest_price", 0), pos.get("atr_at_entry"), int(bool(pos.get("is_risk_free"))), pos.get("last_rsi"), now))
+            for symbol, sold_at in brain.get("cool_down", {}).items():
+                self.conn.execute("INSERT OR IGNORE INTO cooldowns VALUES (?, ?)", (symbol, sold_at))
+            self.conn.executemany(
+                "INSERT INTO trades (time, day, symbol, entry_price, exit_price, qty, profit_usd, profit_pct, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                trades)
+            self.conn.execute("INSERT INTO meta VALUES ('migrated_at', ?)", (datetime.now().isoformat(),))
+        return {"positions": len(brain.get("positions", {})), "cooldowns": len(brain.get("cool_down", {})), "trades": len(trades)}
+
+
+# --- PÄRINGUD (dashboard jms, eraldi read-only ühendusega) ---
+
+def pnl_by_symbol(conn):
+    return conn.execute("""
+        SELECT symbol, COUNT(*) AS trades, SUM(profit_usd > 0) AS wins,
+               ROUND(SUM(profit_usd), 2) AS pnl_usd, ROUND(AVG(profit_pct), 2) AS avg_pct
+        FROM trades GROUP BY symbol ORDER BY pnl_usd DESC
+    """).fetchall()
+
+
+def pnl_by_day(conn, days=30):
+    # `day` on kohaliku aja kuupäev (log_trade_to_csv) -> ka piir kohalikus ajas, mitte UTC-s
+    return conn.execute("""
+        SELECT day, COUNT(*) AS trades, ROUND(SUM(profit_usd), 2) AS pnl_usd
+        FROM trades WHERE day >= date('now', 'localtime', ?) GROUP BY day ORDER BY day
+    """, (f"-{int(days)} days",)).fetchall()
+
+
+def open_positions(conn):
+    return conn.execute("SELECT symbol, highest_price, atr_at_entry, is_risk_free, last_rsi FROM positions ORDER BY symbol").fetchall()
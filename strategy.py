@@ -0,0 +1,109 @@
+import json
+from dataclasses import dataclass, asdict, fields, replace
+import numpy as np
+
+# --- STRATEEGIA REEGLID ---
+# Puhtad funktsioonid ilma I/O-ta: sama kood töötab ühe mündi (skalaarid)
+# ja kogu universumi (NumPy massiivid) peal.
+# Kõik häälestatavad numbrid on StrategyConfig-is (vaikeväärtused = käsitsi valitud reeglid);
+# optimizer.py otsib paremaid, main.py loeb valitud konfi STRATEGY_CONFIG failist.
+
+MIN_TECH_VOLUME_USD = 10000
+MIN_EQUITY_USD = 50
+MIN_ORDER_USD = 10
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    # Tehniline skoor (BULL)
+    bull_rsi_oversold: float = 30    # RSI alla selle: +30
+    bull_rsi_max: float = 55         # RSI alla selle: +15
+    bull_adx_min: float = 25         # ADX üle selle: +10
+    # Tehniline skoor (BEAR)
+    bear_rsi_deep: float = 25        # RSI alla selle: +45
+    bear_rsi_oversold: float = 30    # RSI alla selle: +25
+    bear_rsi_max: float = 45         # RSI üle selle: -50
+    # Sisenemine
+    min_tech_score: float = 55       # alates sellest tehnilisest skoorist küsitakse AI hinnangut
+    buy_score: float = 75            # ost, kui lõpphinne on sellest suurem
+    ai_weight: float = 0.4           # lõpphinne = AI * 0.4 + tehnika * 0.6
+    bull_size: float = 0.07          # osa kontost ühe ostu kohta
+    bear_size: float = 0.04
+    # Stopid
+    bull_atr_mult: float = 2.5       # trailing stop = tipp - 2.5 * ATR
+    bear_atr_mult: float = 1.5
+    bull_breakeven: float = 2.5      # kasum %, millest alates on positsioon riskivaba
+    bear_breakeven: float = 1.0
+    bull_hard_stop: float = 0.92     # kõva stopp = sisenemishind * 0.92
+    bear_hard_stop: float = 0.94
+    breakeven_buffer: float = 1.005  # riskivaba stopp = sisenemishind * 1.005
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown: raise ValueError(f"Tundmatud strateegia parameetrid: {', '.join(sorted(unknown))}")
+        return cls(**{k: float(v) for k, v in data.items()})
+
+    @classmethod
+    def load(cls, path):
+        if not path: return cls()
+        with open(path, "r") as f: return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return asdict(self)
+
+    def with_params(self, **params):
+        return replace(self, **{k: float(v) for k, v in params.items()})
+
+
+DEFAULT_CONFIG = StrategyConfig()
+
+
+def technical_score(mode, rsi, macd_diff, adx, vol_usd, config=DEFAULT_CONFIG):
+    rsi, macd_diff, adx, vol_usd = (np.asarray(x, dtype=float) for x in (rsi, macd_diff, adx, vol_usd))
+    score = np.full(np.broadcast(rsi, macd_diff, adx, vol_usd).shape, 50.0)
+
+    if mode == "BULL":
+        score += np.where(rsi < config.bull_rsi_oversold, 30, np.where(rsi < config.bull_rsi_max, 15, 0))
+        score += np.where(macd_diff > 0, 10, 0)
+        score += np.where(adx > config.bull_adx_min, 10, 0)
+    elif mode == "BEAR":
+        # Konservatiivne loogika
+        score += np.where(rsi < config.bear_rsi_deep, 45, np.where(rsi < config.bear_rsi_oversold, 25, np.where(rsi > config.bear_rsi_max, -50, 0)))
+        score += np.where(vol_usd > 1000000, 10, 0)
+        score += np.where(macd_diff > 0, 15, 0)
+
+    score = np.where(vol_usd < MIN_TECH_VOLUME_USD, 0, score)
+    score = np.where(np.isnan(rsi), 0, score)
+    return np.clip(score, 0, 100)
+
+
+def compute_stop(mode, entry_price, profit_pct, highest_price, atr, is_risk_free, config=DEFAULT_CONFIG):
+    # Tagastab (final_stop, stop_type, risk_free): kas positsioon on (nüüd) riskivaba
+    if mode == "BEAR":
+        trailing_stop = highest_price - (config.bear_atr_mult * atr)
+        breakeven_trigger = config.bear_breakeven
+        hard_stop = entry_price * config.bear_hard_stop
+    else:
+        trailing_stop = highest_price - (config.bull_atr_mult * atr)
+        breakeven_trigger = config.bull_breakeven
+        hard_stop = entry_price * config.bull_hard_stop
+
+    breakeven_price = entry_price * config.breakeven_buffer
+    if profit_pct >= breakeven_trigger or is_risk_free:
+        final_stop = max(breakeven_price, hard_stop)
+        if trailing_stop > final_stop: final_stop = trailing_stop
+        return final_stop, "PROFIT 🛡️", True
+    return hard_stop, "HARD 🛑", False
+
+
+def final_score(ai_score, tech_score, config=DEFAULT_CONFIG):
+    return (ai_score * config.ai_weight) + (tech_score * (1 - config.ai_weight))
+
+
+def order_notional(mode, equity, config=DEFAULT_CONFIG):
+    # Ostusumma USD-s või None, kui konto on liiga väike
+    if equity < MIN_EQUITY_USD: return None
+    size_pct = config.bear_size if mode == "BEAR" else config.bull_size
+    return max(round(equity * size_pct, 2), MIN_ORDER_USD)
@@ -0,0 +1,13 @@
+import os
+import sys
+import pytest
+
+# Moodulid on repo juurkaustas (python3 main.py), testid impordivad need otse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def main(tmp_path_factory):
+    # main.py imporditakse nagu bench.py-s: failid ajutises kaustas, API võtmed asendatud
+    import bench
+    return bench.import_main(str(tmp_path_factory.mktemp("vibe-data")), {})
@@ -0,0 +1,128 @@
+import re
+import time
+import json
+import asyncio
+from types import SimpleNamespace as NS
+import openai
+from async_ai import AsyncAIRunner, usage_summary
+
+
+def api_error(cls, status, headers=None):
+    # is_retryable/retry_after_seconds vaatavad ainult status_code-i ja vastuse päiseid
+    error = cls.__new__(cls)
+    Exception.__init__(error, f"HTTP {status}")
+    error.status_code = status
+    error.response = NS(headers=headers or {})
+    return error
+
+
+def completion(content):
+    return NS(choices=[NS(message=NS(content=content))], usage=NS(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+
+
+class StubClient:
+    # AsyncOpenAI asendaja: handler(võti, katse) -> vastuse tekst (async); loeb samaaegseid päringuid
+    def __init__(self, handler):
+        self.handler = handler
+        self.attempts = {}
+        self.active = self.peak = 0
+        self.chat = NS(completions=NS(create=self.create))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def create(self, **kwargs):
+        key = kwargs["messages"][-1]["content"]
+        attempt = self.attempts[key] = self.attempts.get(key, 0) + 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try: return completion(await self.handler(key, attempt))
+        finally: self.active -= 1
+
+
+def runner(client, **kwargs):
+    return AsyncAIRunner("test", client_factory=lambda: client, backoff_base=0.01, **kwargs)
+
+
+def requests(*keys):
+    return {key: {"model": "m", "messages": [{"role": "user", "content": key}]} for key in keys}
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    async def handler(key, attempt):
+        if key == "a" and attempt == 1: raise api_error(openai.RateLimitError, 429, {"retry-after": "0"})
+        if key == "b" and attempt < 3: raise api_error(openai.InternalServerError, 503)
+        return key.upper()
+
+    client = StubClient(handler)
+    results, records = runner(client, max_retries=3).run(requests("a", "b", "c"), deadline=5)
+    assert results == {"a": "A", "b": "B", "c": "C"}
+    attempts = {r["key"]: r["attempts"] for r in records}
+    assert attempts == {"a": 2, "b": 3, "c": 1}
+    assert all(r["status"] == "ok" and "error" not in r for r in records)
+    assert usage_summary(records)["retries"] == 3
+    assert usage_summary(records)["total_tokens"] == 45
+
+
+def test_non_retryable_error_and_retry_limit():
+    async def handler(key, attempt):
+        if key == "bad": raise api_error(openai.BadRequestError, 400)
+        raise api_error(openai.InternalServerError, 500)
+
+    results, records = runner(StubClient(handler), max_retries=2).run(requests("bad", "down"), deadline=5)
+    assert results == {"bad": None, "down": None}
+    by_key = {r["key"]: r for r in records}
+    assert by_key["bad"]["attempts"] == 1 and by_key["bad"]["status"] == "error"
+    assert by_key["down"]["attempts"] == 3 and "InternalServerError" in by_key["down"]["error"]
+
+
+def test_concurrency_cap():
+    async def handler(key, attempt):
+        await asyncio.sleep(0.05)
+        return key
+
+    client = StubClient(handler)
+    results, _ = runner(client, concurrency=2).run(requests(*"abcdef"), deadline=5)
+    assert len(results) == 6 and client.peak == 2
+
+
+def test_global_deadline_cancels_slow_calls():
+    async def handler(key, attempt):
+        await asyncio.sleep(10 if key.startswith("slow") else 0.01)
+        return key
+
+    started = time.monotonic()
+    results, records = runner(StubClient(handler), concurrency=2).run(requests("fast", "slow1", "slow2", "queued"), deadline=0.3)
+    assert time.monotonic() - started < 2
+    assert results["fast"] == "fast"
+    assert results["slow1"] is None and results["slow2"] is None and results["queued"] is None
+    by_key = {r["key"]: r for r in records}
+    assert by_key["slow1"]["status"] == "deadline" and by_key["slow1"]["attempts"] == 1
+    assert by_key["queued"]["attempts"] == 0  # semafori taga, päringut ei tehtud
+    assert usage_summary(records)["deadline"] == 3
+
+
+def test_analyze_coins_async_deadline_with_slow_client(main, monkeypatch):
+    # Aeglane münt saab tähtaja järel neutraalse 50, kiire oma skoori; uudised ei kasuta news_pool-i
+    async def handler(prompt, attempt):
+        symbol = re.search(r"NEWS for (\S+) to decide", prompt).group(1)
+        await asyncio.sleep(10 if symbol == "SLOW/USD" else 0.01)
+        return json.dumps({"score": 80, "reason": "test"})
+
+    pools = []
+    def news(symbol, pool=None):
+        pools.append(pool)
+        return f"uudis {symbol} {time.time()}"  # alati uus tekst -> AI vahemälu ei taba
+
+    monkeypatch.setattr(main, "ai_runner", runner(StubClient(handler)))
+    monkeypatch.setattr(main, "AI_DEADLINE_SECONDS", 0.5)
+    monkeypatch.setattr(main, "get_news_hybrid", news)
+    started = time.monotonic()
+    scores, calls = main.analyze_coins_async(["FAST/USD", "SLOW/USD"])
+    assert time.monotonic() - started < 3
+    assert scores == {"FAST/USD": 80, "SLOW/USD": 50}
+    assert calls == 2
+    assert pools == [main.ai_news_pool, main.ai_news_pool]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+import backtest
+
+
+@pytest.fixture(scope="module")
+def market():
+    return backtest.prepare(backtest.synthetic_bars(symbols=6, bars=24 * 120))
+
+
+def test_simulate_is_deterministic(market):
+    first = backtest.simulate(market, ai_score=80)
+    second = backtest.simulate(backtest.prepare(backtest.synthetic_bars(symbols=6, bars=24 * 120)), ai_score=80)
+    assert len(first["trades"]) > 10
+    pd.testing.assert_frame_equal(first["trades"], second["trades"])
+    pd.testing.assert_series_equal(first["equity"], second["equity"])
+    assert first["summary"] == second["summary"]
+
+
+def test_window_end_does_not_see_later_bars(market):
+    # Kuni `end`-ini on olek sama mis täispikas jooksus: tehingud on täispika jooksu algus
+    full = backtest.simulate(market, ai_score=80, close_at_end=False)["trades"]
+    end = market["index"][len(market["index"]) // 2]
+    part = backtest.simulate(market, ai_score=80, end=end, close_at_end=False)["trades"]
+    before = full[pd.to_datetime(full["Time"]).dt.tz_localize("UTC") < end].reset_index(drop=True)
+    assert len(part) > 0
+    pd.testing.assert_frame_equal(part, before)
+
+
+def test_summary_matches_trades(market):
+    result = backtest.simulate(market, ai_score=80)
+    trades, summary = result["trades"], result["summary"]
+    assert summary["trades"] == len(trades)
+    assert summary["wins"] == int((trades["Profit USD"] > 0).sum())
+    assert result["open_positions"] == 0 and trades["Reason"].iloc[-1] == "BACKTEST END"
+    assert summary["final_equity"] == pytest.approx(result["equity"].iloc[-1], abs=0.01)
+    assert summary["max_drawdown_pct"] <= 0
+
+
+def test_neutral_ai_without_history_trades_less(market):
+    # Stub AI skoor (ai_score) on otsuse sisend: kõrgem skoor -> rohkem oste
+    assert len(backtest.simulate(market, ai_score=50)["trades"]) < len(backtest.simulate(market, ai_score=100)["trades"])
+    assert np.isfinite(backtest.simulate(market, ai_score=50)["equity"]).all()
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from bar_cache import BarCache, find_problem, INTERVAL_STEPS, GAP_STEPS, PERIOD_SPANS
+from indicators import synthetic_ohlcv
+
+STEP = INTERVAL_STEPS["1h"]
+
+
+def bars(count=100):
+    return synthetic_ohlcv(bars=count, seed=4)
+
+
+def test_clean_series_has_no_problem():
+    df = bars()
+    assert find_problem(df, STEP, df.index[0]) is None
+
+
+def test_problems():
+    df = bars()
+    start = df.index[0]
+    assert find_problem(None, STEP, start) == "puudub"
+    assert find_problem(df.iloc[:0], STEP, start) == "puudub"
+
+    bad = df.copy()
+    bad.iloc[10, bad.columns.get_loc("close")] = np.nan
+    assert find_problem(bad, STEP, start) == "vigased väärtused"
+    bad = df.copy()
+    bad.iloc[10, bad.columns.get_loc("close")] = 0
+    assert find_problem(bad, STEP, start) == "vigased väärtused"
+
+    bad = df.copy()
+    bad.iloc[10, bad.columns.get_loc("high")] = bad["low"].iloc[10] - 1
+    assert find_problem(bad, STEP, start) == "high < low"
+
+    assert find_problem(df.iloc[::-1], STEP, start) == "ajatelg segamini"
+    assert find_problem(pd.concat([df, df.iloc[-1:]]), STEP, start) == "ajatelg segamini"
+
+
+def test_short_history_and_gaps():
+    df = bars()
+    start = df.index[0]
+    assert find_problem(df.iloc[GAP_STEPS:], STEP, start) is None  # lubatud nihe
+    assert find_problem(df.iloc[GAP_STEPS + 1:], STEP, start) == "ajalugu liiga lühike"
+    assert find_problem(pd.concat([df.iloc[:40], df.iloc[40 + GAP_STEPS - 1:]]), STEP, start) is None
+    assert find_problem(pd.concat([df.iloc[:40], df.iloc[40 + GAP_STEPS:]]), STEP, start) == "auk andmetes"
+
+
+def test_upsert_load_and_evict(tmp_path):
+    cache = BarCache(str(tmp_path / "bars.db"))
+    df = bars(50)
+    cache.upsert("A/USD", "1h", df)
+    loaded = cache.load("A/USD", "1h")
+    assert loaded.index.equals(df.index)
+    assert np.allclose(loaded[["open", "high", "low", "close", "volume"]].to_numpy(), df[["open", "high", "low", "close", "volume"]].to_numpy())
+
+    # Pooleli viimane baar kirjutatakse üle, mitte ei dubleerita
+    revised = df.iloc[-1:].copy()
+    revised["close"] = 123.0
+    cache.upsert("A/USD", "1h", revised)
+    assert len(cache.load("A/USD", "1h")) == 50
+    assert cache.load("A/USD", "1h")["close"].iloc[-1] == 123.0
+
+    assert cache.evict("1h", df.index[10]) == 10
+    assert len(cache.load("A/USD", "1h", since=df.index[20])) == 30
+    assert cache.symbols("1h") == ["A/USD"]
+
+
+def test_indicator_state_roundtrip(tmp_path):
+    cache = BarCache(str(tmp_path / "bars.db"))
+    assert cache.load_state("A/USD", "1h") is None
+    cache.save_state("A/USD", "1h", {"last_ts": 1, "indicators": {}})
+    assert cache.load_state("A/USD", "1h") == {"last_ts": 1, "indicators": {}}
+
+
+def test_month_period_is_calendar_month():
+    # Veebruar on 28 päeva: kogu kuu hõlmav seeria pole "liiga lühike"
+    now = pd.Timestamp("2026-03-01", tz="UTC")
+    df = bars(28 * 24)
+    df.index = pd.date_range("2026-02-01", periods=len(df), freq="h", tz="UTC")
+    assert find_problem(df, STEP, now - PERIOD_SPANS["1mo"]) is None
+
+
+def test_daily_delta_with_naive_yahoo_index(main, tmp_path, monkeypatch):
+    # Yahoo "1d" baarid tulevad ilma ajavööndita; teine kutse peab tegema delta, mitte täislaadimise
+    days = pd.date_range(end=pd.Timestamp.now().normalize(), periods=200, freq="D")
+    frame = bars(len(days))
+    frame.index = days
+    calls = []
+
+    def download(y_symbols, **kwargs):
+        calls.append(kwargs)
+        return {"BTC-USD": frame.iloc[:-1] if "period" in kwargs else frame.iloc[-3:]}
+
+    monkeypatch.setattr(main, "bar_cache", BarCache(str(tmp_path / "bars.db")))
+    monkeypatch.setattr(main, "download_yahoo_batch", download)
+    main.download_yahoo_cached(["BTC-USD"], "6mo", "1d")
+    result = main.download_yahoo_cached(["BTC-USD"], "6mo", "1d")["BTC-USD"]
+
+    assert "period" in calls[0] and "start" in calls[1]
+    assert result.index[-1] == days[-1].tz_localize("UTC")
+    assert result.index[0] >= pd.Timestamp.now(tz="UTC") - PERIOD_SPANS["6mo"]
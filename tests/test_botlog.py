@@ -0,0 +1,63 @@
+import os
+import threading
+from botlog import BufferedLogWriter
+
+
+def read_all(path, backups):
+    # Vanimast uusimani: bot.log.<n> ... bot.log.1, bot.log
+    lines = []
+    for name in [f"{path}.{i}" for i in range(backups, 0, -1)] + [path]:
+        if os.path.exists(name):
+            with open(name, encoding="utf-8") as f: lines += f.read().splitlines()
+    return lines
+
+
+def test_flush_waits_until_lines_are_on_disk(tmp_path):
+    path = str(tmp_path / "bot.log")
+    writer = BufferedLogWriter(path, flush_interval=60, flush_bytes=1 << 20)
+    writer.write("esimene\n")
+    writer.flush()
+    with open(path) as f: assert f.read() == "esimene\n"
+    writer.close()
+
+
+def test_rotation_keeps_every_line_in_order(tmp_path):
+    path = str(tmp_path / "bot.log")
+    writer = BufferedLogWriter(path, max_bytes=300, backups=50, flush_interval=0.01, flush_bytes=64)
+    expected = [f"rida {i:04d}" for i in range(400)]
+    for line in expected: writer.write(line + "\n")
+    writer.close()  # tühjendab järjekorra enne lõppu
+
+    assert read_all(path, 50) == expected
+    rotated = [f"{path}.{i}" for i in range(1, 51) if os.path.exists(f"{path}.{i}")]
+    assert len(rotated) > 5
+    assert all(os.path.getsize(name) <= 300 for name in rotated + [path])
+
+
+def test_no_lines_lost_with_concurrent_writers(tmp_path):
+    path = str(tmp_path / "bot.log")
+    writer = BufferedLogWriter(path, max_bytes=2000, backups=100, flush_interval=0.005, flush_bytes=128)
+
+    def produce(n):
+        for i in range(200): writer.write(f"lõim {n} rida {i}\n")
+    threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    writer.flush()
+    writer.close()
+
+    lines = read_all(path, 100)
+    assert sorted(lines) == sorted(f"lõim {n} rida {i}" for n in range(4) for i in range(200))
+    for n in range(4):  # iga lõime read jäävad omavahel järjekorda
+        own = [line for line in lines if line.startswith(f"lõim {n} ")]
+        assert own == [f"lõim {n} rida {i}" for i in range(200)]
+
+
+def test_oldest_backups_are_dropped(tmp_path):
+    path = str(tmp_path / "bot.log")
+    writer = BufferedLogWriter(path, max_bytes=100, backups=2, flush_interval=0.01, flush_bytes=32)
+    for i in range(200): writer.write(f"rida {i:04d}\n")
+    writer.close()
+    assert sorted(os.listdir(tmp_path)) == ["bot.log", "bot.log.1", "bot.log.2"]
+    lines = read_all(path, 2)
+    assert lines == [f"rida {i:04d}" for i in range(200 - len(lines), 200)]  # alles on kõige uuemad
@@ -0,0 +1,96 @@
+import os
+import json
+import threading
+import pytest
+from brain_store import BrainStore
+
+
+def read(path):
+    with open(path) as f: return json.load(f)
+
+
+def test_flush_writes_atomically_and_only_when_dirty(tmp_path):
+    path = tmp_path / "brain.json"
+    brain = BrainStore(str(path))
+    assert brain.flush() is False  # midagi pole laetud ega muudetud
+    brain.put_position("BTC/USD", {"stop": 1.0})
+    assert brain.flush() is True
+    assert read(path)["positions"] == {"BTC/USD": {"stop": 1.0}}
+    assert brain.flush() is False
+    assert os.listdir(tmp_path) == ["brain.json"]  # temp faile ei jää maha
+
+
+def test_failed_write_keeps_old_file_and_retries(tmp_path, monkeypatch):
+    path = tmp_path / "brain.json"
+    brain = BrainStore(str(path))
+    brain.put_position("BTC/USD", {"stop": 1.0})
+    brain.flush()
+    brain.put_position("ETH/USD", {"stop": 2.0})
+
+    def fail(src, dst): raise OSError("ketas täis")
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError): brain.flush()
+    monkeypatch.undo()
+
+    assert list(read(path)["positions"]) == ["BTC/USD"]
+    assert os.listdir(tmp_path) == ["brain.json"]
+    assert brain.flush() is True  # jäi mustaks -> järgmine salvestus kirjutab
+    assert sorted(read(path)["positions"]) == ["BTC/USD", "ETH/USD"]
+
+
+def test_concurrent_flushes_keep_the_newest_state(tmp_path, monkeypatch):
+    # Esimene salvestus jääb fsync-i taha seisma; vahepeal muudetud seis ei tohi hiljem üle kirjutatud saada
+    path = tmp_path / "brain.json"
+    brain = BrainStore(str(path))
+    brain.put_position("BTC/USD", {"stop": 1.0})
+    started, release = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        real_fsync(fd)
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+
+    first = threading.Thread(target=brain.flush)
+    first.start()
+    assert started.wait(5)
+    brain.put_position("BTC/USD", {"stop": 2.0})
+    second = threading.Thread(target=brain.flush)
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()  # ootab esimese salvestuse lõppu
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert read(path)["positions"]["BTC/USD"] == {"stop": 2.0}
+
+
+def test_cooldowns_are_pruned_in_memory_and_on_flush(tmp_path):
+    path = tmp_path / "brain.json"
+    brain = BrainStore(str(path), cooldown_seconds=3600)
+    brain.set_cooldown("OLD/USD", 1000.0)
+    brain.set_cooldown("NEW/USD", 4000.0)
+    assert brain.prune_cooldowns(now=4601.0) == 1
+    assert brain.last_sold("OLD/USD") is None
+    assert brain.last_sold("NEW/USD") == 4000.0
+
+    brain.set_cooldown("OLD/USD", 1000.0)
+    brain.flush()  # päris kell: mõlemad on ammu aegunud
+    assert read(path).get("cool_down") == {}
+    assert BrainStore(str(path)).last_sold("NEW/USD") is None
+
+
+def test_positions_roundtrip_through_file(tmp_path):
+    path = tmp_path / "brain.json"
+    brain = BrainStore(str(path))
+    brain.put_position("BTC/USD", {"stop": 1.0})
+    brain.get_position("BTC/USD")["stop"] = 99  # koopia, mitte viide mälus olevale kirjele
+    brain.remove_position("ETH/USD")
+    brain.flush()
+    fresh = BrainStore(str(path))
+    assert fresh.get_position("BTC/USD") == {"stop": 1.0}
+    fresh.remove_position("BTC/USD")
+    fresh.flush()
+    assert read(path)["positions"] == {}
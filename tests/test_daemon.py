@@ -0,0 +1,99 @@
+import os
+import sys
+import subprocess
+import pytest
+from daemon import InstanceLock, CycleScheduler, lock_owner
+
+
+def test_second_lock_fails_while_holder_alive(tmp_path):
+    path = str(tmp_path / "bot.lock")
+    # Hoidja on teine protsess, nagu teine bot
+    holder = subprocess.Popen([sys.executable, "-c", f"""
+import sys, time
+sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})
+from daemon import InstanceLock
+assert InstanceLock({path!r}).acquire()
+print("lukus", flush=True)
+time.sleep(30)
+"""], stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "lukus"
+        assert InstanceLock(path).acquire() is False
+        assert lock_owner(path) == holder.pid
+    finally:
+        holder.kill()
+        holder.wait()
+    # Kukkunud protsessi lukk vabaneb ise
+    lock = InstanceLock(path)
+    assert lock.acquire() is True
+    assert InstanceLock(path).acquire() is False  # ka sama protsessi teine katse
+    lock.release()
+    assert lock_owner(path) is None
+    assert InstanceLock(path).acquire() is True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEvent:
+    # stop_event.wait liigutab kella edasi, päris ootamist pole
+    def __init__(self, clock):
+        self.clock = clock
+        self.flag = False
+
+    def is_set(self):
+        return self.flag
+
+    def set(self):
+        self.flag = True
+
+    def wait(self, timeout):
+        self.clock.now += timeout
+        return self.flag
+
+
+def run_schedule(overrun, durations, interval=10):
+    clock, logs, starts = FakeClock(), [], []
+    scheduler = CycleScheduler(interval, overrun=overrun, log=logs.append, clock=clock)
+    scheduler.stop_event = FakeEvent(clock)
+    durations = list(durations)
+
+    def job():
+        starts.append(clock.now)
+        clock.now += durations.pop(0)
+        if not durations: scheduler.stop("test")
+
+    scheduler.run(job)
+    return starts, scheduler, logs
+
+
+def test_skip_realigns_to_the_grid_after_overrun():
+    starts, scheduler, logs = run_schedule("skip", [1, 25, 1, 1])
+    # 25 s tsükkel katab pesad 20 ja 30 -> need jäetakse vahele, järgmine algab pesas 40
+    assert starts == [0, 10, 40, 50]
+    assert scheduler.missed == 2 and scheduler.cycles == 4
+    assert any("Jätan need vahele" in line for line in logs)
+
+
+def test_coalesce_runs_one_cycle_then_keeps_interval():
+    starts, scheduler, logs = run_schedule("coalesce", [1, 25, 1, 1])
+    # Üks asendustsükkel kohe (35), mitte kaks järjest; edasi tavaline samm
+    assert starts == [0, 10, 35, 45]
+    assert scheduler.missed == 2
+    assert any("asendustsükli" in line for line in logs)
+
+
+def test_never_bursts_after_long_overrun():
+    for overrun in ("skip", "coalesce"):
+        starts, _, _ = run_schedule(overrun, [1, 95, 1, 1, 1])
+        gaps = [b - a for a, b in zip(starts[2:], starts[3:])]
+        assert all(gap >= 10 for gap in gaps)
+
+
+def test_unknown_overrun_mode():
+    with pytest.raises(ValueError): CycleScheduler(10, overrun="burst")
@@ -0,0 +1,102 @@
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http_client import HttpClient
+
+
+class StubServer:
+    # Kohalik server: tee -> vastuste järjekord [(status, päised, keha)], viimane kordub
+    def __init__(self, routes):
+        self.routes = {path: list(responses) for path, responses in routes.items()}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers), time.monotonic()))
+                responses = stub.routes[self.path]
+                status, headers, body = responses.pop(0) if len(responses) > 1 else responses[0]
+                if callable(body): status, headers, body = body(self.headers)
+                self.send_response(status)
+                for key, value in headers.items(): self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+    def start(routes):
+        servers.append(StubServer(routes))
+        return servers[-1]
+    yield start
+    for server in servers: server.close()
+
+
+def test_retries_429_and_5xx_honouring_retry_after(serve):
+    server = serve({"/flaky": [(503, {"Retry-After": "1"}, b""), (429, {"Retry-After": "0.5"}, b""), (200, {}, b"ok")]})
+    sleeps = []
+    client = HttpClient(max_retries=3, backoff=0.01, sleep=sleeps.append)
+    response = client.get(server.base + "/flaky", name="flaky")
+    assert response.status_code == 200 and response.text == "ok"
+    assert sleeps == [1.0, 0.5]  # Retry-After on pikem kui jitter (backoff 0.01 s)
+    stats = client.snapshot()["flaky"]
+    assert (stats["requests"], stats["retries"], stats["errors"]) == (1, 2, 0)
+
+
+def test_gives_up_after_max_retries(serve):
+    server = serve({"/down": [(500, {}, b"")]})
+    sleeps = []
+    client = HttpClient(max_retries=2, backoff=0.01, max_backoff=0.05, sleep=sleeps.append)
+    assert client.get(server.base + "/down", name="down").status_code == 500
+    assert len(server.requests) == 3 and len(sleeps) == 2
+    assert all(0 <= s <= 0.05 for s in sleeps)
+    assert client.snapshot()["down"]["errors"] == 1
+    assert HttpClient(max_retries=3, sleep=sleeps.append).get(server.base + "/down", retries=0).status_code == 500
+    assert len(server.requests) == 4
+
+
+def test_conditional_get_returns_cached_body_on_304(serve):
+    def etag(headers):
+        if headers.get("If-None-Match") == '"v1"': return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, b"<rss>uudised</rss>"
+    server = serve({"/rss": [(200, {}, etag)]})
+    client = HttpClient(max_retries=0)
+    assert client.get(server.base + "/rss", name="rss", conditional=True).not_modified is False
+    second = client.get(server.base + "/rss", name="rss", conditional=True)
+    assert second.status_code == 200 and second.not_modified is True
+    assert second.text == "<rss>uudised</rss>"
+    assert server.requests[1][1].get("If-None-Match") == '"v1"'
+    assert client.snapshot()["rss"]["not_modified"] == 1
+    # Ilma conditional=True ei saadeta valideerijaid
+    client.get(server.base + "/rss")
+    assert "If-None-Match" not in server.requests[2][1]
+
+
+def test_per_host_rate_limit(serve):
+    server = serve({"/q": [(200, {}, b"ok")]})
+    # Piirang käib päris hosti järgi, host_map suunab selle kohalikule serverile
+    client = HttpClient(max_retries=0, rate_limits={"limited.test": 2}, host_map={"limited.test": server.base})
+    started = time.monotonic()
+    for _ in range(4): client.get("http://limited.test/q")
+    assert time.monotonic() - started >= 0.9  # 2 kohe (capacity), ülejäänud 2 ühe sekundi jooksul
+    gaps = [b[2] - a[2] for a, b in zip(server.requests[1:], server.requests[2:])]
+    assert min(gaps) >= 0.4
+
+    # Teine host piiranguta
+    started = time.monotonic()
+    for _ in range(4): client.get(server.base + "/q")
+    assert time.monotonic() - started < 0.5
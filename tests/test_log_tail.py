@@ -0,0 +1,52 @@
+import os
+from dashboard_data import LogTail
+
+
+def write(path, text, mode="a"):
+    with open(path, mode) as f: f.write(text)
+
+
+def test_reads_last_lines_only(tmp_path):
+    path = tmp_path / "bot.log"
+    write(path, "".join(f"rida {i}\n" for i in range(1000)), "w")
+    tail = LogTail(str(path), max_lines=5, block_size=64)
+    assert tail.read().splitlines() == [f"rida {i}" for i in range(995, 1000)]
+    assert tail.bytes_read < 200  # ainult lõpu plokid, mitte kogu fail
+
+
+def test_follows_appends_and_partial_lines(tmp_path):
+    path = tmp_path / "bot.log"
+    write(path, "a\nb\n", "w")
+    tail = LogTail(str(path), max_lines=3)
+    assert tail.read() == "a\nb\n"
+    write(path, "c\npool")
+    assert tail.read() == "a\nb\nc\npool"  # pooleli rida lisandub max_lines täisreale
+    write(path, "ik\nd\n")
+    assert tail.read() == "c\npoolik\nd\n"
+
+
+def test_rotation_keeps_old_tail_and_separates_partial(tmp_path):
+    path = tmp_path / "bot.log"
+    write(path, "old\n", "w")
+    tail = LogTail(str(path), max_lines=10)
+    tail.read()
+    write(path, "last\npart")
+    os.rename(path, tmp_path / "bot.log.1")
+    write(path, "rot1\nrot2\n", "w")
+    assert tail.read().splitlines() == ["old", "last", "part", "rot1", "rot2"]
+
+
+def test_truncation_restarts_from_top(tmp_path):
+    path = tmp_path / "bot.log"
+    write(path, "".join(f"{i}\n" for i in range(100)), "w")
+    tail = LogTail(str(path), max_lines=5)
+    tail.read()
+    write(path, "uus\n", "w")
+    assert tail.read() == "uus\n"
+
+
+def test_missing_file(tmp_path):
+    tail = LogTail(str(tmp_path / "puudub.log"))
+    assert tail.read() == ""
+    write(tmp_path / "puudub.log", "x\n", "w")
+    assert tail.read() == "x\n"
@@ -0,0 +1,134 @@
+import time
+import threading
+from types import SimpleNamespace as NS
+from market_data import MarketData
+from ttl_cache import TTLCache
+
+UNIVERSE = ["BTC/USD", "ETH/USD", "SOL/USD", "DOGE/USD", "USDT/USD", "BTC/EUR"]
+
+
+class Broker:
+    def __init__(self):
+        self.calls = {"account": 0, "positions": 0, "assets": 0}
+        self.open = [NS(symbol="BTC/USD")]
+
+    def get_account(self):
+        self.calls["account"] += 1
+        return NS(equity="1000")
+
+    def get_all_positions(self):
+        self.calls["positions"] += 1
+        return list(self.open)
+
+    def get_all_assets(self, request):
+        self.calls["assets"] += 1
+        return [NS(symbol=s, tradable=s != "DOGE/USD") for s in UNIVERSE]
+
+
+class Data:
+    def __init__(self):
+        self.requests = []
+
+    def get_crypto_snapshot(self, request):
+        self.requests.append(list(request.symbol_or_symbols))
+        return {s: NS(latest_trade=NS(price=float(len(s)))) for s in request.symbol_or_symbols}
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def incr(self, name, value=1, **labels):
+        self.count += value
+
+
+def market(chunk_size=200, **kwargs):
+    broker, data, counter = Broker(), Data(), Counter()
+    md = MarketData(broker, data, TTLCache(maxsize=1, ttl=3600), chunk_size=chunk_size, metrics=counter, **kwargs)
+    return md, broker, data, counter
+
+
+def test_cycle_memoizes_account_and_snapshots():
+    md, broker, data, counter = market()
+    md.begin_cycle()
+    for _ in range(3):
+        md.account()
+        md.snapshots()
+    assert broker.calls["account"] == 1 and len(data.requests) == 1
+    md.end_cycle()
+    md.account()  # väljaspool tsüklit alati uus päring
+    assert broker.calls["account"] == 2
+    # account + assets + snapshot tükk + account
+    assert counter.count == 4
+
+
+def test_cycle_memo_is_private_to_the_cycle_thread():
+    md, broker, _, _ = market()
+    md.begin_cycle()
+    md.account()
+    other = threading.Thread(target=md.account)
+    other.start()
+    other.join()
+    assert broker.calls["account"] == 2
+    md.end_cycle()
+
+
+def test_asset_universe_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    md, broker, _, _ = market()
+    assert md.tradable_symbols() == ["BTC/USD", "ETH/USD", "SOL/USD"]  # stablecoin, mitte-USD ja mitte-kaubeldav välja
+    md.tradable_symbols()
+    assert broker.calls["assets"] == 1
+    now[0] += 3601
+    md.tradable_symbols()
+    assert broker.calls["assets"] == 2
+
+
+def test_snapshots_are_chunked_and_include_held_symbols():
+    md, _, data, _ = market(chunk_size=2)
+    md.begin_cycle()
+    snapshots = md.snapshots(extra_symbols=["ETH/USD", "PEPE/USD", "PEPE/USD"])
+    assert data.requests == [["BTC/USD", "ETH/USD"], ["SOL/USD", "PEPE/USD"]]
+    assert set(snapshots) == {"BTC/USD", "ETH/USD", "SOL/USD", "PEPE/USD"}
+    assert md.price("PEPE/USD") == 8.0 and md.price("XRP/USD") is None
+    md.end_cycle()
+    assert md.price("PEPE/USD") is None  # hinnad ainult tsükli ajal
+
+
+def test_positions_shared_until_invalidated():
+    md, broker, _, _ = market()
+    assert md.positions() is md.positions()
+    other = threading.Thread(target=md.positions)
+    other.start()
+    other.join()
+    assert broker.calls["positions"] == 1  # ühine seis ka teistele lõimedele
+
+    broker.open = []
+    md.invalidate_positions()  # täitumine
+    assert md.positions() == [] and broker.calls["positions"] == 2
+    md.positions(fresh=True)
+    assert broker.calls["positions"] == 3
+    md.begin_cycle()  # iga tsükkel algab värske seisuga
+    md.positions()
+    md.positions()
+    md.end_cycle()
+    assert broker.calls["positions"] == 4
+
+
+def test_positions_ttl():
+    now = [0.0]
+    md, broker, _, _ = market(positions_ttl=60, clock=lambda: now[0])
+    md.positions()
+    now[0] = 59
+    md.positions()
+    assert broker.calls["positions"] == 1
+    now[0] = 61
+    md.positions()
+    assert broker.calls["positions"] == 2
+
+    unlimited, broker, _, _ = market(clock=lambda: now[0])
+    unlimited.positions()
+    now[0] = 10 ** 6
+    unlimited.positions()
+    assert broker.calls["positions"] == 1  # positions_ttl=0: ei aegu
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import backtest
+import optimizer
+
+CANDIDATES = [{"bull_hard_stop": 0.90}, {"bull_hard_stop": 0.95}]
+SIMULATION = {"ai_score": 80}
+
+
+def bars():
+    return backtest.synthetic_bars(symbols=6, bars=24 * 120)
+
+
+def scrambled_after(source, cutoff, seed=7):
+    # Sama ajalugu kuni `cutoff`-ini, pärast seda juhuslikult moonutatud hinnad ja käive
+    rng = np.random.default_rng(seed)
+    out = {}
+    for symbol, df in source.items():
+        df = df.copy()
+        later = df.index >= cutoff
+        factor = rng.uniform(0.5, 1.5, later.sum())
+        for column in ("open", "high", "low", "close"): df.loc[later, column] *= factor
+        df.loc[later, "volume"] *= rng.uniform(0.1, 10, later.sum())
+        out[symbol] = df
+    return out
+
+
+def test_splits_are_sequential():
+    index = backtest.prepare(bars())["index"]
+    for anchored in (False, True):
+        splits = optimizer.walk_forward_splits(index, folds=3, anchored=anchored)
+        assert len(splits) == 3
+        for i, (train_start, train_end, test_start, test_end) in enumerate(splits):
+            assert train_start < train_end == test_start < test_end
+            if i: assert test_start == splits[i - 1][3]
+            if anchored: assert train_start == splits[0][0]
+        assert splits[-1][3] > index[-1]
+
+
+def test_fold_never_reads_bars_after_its_window():
+    source = bars()
+    m = backtest.prepare(source)
+    splits = optimizer.walk_forward_splits(m["index"], folds=3)
+    base = optimizer.run_search(m, CANDIDATES, splits, simulation=SIMULATION, workers=1).set_index("bull_hard_stop")
+
+    # Kõik pärast 2. akna treeningu lõppu moonutatud: 1. aken ja 2. treening ei tohi muutuda
+    cutoff = splits[1][1]
+    changed = optimizer.run_search(backtest.prepare(scrambled_after(source, cutoff)), CANDIDATES, splits,
+                                   simulation=SIMULATION, workers=1).set_index("bull_hard_stop")
+    unchanged = ["train_0", "test_0", "train_1"]
+    pd.testing.assert_frame_equal(changed[unchanged].sort_index(), base[unchanged].sort_index())
+    later = ["test_1", "train_2", "test_2"]
+    assert not changed[later].sort_index().equals(base[later].sort_index())  # moonutus ise mõjub
+
+
+def test_ranking_uses_training_only():
+    m = backtest.prepare(bars())
+    splits = optimizer.walk_forward_splits(m["index"], folds=3)
+    results = optimizer.run_search(m, optimizer.candidate_params({"bull_hard_stop": [0.9, 0.95], "buy_score": [60, 90]}),
+                                   splits, simulation=SIMULATION, workers=1, min_trades=1)
+    assert list(results["rank"]) == [1, 2, 3, 4]
+    eligible = results[results["train_trades"] >= 1]
+    assert eligible.index.max() < len(eligible)  # liiga vähe tehinguid -> lõppu
+    assert eligible["train_mean"].is_monotonic_decreasing
+
+
+def test_process_pool_matches_single_process():
+    m = backtest.prepare(bars())
+    splits = optimizer.walk_forward_splits(m["index"], folds=2)
+    single = optimizer.run_search(m, CANDIDATES, splits, simulation=SIMULATION, workers=1)
+    shared = optimizer.run_search(m, CANDIDATES, splits, simulation=SIMULATION, workers=2)
+    pd.testing.assert_frame_equal(single, shared)
+
+
+def test_grid_parsing_and_sampling():
+    grid = optimizer.parse_grid(["bull_atr_mult=2,2.5", "buy_score=70,75,80"])
+    assert grid == {"bull_atr_mult": [2.0, 2.5], "buy_score": [70.0, 75.0, 80.0]}
+    assert len(optimizer.candidate_params(grid)) == 6
+    sample = optimizer.candidate_params(grid, samples=4, seed=1)
+    assert sample == optimizer.candidate_params(grid, samples=4, seed=1)
+    assert len({tuple(p.items()) for p in sample}) == 4
+    with pytest.raises(ValueError): optimizer.parse_grid(["tundmatu=1"])
+    with pytest.raises(ValueError): optimizer.parse_grid(["buy_score="])
@@ -0,0 +1,67 @@
+import csv
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from brain_store import BrainStore
+from price_feed import ReplayFeed, TickRecorder, read_ticks
+
+
+class Broker:
+    def __init__(self, seen):
+        self.seen = seen
+        self.closed = []
+
+    def close_position(self, symbol):
+        self.closed.append((symbol, len(self.seen)))  # mitmenda tiksu peale suleti
+
+
+def record(path, ticks):
+    recorder = TickRecorder(str(path), lambda *tick: None)
+    start = datetime(2026, 1, 1, 12)
+    for i, (symbol, price) in enumerate(ticks):
+        recorder(symbol, price, start + timedelta(seconds=i))
+    recorder.close()
+
+
+def test_recorded_ticks_roundtrip(tmp_path):
+    path = tmp_path / "ticks.csv"
+    record(path, [("BTC/USD", 100.0), ("ETH/USD", 5.5)])
+    assert [(s, p) for _, s, p in read_ticks(str(path))] == [("BTC/USD", 100.0), ("ETH/USD", 5.5)]
+
+
+def test_replayed_tick_fires_stop_without_cycle(main, tmp_path, monkeypatch):
+    entry = 100.0
+    stop = entry * main.STRATEGY.bull_hard_stop
+    ticks = [("BTC/USD", entry), ("ETH/USD", 1.0), ("BTC/USD", (entry + stop) / 2), ("BTC/USD", stop * 0.999), ("BTC/USD", stop * 0.5)]
+    path = tmp_path / "ticks.csv"
+    record(path, ticks)
+
+    seen = []
+    broker = Broker(seen)
+    brain = BrainStore(str(tmp_path / "brain.json"))
+    brain.put_position("BTC/USD", {"highest_price": entry, "atr_at_entry": 2.0, "is_risk_free": False})
+    position = SimpleNamespace(symbol="BTC/USD", qty="1", avg_entry_price=str(entry), current_price=str(entry), unrealized_plpc="0")
+    monkeypatch.setattr(main, "brain", brain)
+    monkeypatch.setattr(main, "trading_client", broker)
+    monkeypatch.setattr(main, "MARKET_MODE", "NEUTRAL")
+    monkeypatch.setattr(main, "ARCHIVE_FILE", str(tmp_path / "trade_archive.csv"))
+    monkeypatch.setattr(main, "held_positions", {"BTC/USD": position})
+
+    def on_tick(symbol, price, ts):
+        seen.append(price)
+        main.on_price_tick(symbol, price, ts)
+
+    feed = ReplayFeed(str(path))
+    feed.set_symbols(["BTC/USD"])
+    feed.start(on_tick)
+    assert feed.done.wait(5)
+    feed.stop()
+
+    # Stopp läks käiku täpselt seda ületanud tiksu peale (4. rida, 3. BTC tiks), edasi enam mitte
+    assert feed.ticks == 4
+    assert broker.closed == [("BTC/USD", 3)]
+    assert main.held_positions == {}
+    with open(tmp_path / "trade_archive.csv") as f:
+        row = list(csv.reader(f))[-1]
+    assert row[1] == "BTC/USD" and float(row[3]) == round(stop * 0.999, 4)  # tiksu hind, mitte tsükli oma
+    assert brain.get_position("BTC/USD") == {}
+    assert brain.last_sold("BTC/USD") is not None
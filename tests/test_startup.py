@@ -0,0 +1,8 @@
+import bench
+
+
+def test_main_import_is_lazy_and_within_budget(tmp_path):
+    # Puhas protsess (-X importtime): rasked paketid ei tohi main.py impordil laadida
+    result = bench.measure_startup(str(tmp_path), {}, repeat=1, warmup=0)
+    assert result["eager"] == []
+    assert result["median"] < bench.STARTUP_BUDGET_SECONDS
@@ -0,0 +1,99 @@
+import os
+import csv
+import json
+import time
+from datetime import datetime, timedelta
+import state_db
+from state_db import SqliteStateStore
+
+ARCHIVE_HEADER = ["Time", "Symbol", "Entry Price", "Exit Price", "Qty", "Profit USD", "Profit %", "Reason"]
+
+
+def write_archive(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(ARCHIVE_HEADER)
+        writer.writerows(rows)
+
+
+def trade(store, day, symbol="BTC/USD", profit=1.0):
+    store.record_trade(f"{day} 12:00:00", symbol, 100.0, 100.0 + profit, 1.0, profit, profit, "TEST")
+
+
+def test_migration_from_brain_json_and_csv(tmp_path):
+    brain_file, archive_file = tmp_path / "brain.json", tmp_path / "trade_archive.csv"
+    brain_file.write_text(json.dumps({
+        "positions": {"BTC/USD": {"highest_price": 110.0, "atr_at_entry": 2.5, "is_risk_free": True, "last_rsi": 61}},
+        "cool_down": {"ETH/USD": 1700000000.0},
+    }))
+    write_archive(archive_file, [
+        ["2026-01-02 10:00:00", "BTC/USD", 100, 110, 1, 10, 10, "PROFIT"],
+        ["2026-01-03 10:00:00", "ETH/USD", 50, 45, 2, -10, -10, "HARD"],
+        ["katki", "SOL/USD", "x", 1, 1, 1, 1, "VIGANE"],  # vigane rida jäetakse vahele
+    ])
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    store.put_position("SOL/USD", {"highest_price": 5.0})  # olemasolevat ei kirjutata üle
+
+    assert store.migrate_from_files(str(brain_file), str(archive_file)) == {"positions": 1, "cooldowns": 1, "trades": 2}
+    assert store.get_position("BTC/USD") == {"highest_price": 110.0, "atr_at_entry": 2.5, "is_risk_free": True, "last_rsi": 61}
+    assert store.last_sold("ETH/USD") == 1700000000.0
+    assert sorted(store.positions()) == ["BTC/USD", "SOL/USD"]
+    # Ühekordne: teine käivitus ei impordi tehinguid uuesti
+    assert store.migrate_from_files(str(brain_file), str(archive_file)) is None
+    conn = state_db.connect(str(tmp_path / "state.db"), readonly=True)
+    assert [tuple(r) for r in conn.execute("SELECT day, symbol, profit_usd FROM trades ORDER BY id")] == [
+        ("2026-01-02", "BTC/USD", 10.0), ("2026-01-03", "ETH/USD", -10.0)]
+
+
+def test_migration_without_files(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    assert store.migrate_from_files(str(tmp_path / "puudub.json"), str(tmp_path / "puudub.csv")) == {"positions": 0, "cooldowns": 0, "trades": 0}
+
+
+def test_positions_and_cooldowns(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"), cooldown_seconds=3600)
+    store.put_position("BTC/USD", {"highest_price": 1.0, "is_risk_free": False})
+    assert store.get_position("BTC/USD") == {"highest_price": 1.0, "is_risk_free": False}
+    store.remove_position("BTC/USD")
+    assert store.get_position("BTC/USD") == {}
+    store.set_cooldown("OLD/USD", 1000.0)
+    store.set_cooldown("NEW/USD", 4000.0)
+    assert store.prune_cooldowns(now=4601.0) == 1
+    assert store.last_sold("OLD/USD") is None and store.last_sold("NEW/USD") == 4000.0
+
+
+def test_query_helpers(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SqliteStateStore(path)
+    today = datetime.now().date()
+    trade(store, today, "BTC/USD", 10.0)
+    trade(store, today, "BTC/USD", -4.0)
+    trade(store, today - timedelta(days=10), "ETH/USD", 3.0)
+    trade(store, today - timedelta(days=40), "ETH/USD", 100.0)
+    store.put_position("BTC/USD", {"highest_price": 2.0, "atr_at_entry": 0.1, "is_risk_free": True})
+
+    conn = state_db.connect(path, readonly=True)
+    assert [tuple(r) for r in state_db.pnl_by_symbol(conn)] == [("ETH/USD", 2, 2, 103.0, 51.5), ("BTC/USD", 2, 1, 6.0, 3.0)]
+    assert [tuple(r) for r in state_db.pnl_by_day(conn, days=30)] == [
+        (str(today - timedelta(days=10)), 1, 3.0), (str(today), 2, 6.0)]
+    assert [tuple(r) for r in state_db.open_positions(conn)] == [("BTC/USD", 2.0, 0.1, 1, None)]
+
+
+def test_pnl_by_day_uses_local_dates(tmp_path):
+    # UTC+14 ja UTC-12: igal kellaajal erineb vähemalt ühes neist kohalik kuupäev UTC omast
+    saved = os.environ.get("TZ")
+    try:
+        for tz in ("Pacific/Kiritimati", "Etc/GMT+12"):
+            os.environ["TZ"] = tz
+            time.tzset()
+            path = str(tmp_path / f"{tz.replace('/', '_')}.db")
+            store = SqliteStateStore(path)
+            today = datetime.now().date()
+            trade(store, today - timedelta(days=1), profit=1.0)
+            trade(store, today, profit=2.0)
+            rows = state_db.pnl_by_day(state_db.connect(path, readonly=True), days=0)
+            assert [tuple(r) for r in rows] == [(str(today), 1, 2.0)], tz
+    finally:
+        if saved is None: os.environ.pop("TZ", None)
+        else: os.environ["TZ"] = saved
+        time.tzset()
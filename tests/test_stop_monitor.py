@@ -0,0 +1,84 @@
+from types import SimpleNamespace as NS
+from brain_store import BrainStore
+from market_data import MarketData
+from ttl_cache import TTLCache
+
+
+class Broker:
+    def __init__(self, positions):
+        self.open = {p.symbol: p for p in positions}
+        self.position_calls = 0
+        self.closed = []
+
+    def get_all_positions(self):
+        self.position_calls += 1
+        return list(self.open.values())
+
+    def close_position(self, symbol):
+        self.closed.append(symbol)
+        self.open.pop(symbol)
+
+
+class Prices:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = 0
+
+    def get_crypto_latest_trade(self, request):
+        self.calls += 1
+        return {s: NS(price=self.prices[s]) for s in request.symbol_or_symbols if s in self.prices}
+
+
+def position(symbol, entry):
+    return NS(symbol=symbol, qty="1", avg_entry_price=str(entry), current_price=str(entry), unrealized_plpc="0")
+
+
+def test_monitor_reuses_positions_until_a_fill(main, tmp_path, monkeypatch):
+    broker = Broker([position("BTC/USD", 100.0), position("ETH/USD", 10.0)])
+    prices = Prices({"BTC/USD": 100.0, "ETH/USD": 10.0})
+    brain = BrainStore(str(tmp_path / "brain.json"))
+    for symbol, entry in (("BTC/USD", 100.0), ("ETH/USD", 10.0)):
+        brain.put_position(symbol, {"highest_price": entry, "atr_at_entry": entry * 0.02, "is_risk_free": False})
+    monkeypatch.setattr(main, "brain", brain)
+    monkeypatch.setattr(main, "trading_client", broker)
+    monkeypatch.setattr(main, "market_data", MarketData(broker, prices, TTLCache(maxsize=1, ttl=60)))
+    monkeypatch.setattr(main, "MARKET_MODE", "NEUTRAL")
+    monkeypatch.setattr(main, "ARCHIVE_FILE", str(tmp_path / "trade_archive.csv"))
+    monkeypatch.setattr(main, "held_positions", {})
+    monkeypatch.setattr(main, "price_feed", None)
+
+    # Kümme monitori tiksu: üks get_all_positions, hinnad iga tiksu kohta ühe päringuga
+    for _ in range(10): main.manage_existing_positions(verbose=False, live_prices=True)
+    assert broker.position_calls == 1 and prices.calls == 10
+    assert broker.closed == []
+
+    # Hind kukub alla kõva stopi -> müük tiksu pealt, seis küsitakse pärast täitumist uuesti
+    prices.prices["ETH/USD"] = 10.0 * main.STRATEGY.bull_hard_stop * 0.99
+    main.manage_existing_positions(verbose=False, live_prices=True)
+    assert broker.closed == ["ETH/USD"]
+    main.manage_existing_positions(verbose=False, live_prices=True)
+    assert broker.position_calls == 2
+    assert list(main.held_positions) == ["BTC/USD"]
+
+    # Tsükkel alustab alati värske seisuga, monitor kasutab seda edasi
+    main.market_data.begin_cycle()
+    main.manage_existing_positions(verbose=False)
+    main.market_data.end_cycle()
+    main.manage_existing_positions(verbose=False, live_prices=True)
+    assert broker.position_calls == 3
+
+
+def test_monitor_skips_stops_without_fresh_price(main, tmp_path, monkeypatch):
+    # Vahemälus positsiooni current_price on vana: ilma värske hinnata ei müüda
+    stale = position("BTC/USD", 100.0)
+    stale.current_price = "1.0"
+    broker = Broker([stale])
+    brain = BrainStore(str(tmp_path / "brain.json"))
+    brain.put_position("BTC/USD", {"highest_price": 100.0, "atr_at_entry": 2.0, "is_risk_free": False})
+    monkeypatch.setattr(main, "brain", brain)
+    monkeypatch.setattr(main, "trading_client", broker)
+    monkeypatch.setattr(main, "market_data", MarketData(broker, Prices({}), TTLCache(maxsize=1, ttl=60)))
+    monkeypatch.setattr(main, "held_positions", {})
+    monkeypatch.setattr(main, "price_feed", None)
+    main.manage_existing_positions(verbose=False, live_prices=True)
+    assert broker.closed == []
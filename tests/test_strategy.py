@@ -0,0 +1,66 @@
+import json
+import numpy as np
+import pytest
+from strategy import StrategyConfig, compute_stop, order_notional, final_score, technical_score, MIN_ORDER_USD
+
+
+def test_hard_stop_before_breakeven():
+    stop, kind, risk_free = compute_stop("BULL", 100.0, 1.0, 101.0, 2.0, False)
+    assert (stop, kind, risk_free) == (pytest.approx(92.0), "HARD 🛑", False)
+    stop, kind, _ = compute_stop("BEAR", 100.0, 0.5, 101.0, 2.0, False)
+    assert (stop, kind) == (pytest.approx(94.0), "HARD 🛑")
+
+
+def test_breakeven_then_trailing():
+    # Kasum üle läve: vähemalt sisenemishind * 1.005, tipu tõustes trailing (tipp - 2.5 * ATR)
+    stop, kind, risk_free = compute_stop("BULL", 100.0, 3.0, 103.0, 2.0, False)
+    assert (stop, kind, risk_free) == (pytest.approx(100.5), "PROFIT 🛡️", True)
+    stop, _, _ = compute_stop("BULL", 100.0, 10.0, 110.0, 2.0, False)
+    assert stop == pytest.approx(105.0)
+    stop, _, _ = compute_stop("BEAR", 100.0, 10.0, 110.0, 2.0, False)
+    assert stop == pytest.approx(107.0)
+
+
+def test_risk_free_stays_risk_free():
+    # Kord riskivaba: ka kasumi langedes ei minda tagasi kõvale stopile
+    stop, kind, risk_free = compute_stop("BULL", 100.0, -1.0, 103.0, 2.0, True)
+    assert (stop, kind, risk_free) == (pytest.approx(100.5), "PROFIT 🛡️", True)
+
+
+def test_config_changes_stops():
+    config = StrategyConfig(bull_hard_stop=0.9, bull_breakeven=5.0)
+    assert compute_stop("BULL", 100.0, 3.0, 103.0, 2.0, False, config) == (pytest.approx(90.0), "HARD 🛑", False)
+
+
+def test_order_notional():
+    assert order_notional("BULL", 10000) == pytest.approx(700.0)
+    assert order_notional("BEAR", 10000) == pytest.approx(400.0)
+    assert order_notional("NEUTRAL", 10000) == pytest.approx(700.0)
+    assert order_notional("BULL", 100) == MIN_ORDER_USD
+    assert order_notional("BULL", 49.99) is None
+
+
+def test_final_score_weights():
+    assert final_score(100, 50) == pytest.approx(70.0)
+    assert final_score(100, 50, StrategyConfig(ai_weight=0.5)) == pytest.approx(75.0)
+
+
+def test_technical_score_scalar_matches_vector():
+    rsi = np.array([20.0, 40.0, 60.0, np.nan])
+    macd = np.array([1.0, -1.0, 1.0, 1.0])
+    adx = np.array([30.0, 10.0, 30.0, 30.0])
+    vol = np.array([2e6, 2e6, 5e3, 2e6])
+    for mode in ("BULL", "BEAR", "NEUTRAL"):
+        vector = technical_score(mode, rsi, macd, adx, vol)
+        scalar = [float(technical_score(mode, *args)) for args in zip(rsi, macd, adx, vol)]
+        assert vector.tolist() == scalar
+    assert technical_score("BULL", rsi, macd, adx, vol).tolist() == [100.0, 65.0, 0.0, 0.0]
+
+
+def test_config_load_rejects_unknown(tmp_path):
+    path = tmp_path / "best.json"
+    path.write_text(json.dumps({"buy_score": 80}))
+    assert StrategyConfig.load(str(path)).buy_score == 80.0
+    path.write_text(json.dumps({"buy_scor": 80}))
+    with pytest.raises(ValueError):
+        StrategyConfig.load(str(path))
@@ -0,0 +1,79 @@
+import pytest
+from dashboard_data import TradeStats, stats_summary, stats_frame, equity_curve, stop_type
+
+HEADER = "Time,Symbol,Entry Price,Exit Price,Qty,Profit USD,Profit %,Reason\n"
+
+
+def row(day, symbol, pnl, reason="HARD 🛑"):
+    return f"{day} 12:00:00,{symbol},100,101,1,{pnl},1.0,{reason}\n"
+
+
+def append(path, text):
+    with open(path, "a") as f: f.write(text)
+
+
+@pytest.fixture
+def files(tmp_path):
+    return str(tmp_path / "trade_archive.csv"), str(tmp_path / "trade_stats.json")
+
+
+def test_aggregates(files):
+    archive, cache = files
+    append(archive, HEADER + row("2024-01-01", "A/USD", 10) + row("2024-01-01", "B/USD", -4, "PROFIT 🛡️")
+           + row("2024-01-02", "A/USD", -8))
+    state = TradeStats(archive, cache).refresh()
+    summary = stats_summary(state)
+    assert summary["trades"] == 3
+    assert summary["win_rate"] == pytest.approx(100 / 3)
+    assert summary["pnl"] == pytest.approx(-2)
+    assert summary["profit_factor"] == pytest.approx(10 / 12)
+    assert summary["max_drawdown"] == pytest.approx(-12)
+    assert state["by_symbol"]["A/USD"] == [2, 1, 2.0]
+    assert state["by_stop"]["PROFIT 🛡️"] == [1, 0, -4.0]
+    assert stats_frame(state["by_symbol"], "symbol").loc["A/USD", "win_rate"] == 50.0
+    assert equity_curve(state)["equity"].tolist() == [6.0, -2.0]
+
+
+def test_incremental_and_partial_lines(files):
+    archive, cache = files
+    stats = TradeStats(archive, cache)
+    append(archive, HEADER + row("2024-01-01", "A/USD", 5))
+    assert stats.refresh()["trades"] == 1
+    append(archive, row("2024-01-02", "B/USD", 3)[:20])  # pooleli rida ootab järgmist korda
+    assert stats.refresh()["trades"] == 1
+    append(archive, row("2024-01-02", "B/USD", 3)[20:])
+    assert stats.refresh()["pnl"] == pytest.approx(8)
+
+
+def test_resumes_from_cache(files):
+    archive, cache = files
+    append(archive, HEADER + row("2024-01-01", "A/USD", 5))
+    TradeStats(archive, cache).refresh()
+    append(archive, row("2024-01-02", "A/USD", 1))
+    stats = TradeStats(archive, cache)
+    assert stats.state["trades"] == 1  # laetud JSON-ist, CSV-d pole uuesti loetud
+    assert stats.refresh()["trades"] == 2
+
+
+def test_rewritten_archive_is_rebuilt(files):
+    archive, cache = files
+    append(archive, HEADER + row("2024-01-01", "A/USD", 5) + row("2024-01-01", "A/USD", 5))
+    stats = TradeStats(archive, cache)
+    stats.refresh()
+    with open(archive, "w") as f: f.write(HEADER + row("2024-02-01", "C/USD", -1) + row("2024-02-01", "C/USD", -1) + row("2024-02-01", "C/USD", 2))
+    state = stats.refresh()
+    assert state["trades"] == 3
+    assert set(state["by_symbol"]) == {"C/USD"}
+
+
+def test_headerless_archive_and_bad_rows(files):
+    archive, cache = files
+    append(archive, row("2024-01-01", "A/USD", 5) + "rikutud,rida\n" + row("2024-01-01", "A/USD", "x"))
+    assert TradeStats(archive, cache).refresh()["trades"] == 1
+
+
+def test_stop_type():
+    assert stop_type("HARD 🛑") == "HARD 🛑"
+    assert stop_type("PROFIT") == "PROFIT 🛡️"
+    assert stop_type("") == "?"
+    assert stop_type("MANUAL") == "MANUAL"
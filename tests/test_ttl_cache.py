@@ -0,0 +1,61 @@
+import time
+from ttl_cache import TTLCache
+
+
+def test_hits_misses_and_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 61
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_per_entry_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2)
+    now[0] += 10
+    assert cache.get("short") is None and cache.get("long") == 2
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a on nüüd viimati kasutatud
+    cache.set("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+
+def test_contains_does_not_count():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    assert "a" in cache and "x" not in cache
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_persistence_roundtrip(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache(maxsize=10, ttl=60, path=path)
+    cache.set("a", [1, "x"])
+    assert cache.save() is True
+    assert cache.save() is False  # muutusteta -> ei kirjuta uuesti
+    assert TTLCache(maxsize=10, ttl=60, path=path).get("a") == [1, "x"]
+
+
+def test_load_skips_expired_and_broken_files(tmp_path, monkeypatch):
+    path = tmp_path / "cache.json"
+    cache = TTLCache(maxsize=10, ttl=1, path=str(path))
+    cache.set("a", 1)
+    cache.save()
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 5)
+    assert len(TTLCache(maxsize=10, ttl=1, path=str(path))) == 0
+    path.write_text("{rikutud")
+    assert len(TTLCache(maxsize=10, ttl=1, path=str(path))) == 0
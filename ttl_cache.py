@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+
+# --- TTL + LRU VAHEMÄLU ---
+# Kirjed aeguvad `ttl` sekundi pärast; kui kirjeid on üle `maxsize`, visatakse
+# välja kõige kauem kasutamata. Valikuliselt salvestatakse JSON faili, et järgmine
+# protsess (või tsükkel) saaks sama vahemälu edasi kasutada.
+
+
+class TTLCache:
+    def __init__(self, maxsize, ttl, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (expires_at, value)
+        self._dirty = False
+        if path: self.load()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key, default=None, count=True):
+        with self.lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._items[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                if count: self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            if count: self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self._items[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+            self._dirty = True
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"size": len(self._items), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path): return
+        try:
+            with open(self.path, 'r', encoding="utf-8") as f: raw = json.load(f)
+        except Exception:
+            return
+        now = time.time()
+        with self.lock:
+            # Failis on vanim esimesena -> LRU järjekord säilib
+            for key, (expires_at, value) in raw.items():
+                if expires_at > now: self._items[key] = (expires_at, value)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def save(self):
+        if not self.path: return False
+        with self.lock:
+            if not self._dirty: return False
+            now = time.time()
+            payload = json.dumps({k: [e, v] for k, (e, v) in self._items.items() if e > now}, ensure_ascii=False)
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".cache-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding="utf-8") as f: f.write(payload)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            with self.lock: self._dirty = True
+            raise
+        return True